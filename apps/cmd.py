@@ -26,6 +26,7 @@ from munge.util.iter_utils import flatten
 from munge.util.err_utils import warn, info, msg, err
 from munge.util.list_utils import list_preview
 from munge.proc.tgrep.tgrep import Tgrep, SmallSentenceThreshold, SmallSubtreeThreshold
+from munge.proc.tgrep.search import search
 import munge.proc.trace as T
 
 from munge.util.config import config
@@ -323,7 +324,16 @@ a pager program.'''
                make_option('-2', '--find-small', help=('Find all small subtree matches (%d or fewer leaves).' % SmallSubtreeThreshold),
                            dest='find_mode', action='store_const', const=Tgrep.FIND_SMALL),
                make_option('-1', '--find-first', help='Match only one node where possible.',
-                           dest='find_mode', action='store_const', const=Tgrep.FIND_FIRST) ])
+                           dest='find_mode', action='store_const', const=Tgrep.FIND_FIRST),
+
+               make_option('-j', '--jobs', help='Search the documents with N worker processes.',
+                           dest='jobs', type='int', metavar='N', default=None),
+               make_option('--max-matches', help='Stop after printing N matches.',
+                           dest='max_matches', type='int', metavar='N', default=None),
+               make_option('--offset', help='Skip the first N matches.',
+                           dest='offset', type='int', metavar='N', default=0),
+               make_option('-c', '--count', help='Only count the matching derivations.',
+                           dest='count_only', action='store_true', default=False) ])
     def do_tgrep(self, args, opts):
         '''Performs a tgrep query.'''
         if not args.strip(): return
@@ -351,9 +361,19 @@ a pager program.'''
         else:
             caption_modes = opts.caption_modes
 
-        def action():
-            tgrep_filter = Tgrep(args, show_mode=show_mode, find_mode=opts.find_mode, caption_modes=caption_modes)
-            self.tracer.run_filters((tgrep_filter, ), self.files)
+        jobs = opts.jobs or self.tracer.jobs
+        if jobs > 1 or opts.max_matches is not None or opts.offset or opts.count_only:
+            # matches are streamed back in corpus order, and the search stops once enough have been printed
+            def action():
+                summary = search(args, self.tracer.transform(self.files), jobs=jobs,
+                                 offset=opts.offset, max_matches=opts.max_matches, count_only=opts.count_only,
+                                 find_mode=opts.find_mode, show_mode=show_mode, caption_modes=caption_modes,
+                                 reader_args=self.tracer.reader_args())
+                print summary
+        else:
+            def action():
+                tgrep_filter = Tgrep(args, show_mode=show_mode, find_mode=opts.find_mode, caption_modes=caption_modes)
+                self.tracer.run_filters((tgrep_filter, ), self.files)
 
         self.redirecting_stdout(action, 'Tgrep', (args, ))
 
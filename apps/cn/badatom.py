@@ -71,6 +71,13 @@ class BadAtom(Filter, OutputPrefacedPTBDerivation):
         else:
             self.bad.write_derivation(bundle)
 
+    def close_output_files(self):
+        OutputPrefacedPTBDerivation.close_output_files(self)
+        self.bad.close_output_files()
+
+    # bad_freqs is accumulated over the whole corpus
+    is_document_local = False
+    
     def output(self):
         with file(os.path.join(self.outdir, 'failed_freqs'), 'w') as f:
             for badcat, freq in sorted_by_value_desc(self.bad_freqs):
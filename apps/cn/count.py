@@ -9,7 +9,7 @@
 
 from munge.proc.filter import Filter
 from munge.cats.trace import analyse
-from munge.util.dict_utils import CountDict, sorted_by_value_desc
+from munge.util.dict_utils import CountDict, sorted_by_value_desc, merge_into
 from munge.trees.traverse import nodes
 from munge.util.err_utils import *
 
@@ -23,6 +23,9 @@ class WordStats(object):
         self.freq = 0
     def __len__(self):
         return len(self.cats)
+    def merge(self, other):
+        self.cats |= other.cats
+        self.freq += other.freq
 
 class LexiconStats(Tabulation('cats', value_maker=WordStats, reducer=len, limit=20, additional_info_maker=lambda e: str(e.freq), separator='&', row_terminator='', additional_row_terminator="\\\\\n"), Filter):
     def __init__(self):
@@ -45,6 +48,12 @@ class CountRules(Filter):
             r = node[1].cat if node.count() > 1 else None
             
             self.counts[ tuple(n for n in (l, r, p)) ] += 1
+            
+    def snapshot(self):
+        return self.counts
+        
+    def merge(self, counts):
+        merge_into(self.counts, counts)
     
     def output(self):
         for (l, r, p), freq in sorted_by_value_desc(self.counts):
@@ -70,6 +79,12 @@ class ListAtoms(Filter):
     def accept_derivation(self, bundle):
         for node in nodes(bundle.derivation):
             self.atoms.update(ListAtoms.get_atoms(node.cat))
+            
+    def snapshot(self):
+        return self.atoms
+        
+    def merge(self, atoms):
+        self.atoms |= atoms
         
     def output(self):
         for atom in sorted(map(str, self.atoms)):
@@ -82,6 +97,12 @@ class CountWords(Filter):
 
     def accept_leaf(self, leaf):
         self.n += 1
+        
+    def snapshot(self):
+        return self.n
+        
+    def merge(self, n):
+        self.n += n
 
     def output(self):
         print self.n
@@ -133,6 +154,16 @@ class CountStructures(Filter):
                     self.adjunction_kinds[kid_tags] += 1
 
 
+    Tables = ('counts', 'adjunction_kinds', 'predication_kinds', 'apposition_kinds',
+              'modification_kinds', 'coordination_kinds')
+
+    def snapshot(self):
+        return dict( (table, dict(getattr(self, table))) for table in self.Tables )
+
+    def merge(self, state):
+        for table, counts in state.iteritems():
+            merge_into(getattr(self, table), counts)
+
     def output(self):
         for node_type, count in sorted_by_value_desc(self.counts):
             if node_type == 'total': continue
@@ -50,6 +50,12 @@ class CheckCoverage(Filter):
                     str(e.cat),
 #                    e.tag
                 ) for e in leaves(bundle.derivation) ]
+                
+    def snapshot(self):
+        return self.words
+        
+    def merge(self, words):
+        self.words += words
 
     def output(self):
         random.shuffle(self.words)
@@ -9,6 +9,7 @@
 
 from munge.proc.filter import Filter
 from munge.proc.tgrep.tgrep import tgrep, multi_tgrep
+from munge.proc.tgrep.multi import get_pattern_set
 from munge.util.dict_utils import smash_key_case
 from munge.util.err_utils import debug
 
@@ -37,19 +38,55 @@ writes the modified derivations out in the prefaced PTB style.'''
         
     @staticmethod
     def do_tgrep_with_callback(root, pattern, callback, **kwargs):
+        return Fix.count_tgrep_with_callback(root, pattern, callback, **kwargs)[0]
+        
+    @staticmethod
+    def count_tgrep_with_callback(root, pattern, callback, **kwargs):
+        '''Calls _callback_ on each match of _pattern_ under _root_, returning the (possibly new) root and the
+number of times _callback_ was called.'''
         new_root = None
+        ncalls = 0
         for match_node, context in tgrep(root, pattern, with_context=True, **kwargs):
-            debug("Callback %s matched", callback.__name__)
-            if context: # only supply a context if the expression binds variables
-                # smash the case, variables in tgrep expressions are case insensitive
-                result = callback(match_node, **smash_key_case(context))
-            else:
-                result = callback(match_node)
+            ncalls += 1
+            result = Fix.call_back(callback, match_node, context)
                 
             # a new root will be returned if one has been installed
             if result: new_root = result
         
-        return new_root or root
+        return new_root or root, ncalls
+        
+    @staticmethod
+    def call_back(callback, match_node, context):
+        '''Calls _callback_ on _match_node_ with the variables bound in _context_, returning its result.'''
+        debug("Callback %s matched", callback.__name__)
+        if context: # only supply a context if the expression binds variables
+            # smash the case, variables in tgrep expressions are case insensitive
+            return callback(match_node, **smash_key_case(context))
+        else:
+            return callback(match_node)
+        
+    @staticmethod
+    def do_ordered_tgrep_with_callbacks(root, patterns_and_callbacks):
+        '''Equivalent to calling do_tgrep_with_callback with each (pattern, callback[, kwargs]) tuple in turn,
+but with a single traversal of the derivation for all the patterns (see munge.proc.tgrep.multi). A callback
+may only modify the subtree under the parent of the highest of the node it is given and the nodes captured
+with it, or else return a new root.'''
+        patterns_and_callbacks = filter(Fix.is_valid_pattern_and_callback_tuple, patterns_and_callbacks)
+        
+        pattern_set = get_pattern_set([ (pattern_and_callback[0], 
+                                         pattern_and_callback[2] if len(pattern_and_callback) == 3 else {})
+                                        for pattern_and_callback in patterns_and_callbacks ])
+        run = pattern_set.run(root)
+        for pattern, pattern_and_callback in zip(pattern_set.patterns, patterns_and_callbacks):
+            callback = pattern_and_callback[1]
+            
+            for match_node, context in run.matches(pattern):
+                result = Fix.call_back(callback, match_node, context)
+                
+                # a new root will be returned if one has been installed
+                if result: run.reset(result)
+            
+        return run.root
     
     @staticmethod
     def is_valid_pattern_and_callback_tuple(v):
@@ -66,15 +103,7 @@ writes the modified derivations out in the prefaced PTB style.'''
         # Ordered actions    
         # [ (pattern1, action1), ... ]
         elif isinstance(pattern, list):
-            for pattern_and_callback in pattern:
-                if Fix.is_valid_pattern_and_callback_tuple(pattern_and_callback):
-                    if len(pattern_and_callback) == 2:
-                        pattern, callback = pattern_and_callback
-                        kwargs = {}
-                    elif len(pattern_and_callback) == 3:
-                        pattern, callback, kwargs = pattern_and_callback
-                        
-                    bundle.derivation = Fix.do_tgrep_with_callback(bundle.derivation, pattern, callback, **kwargs)
+            bundle.derivation = Fix.do_ordered_tgrep_with_callbacks(bundle.derivation, pattern)
         
         # A string tgrep expression            
         # "pattern": fix
@@ -386,16 +386,23 @@ def split_indexed_lex(s):
     return s.split(IndexSeparator)
 
 Template = "%-4s %-4s %-25s %-4s %-15s %s"
-def write_parg(bundle, deps):
-    bits = ['<s id="%s"> %d' % (bundle.label(), len(list(leaves(bundle.derivation))))]
+def write_parg(bundle, deps, nleaves=None):
+    if nleaves is None: nleaves = len(list(leaves(bundle.derivation)))
+    bits = ['<s id="%s"> %d' % (bundle.label(), nleaves)]
     bits += write_deps(deps)
     bits.append('<\s>')
     
     return '\n'.join(bits)
 
+def dep_order(dep):
+    '''Orders dependencies by the index of the head, then the slash index and the index of the argument. _deps_ is
+a set whose iteration order depends on the addresses of the head categories, so the order must not be left to it.'''
+    l, r, head_cat, head_label = dep
+    return (int(split_indexed_lex(l)[1]), head_label, int(split_indexed_lex(r)[1]), str(head_cat))
+
 def write_deps(deps):
     bits = []
-    for l, r, head_cat, head_label in sorted(deps, key=lambda v: int(split_indexed_lex(v[0])[1])):
+    for l, r, head_cat, head_label in sorted(deps, key=dep_order):
         l, li = split_indexed_lex(l)
         r, ri = split_indexed_lex(r)
         bits.append(Template % tuple(str(e) for e in (ri, li, head_cat, head_label, r, l)))
@@ -416,6 +423,7 @@ class MakeDependencies(Filter, OutputDerivation):
 
     @staticmethod
     def process(bundle):
+        nleaves = None
         try:
             deps = get_deps(bundle.derivation)
         # Squelch! We need an empty PARG entry even if the process fails, otherwise AUTO and PARG are out of sync
@@ -424,8 +432,10 @@ class MakeDependencies(Filter, OutputDerivation):
             sys.stderr.flush()
             traceback.print_exc()
             deps = []
+            # The derivation may be what failed to parse, so count its leaves from its text
+            nleaves = len(bundle.tokens())
 
-        return write_parg(bundle, deps)
+        return write_parg(bundle, deps, nleaves)
 
     opt = '9'
     long_opt = 'mkdeps'
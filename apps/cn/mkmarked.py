@@ -14,6 +14,8 @@ config.set(show_vars=True, curly_vars=True)
 
 from munge.cats.headed.nodes import AtomicCategory
 from munge.cats.headed.parse import *
+from munge.cats.headed.template import CategoryTemplate
+from munge.cats.interned import intern_category
 from munge.cats.cat_defs import NP, N
 from munge.util.err_utils import *
 from munge.trees.traverse import leaves
@@ -129,20 +131,41 @@ for (frm, to) in Exceptions:
         assert subcat.slot.var != AtomicCategory.NoVariableSentinel, \
             "Markedup for category %s contains unspecified var" % to
 
+def exception_template(to):
+    '''Returns a template of the markedup category _to_, and the indices of the slots of its copies whose
+variables are to be rewritten, in order of first mention.'''
+    template = CategoryTemplate(to)
+    return template, [ index for (index, (var, lex)) in enumerate(template.slot_specs) if var.startswith('%') ]
+ExceptionTemplates = [ exception_template(to) for (frm, to) in Exceptions ]
+
+def find_exception(cat):
+    '''Returns the index of the first mapping in Exceptions which matches _cat_, or None.'''
+    for index, (frm, to) in enumerate(Exceptions):
+        if cat.equal_respecting_features_and_alias(frm):
+            return index
+    return None
+
+# Maps the interned form of each category looked up so far to find_exception of that category. Categories
+# with the same interned form match the same mappings, since the interned form distinguishes categories by
+# everything equal_respecting_features_and_alias examines (and more).
+_exception_indices = {}
+
 def get_cached_category_for(cat, lex, vars):
     '''If _cat_ matches one of the mappings defined in Exceptions, returns a copy of
 the cached category, filling in its outermost variable's lex with _lex_.'''
-    for frm, to in Exceptions:
-        if cat.equal_respecting_features_and_alias(frm):
-            result = copy.deepcopy(to)
-            for subcat in result.nested_compound_categories():
-                # rewrite a variable name beginning with % with an available
-                # variable (if the markedup has been parsed correctly, all
-                # mentions of that variable will be updated)
-                if subcat.slot.var.startswith('%'):
-                    subcat.slot.var = vars.next()
-            return result
-    return None
+    key = intern_category(cat)
+    index = _exception_indices.get(key, False)
+    if index is False:
+        index = _exception_indices[key] = find_exception(cat)
+    if index is None: return None
+
+    template, rewritten = ExceptionTemplates[index]
+    fresh_slots = template.fresh_slots()
+    # rewrite each variable name beginning with % with an available variable, in order of first
+    # mention (every mention of the variable shares its slot)
+    for slot_index in rewritten:
+        fresh_slots[slot_index].var = vars.next()
+    return template.instantiate_with(fresh_slots)
 
 n = 1
 def label(cat, vars=None, lex=None):
@@ -152,9 +175,7 @@ available variable labels _vars_ and lexical item _lex_.'''
         
     available = vars or variables()
     cached = get_cached_category_for(cat, lex, vars=available)
-    if cached: 
-        cp = copy.deepcopy(cached)
-        return cp
+    if cached: return cached
     
     if cat.slot.var == AtomicCategory.NoVariableSentinel:
         suffix = str(n) if config.debug_vars else ''
@@ -191,10 +212,43 @@ def write_markedup(cats, file):
         print >>file, "\t", 0, cat.__repr__(suppress_alias=True)
         print >>file
 
+def is_unassigned(cat):
+    '''Returns whether no sub-category of _cat_ has a variable assigned, no two share a head, and only the
+outermost may have a head lex, as for a category read from a corpus.'''
+    seen = set()
+    for subcat in cat.nested_compound_categories():
+        slot = subcat.slot
+        if slot.var != AtomicCategory.NoVariableSentinel or id(slot.head) in seen: return False
+        if subcat is not cat and slot.head.lex is not None: return False
+        seen.add(id(slot.head))
+    return True
+
+# Maps the interned form of each unassigned category labelled so far to a template of its markedup category,
+# and whether that category keeps the outermost slot of the original. Labelling an unassigned category gives a
+# result which depends only on its interned form and the head lex of its outermost slot.
+_labelled_templates = {}
+
+def labelled(cat, lex=None):
+    '''Returns the markedup category of _cat_ as label would, but building it from a cached template
+whenever _cat_ is unassigned.'''
+    if config.debug_vars or not is_unassigned(cat): return label(cat, lex=lex)
+
+    key = intern_category(cat)
+    entry = _labelled_templates.get(key, None)
+    if entry is None:
+        outer_slot = cat.slot
+        result = label(cat, lex=lex)
+        entry = _labelled_templates[key] = (CategoryTemplate(result), result.slot is outer_slot)
+
+    template, keeps_outer_slot = entry
+    result = template.instantiate()
+    if keeps_outer_slot: result.slot.head.lex = cat.slot.head.lex
+    return result
+
 def naive_label_derivation(root):
     '''Applies the markedup labelling algorithm to each leaf under _root_.'''
     for leaf in leaves(root):
-        leaf.cat = label(leaf.cat, lex=leaf.lex)
+        leaf.cat = labelled(leaf.cat, lex=leaf.lex)
         # pre-populate the outermost slot with the lexical item
         leaf.cat.slot.head.lex = leaf.lex
         
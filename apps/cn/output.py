@@ -9,12 +9,57 @@
 
 from __future__ import with_statement
 from munge.proc.filter import Filter
-import os, re
+from collections import OrderedDict
+import os, re, errno
 
 IdRegex = re.compile(r'(\d+):(\d+)\((\d+)\)')
 
+class OutputFiles(object):
+    '''Keeps up to _max_open_ output files open for appending, keyed by path, closing the least recently
+used one when another has to be opened. Directories are created as needed, and each one is only checked for once.'''
+    def __init__(self, max_open):
+        self.max_open = max_open
+        self.files = OrderedDict()
+        self.created_dirs = set()
+        
+    def ensure_dir(self, dir):
+        if not dir or dir in self.created_dirs: return
+        
+        if not os.path.exists(dir):
+            try:
+                os.makedirs(dir)
+            except OSError, e:
+                # another worker process may have created it in the meantime
+                if e.errno != errno.EEXIST: raise
+        self.created_dirs.add(dir)
+        
+    def __getitem__(self, path):
+        f = self.files.pop(path, None)
+        if f is None:
+            self.ensure_dir(os.path.dirname(path))
+            if len(self.files) >= self.max_open:
+                _, least_recent = self.files.popitem(last=False)
+                least_recent.close()
+            f = open(path, 'a')
+            
+        self.files[path] = f
+        return f
+        
+    def close(self):
+        for f in self.files.itervalues():
+            f.close()
+        self.files.clear()
+
 class OutputDerivation(object):
     '''Writes out a derivation to disk.'''
+    # Each derivation is written to the file for its own document, so documents can be processed
+    # in parallel (see TraceCore.run_filters_in_parallel)
+    is_document_local = True
+    
+    # The number of output files kept open at once. Derivations arrive document by document, so only
+    # a handful are ever being written to at the same time.
+    MaxOpenFiles = 8
+    
     def __init__(self, outdir, transformer=None, fn_template=None, outdir_template=None):
         '''_transformer_ is a function which receives each derivation bundle and
 returns the string to write, _fn_template_ is a function accepting the bundle and returning
@@ -26,18 +71,23 @@ name and the bundle, and returning the directory name for that derivation.'''
         self.outdir_template = outdir_template or (lambda outdir, _: outdir)
         self.fn_template = fn_template or (lambda bundle: "chtb_%02d%02d.fid" % (bundle.sec_no, bundle.doc_no))
         
+        self.output_files = OutputFiles(self.MaxOpenFiles)
+        
     def write_derivation(self, bundle, subdir=None):
         outdir = self.outdir
         if subdir:
             outdir = os.path.join(outdir, subdir)
         
         outdir_path = self.outdir_template(outdir, bundle)
-
-        if not os.path.exists(outdir_path): os.makedirs(outdir_path)
         output_filename = os.path.join(outdir_path, self.fn_template(bundle))
 
-        with file(output_filename, 'a') as f:
-            print >>f, self.transformer(bundle)
+        print >>self.output_files[output_filename], self.transformer(bundle)
+        
+    def close_output_files(self):
+        '''Flushes and closes every output file. The framework calls this after output(), which in a filter
+deriving from Filter as well as this class resolves to Filter.output, and in each worker process after
+every document (see TraceCore.close_output_files).'''
+        self.output_files.close()
             
 class OutputPTBDerivation(OutputDerivation):
     def __init__(self, outdir):
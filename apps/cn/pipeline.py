@@ -0,0 +1,144 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+from munge.proc.filter import Filter
+from munge.penn.parse import parse_category
+from munge.util.err_utils import info
+
+import munge.penn.aug_nodes as A
+
+# Maps each stage name to the module and class of the filter which implements it.
+Stages = {
+    'clean':       ('apps.cn.clean', 'Clean'),
+    'undo_top':    ('apps.dis.undotop', 'UndoTop'),
+    'flatten_np':  ('apps.dis.flatnp', 'FlattenNP'),
+    'tag':         ('apps.cn.tag', 'TagStructures'),
+    'binarise':    ('apps.cn.binarise', 'Binariser'),
+    'label':       ('apps.cn.catlab', 'LabelNodes'),
+    'fix_rc':      ('apps.cn.fix_rc', 'FixExtraction'),
+    'fix_adverbs': ('apps.cn.fix_adverbs', 'FixAdverbs'),
+    'fix_np':      ('apps.cn.fix_np', 'FixNP'),
+    'output':      ('apps.cn.output', 'CCGbankStyleOutput'),
+}
+
+def load_stage_class(stage_name):
+    '''Returns the filter class implementing the stage _stage_name_.'''
+    try:
+        module_name, class_name = Stages[stage_name]
+    except KeyError:
+        raise RuntimeError("No pipeline stage with name `%s' (expected one of %s)." %
+                           (stage_name, ', '.join(sorted(Stages.keys()))))
+
+    module = __import__(module_name, fromlist=[module_name])
+    return getattr(module, class_name)
+
+def parse_stage_spec(spec):
+    '''Parses a stage specification of the form stage1[=dir1],stage2[=dir2],... into a list of
+(stage name, output directory) pairs, where the output directory is None if not given.'''
+    result = []
+    for bit in spec.split(','):
+        bit = bit.strip()
+        if not bit: continue
+
+        if '=' in bit:
+            stage_name, outdir = bit.split('=', 1)
+        else:
+            stage_name, outdir = bit, None
+
+        result.append( (stage_name, outdir or None) )
+
+    return result
+
+def reread(node, parent=None):
+    '''Brings the derivation rooted at _node_ into the form the next stage would see had it been
+written out and read back by the prefaced PTB reader: nodes of the plain PTB node classes are
+replaced with their augmented counterparts, and each category is re-parsed from its string form,
+so that no category object is shared between nodes or carries state not visible in its output.'''
+    if isinstance(node, (A.Node, A.Leaf)):
+        result = node
+        result.parent = parent
+    elif node.is_leaf():
+        result = A.Leaf(node.tag, node.lex, None, parent)
+    else:
+        result = A.Node(node.tag, node.kids, None, parent)
+
+    if result.category:
+        result.category = parse_category(str(result.category))
+
+    if not result.is_leaf():
+        result.kids = [reread(kid, result) for kid in result.kids]
+
+    return result
+
+class Stage(object):
+    '''Wraps a conversion filter so that the derivations it writes out are handed on to the next
+stage instead, and are optionally written to _outdir_ as well.'''
+    def __init__(self, name, filter, outdir=None):
+        self.name = name
+        self.filter = filter
+
+        # Each conversion filter passes a derivation on by calling write_derivation on it
+        self.dump = filter.write_derivation if outdir else None
+        filter.write_derivation = self.emit
+
+        self.emitted = False
+
+    def emit(self, bundle, subdir=None):
+        self.emitted = True
+        if self.dump: self.dump(bundle, subdir)
+
+    def accept_derivation(self, bundle):
+        '''Runs this stage on _bundle_, returning whether the stage passed the derivation on.'''
+        self.emitted = False
+
+        self.filter.context = bundle
+        self.filter.accept_derivation(bundle)
+        self.filter.context = None
+
+        return self.emitted
+
+class Pipeline(Filter):
+    '''Runs a sequence of conversion stages (e.g. clean,tag,binarise,label,fix_rc,fix_adverbs,fix_np,output=final)
+in one process, passing each derivation between stages in memory. A stage written as stage=DIR
+also writes its output under DIR.'''
+    def __init__(self, stages):
+        Filter.__init__(self)
+
+        self.stages = []
+        for stage_name, outdir in parse_stage_spec(stages):
+            filter_class = load_stage_class(stage_name)
+            self.stages.append( Stage(stage_name, filter_class(outdir), outdir) )
+
+        info("Pipeline: %s", ' -> '.join(stage.name for stage in self.stages))
+
+    def accept_derivation(self, bundle):
+        last = len(self.stages) - 1
+        for i, stage in enumerate(self.stages):
+            # A stage which does not pass a derivation on removes it from the rest of the pipeline,
+            # just as if it had been left out of that stage's output corpus
+            if not stage.accept_derivation(bundle): break
+
+            if i != last:
+                bundle.derivation = reread(bundle.derivation)
+
+    def output(self):
+        for stage in self.stages:
+            stage.filter.output()
+            
+    def close_output_files(self):
+        for stage in self.stages:
+            close = getattr(stage.filter, 'close_output_files', None)
+            if close: close()
+            
+    @property
+    def is_document_local(self):
+        return all(getattr(stage.filter, 'is_document_local', False) for stage in self.stages)
+
+    long_opt = 'pipeline'
+    arg_names = 'STAGE[=OUTDIR],...'
@@ -0,0 +1,85 @@
+# coding: utf-8
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+import os
+import re
+
+from munge.proc.filter import Filter
+from apps.cn.output import OutputDerivation
+from apps.cn.mkdeps import MakeDependencies
+
+# Derivations with [conj] leaves
+ConjRegex = re.compile(r'<L [^ ]+\[conj\]')
+# News agency datelines, which are not sentences
+NewsHeaderRegex = re.compile(r'^新华社.+(对外部|记者|电)')
+NewsFooter = '（ 完 ）'
+# Known bad derivations
+ExcludedRegex = re.compile(r'wsj_1073.23|wsj_1128.31')
+
+# C&C expects (X|Y)[conj] to be written X|Y[conj]
+BracketedConjRegex = re.compile(r'\(([^\s]+)\)\[conj\]')
+def rebracket_conj(text):
+    return BracketedConjRegex.sub(r'\1[conj]', text)
+
+def section_dir(outdir, bundle):
+    return "%s/%02d" % (outdir, bundle.sec_no)
+
+class PostProcess(Filter):
+    '''Makes the final corpus from the output of BadAtom in a single pass: removes derivations with
+[conj] leaves, news datelines and footers and known bad derivations, then writes the AUTO and PARG of each
+remaining derivation side by side under OUTDIR/AUTO and OUTDIR/PARG, with (X|Y)[conj] rebracketed as X|Y[conj].
+This replaces rmconj.py, filter.py, regroup.py, the separate mkdeps pass and the perl rewrites in make.sh.'''
+    def __init__(self, outdir):
+        Filter.__init__(self)
+
+        self.auto = OutputDerivation(os.path.join(outdir, 'AUTO'), transformer=self.auto_text,
+            outdir_template=section_dir)
+        self.parg = OutputDerivation(os.path.join(outdir, 'PARG'), transformer=self.parg_text,
+            fn_template=lambda bundle: "chtb_%02d%02d.parg" % (bundle.sec_no, bundle.doc_no),
+            outdir_template=section_dir)
+
+    @staticmethod
+    def is_news_header(words):
+        # The second test is kept exactly as filter.py had it: re.match anchors at the start, so it only
+        # spares a dateline consisting of nothing but a full stop
+        return NewsHeaderRegex.match(words) and not re.match(r'。$', words)
+
+    def accept_derivation(self, bundle):
+        # All three tests work from the text of the derivation, without parsing it
+        if ConjRegex.search(bundle.raw_text()):
+            return
+
+        words = ' '.join(bundle.tokens())
+        if (self.is_news_header(words) or words.startswith(NewsFooter) or
+            ExcludedRegex.search(bundle.header())):
+            return
+
+        # The AUTO must be written first, since building the PARG relabels the derivation
+        self.auto.write_derivation(bundle)
+        self.parg.write_derivation(bundle)
+
+    @staticmethod
+    def auto_text(bundle):
+        return rebracket_conj('\n'.join((bundle.header(), bundle.raw_text())))
+
+    @staticmethod
+    def parg_text(bundle):
+        # On failure, this still yields an empty PARG entry, keeping AUTO and PARG in step
+        return rebracket_conj(MakeDependencies.process(bundle))
+
+    def close_output_files(self):
+        self.auto.close_output_files()
+        self.parg.close_output_files()
+
+    # Each derivation is written to the files for its own document
+    is_document_local = True
+
+    long_opt = 'postprocess'
+    arg_names = 'OUTDIR'
@@ -10,7 +10,7 @@
 import unittest
 
 from itertools import imap
-from apps.cn.mkdeps import mkdeps, UnificationException, IndexSeparator
+from apps.cn.mkdeps import mkdeps, write_deps, UnificationException, IndexSeparator
 from apps.cn.mkmarked import naive_label_derivation
 from munge.ccg.parse import parse_tree
 
@@ -57,6 +57,18 @@ class DepTests(unittest.TestCase):
         self.check('apps/cn/tests/test4.ccg', 'apps/cn/tests/test4.gs')
         self.check('apps/cn/tests/passives.ccg', 'apps/cn/tests/passives.gs')
         self.check('apps/cn/tests/vnv.ccg', 'apps/cn/tests/vnv.gs')
+
+    def testTiedDependencyOrder(self):
+        def lex(word, index): return word + IndexSeparator + str(index)
+        deps = [ (lex('gave', 1), lex('books', 3), r'((S\NP)/NP)/NP', 1),
+                 (lex('gave', 1), lex('him', 2), r'((S\NP)/NP)/NP', 2),
+                 (lex('gave', 1), lex('John', 0), r'((S\NP)/NP)/NP', 3),
+                 (lex('red', 2), lex('books', 3), r'N/N', 1) ]
+        expected = write_deps(deps)
+        # the same dependencies in any other order are written out in the same order
+        self.assertEqual(write_deps(set(deps)), expected)
+        self.assertEqual(write_deps(reversed(deps)), expected)
+        self.assertEqual([line.split()[:2] for line in expected], [['3', '1'], ['2', '1'], ['0', '1'], ['3', '2']])
 #        self.check('final/chtb_9992.fid', 'apps/cn/tests/blah.gs')
                     
 if __name__ == '__main__':
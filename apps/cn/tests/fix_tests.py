@@ -0,0 +1,140 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+import random
+import unittest
+
+from apps.cn.fix import Fix
+from apps.cn.fix_utils import replace_kid
+from munge.ccg.io import CCGbankReader
+from munge.penn.nodes import Node, Leaf
+from munge.trees.traverse import text
+
+Tags = ('IP', 'VP', 'NP', 'CP', 'PP')
+LeafTags = ('NN', 'VV', 'P', 'NR')
+Lexes = ('b', 'c', 'x')
+
+def random_tree(rng, depth=0):
+    if depth >= 5 or (depth > 0 and rng.random() < 0.3):
+        return Leaf(rng.choice(LeafTags), rng.choice(Lexes), None)
+
+    kids = [ random_tree(rng, depth+1) for _ in xrange(rng.randint(1, 3)) ]
+    node = Node(rng.choice(Tags), kids)
+    for kid in kids: kid.parent = node
+    return node
+
+def path_to(node):
+    '''Returns the position of each of the ancestors of _node_ (and _node_ itself) among its siblings.'''
+    path = []
+    while node.parent is not None:
+        path.append(map(id, node.parent.kids).index(id(node)))
+        node = node.parent
+    return path[::-1]
+
+def wrap(p, v):
+    new = Node('PP', [v])
+    replace_kid(p, v, new)
+    v.parent = new
+    v.tag = 'IP'
+
+def remove(p, n):
+    if len(p.kids) > 1: p.kids.remove(n)
+
+def swap(c, n):
+    c.tag, n.tag = n.tag, c.tag
+
+def install_root(p):
+    if p.parent is None:
+        new = Node('CP', [p])
+        p.parent = new
+        return new
+
+def relabel_kids(p):
+    p.kids = [ Leaf('NN', 'b', p) ]
+
+# Each pattern has a callback which modifies only the subtree under the parent of the nodes it is given
+MutatingPatterns = [
+    (r'/NP/=P < /NN/=N', lambda node, p, n: setattr(n, 'tag', 'NR')),
+    (r'*=P < { /VP/=V < /VV/ }', lambda node, p, v: wrap(p, v)),
+    (r'/IP/=P < /NP/=N', lambda node, p, n: remove(p, n)),
+    (r'^b', lambda node: setattr(node, 'lex', 'c')),
+    (r'/CP/=C $ /NP/=N', lambda node, c, n: swap(c, n)),
+    (r'/IP/=P !> *', lambda node, p: install_root(p)),
+    (r'/VP/=V < /NN/=N', lambda node, v, n: replace_kid(v, n, Leaf('VV', n.lex, None)), { 'left_to_right': True }),
+    (r'/NN/=N >> /CP/=C', lambda node, n, c: setattr(n, 'lex', 'x')),
+    (r'/PP/=P < /P/', lambda node, p: relabel_kids(p)),
+    (r'* < /NR/=R', lambda node, r: setattr(r, 'tag', 'NN')),
+    (r'/VP/ < ^c', lambda node: setattr(node, 'tag', 'CP')),
+    # modify the parent of the matched node
+    (r'^x', lambda node: setattr(node.parent, 'tag', 'NP') if node.parent else None),
+    (r'/NR/', lambda node: replace_kid(node.parent, node, Leaf('VV', node.lex, None)) if node.parent else None),
+]
+
+class FixTests(unittest.TestCase):
+    def setUp(self):
+        self.tree = CCGbankReader('munge/tests/wsj_0003.auto')[4].derivation
+        self.matched = []
+
+    def rename(self, node):
+        self.matched.append(node.lex)
+        node.lex = 'outcomes'
+
+    def record(self, node):
+        self.matched.append(node.lex)
+
+    def testPatternsAppliedInOrder(self):
+        root = Fix.do_ordered_tgrep_with_callbacks(self.tree, [
+            (r'^outcomes', self.record),
+            (r'^findings $ N/N', self.rename),
+            # only matches once the previous pattern has modified the derivation
+            (r'^outcomes $ N/N', self.record),
+            (r'^findings', self.record),
+            (r'^missing', self.record),
+            (r'NP < ^outcomes', self.record),
+        ])
+
+        self.assert_(root is self.tree)
+        self.assertEqual(self.matched, ['findings', 'outcomes'])
+        self.assertEqual(text(self.tree)[:3], ['Although', 'preliminary', 'outcomes'])
+
+    def testMatchesSequentialPasses(self):
+        def logged(log, number, callback):
+            def _callback(node, **context):
+                log.append( (number, path_to(node), repr(node)) )
+                return callback(node, **context)
+            return _callback
+
+        def apply_in_turn(root, patterns_and_callbacks):
+            for pattern_and_callback in patterns_and_callbacks:
+                pattern, callback = pattern_and_callback[:2]
+                kwargs = pattern_and_callback[2] if len(pattern_and_callback) == 3 else {}
+                root = Fix.do_tgrep_with_callback(root, pattern, callback, **kwargs)
+            return root
+
+        rng = random.Random(0)
+        nmatches = 0
+        for trial in xrange(300):
+            patterns = rng.sample(MutatingPatterns, rng.randint(1, len(MutatingPatterns)))
+            seed = rng.random()
+
+            results = []
+            for apply in (apply_in_turn, Fix.do_ordered_tgrep_with_callbacks):
+                log = []
+                patterns_and_callbacks = [ (v[0], logged(log, i, v[1])) + v[2:] for i, v in enumerate(patterns) ]
+                root = apply(random_tree(random.Random(seed)), patterns_and_callbacks)
+                results.append( (log, repr(root)) )
+
+            self.assertEqual(results[1], results[0])
+            nmatches += len(results[0][0])
+
+        # the callbacks were called (and modified the derivations) often enough to exercise each pattern
+        self.assert_(nmatches > 1000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -26,5 +26,23 @@ class MarkedTests(unittest.TestCase):
         ):
             self.assertEqual(repr(label(parse_category(before))), after)
 
+    def testCachedLabelling(self):
+        for cat_string in ('N/N', r'(S[dcl]\NP)/NP', r'(NP/NP)\(S[dcl]\NP)', r'(S[dcl]\NP)/(S[dcl]\NP)~SB',
+                           r'((S\NP)/(S\NP))/((S\NP)/(S\NP))', r'(S[dcl]\S[dcl])/(S[dcl]\NP)'):
+            def leaf_category():
+                cat = parse_category(cat_string)
+                cat.slot.head.lex = 'lex'
+                return cat
+
+            expected = label(leaf_category())
+            # the first call fills the cache, and the second builds its result from it
+            for _ in xrange(2):
+                result = labelled(leaf_category())
+
+                self.assertEqual(repr(result), repr(expected))
+                self.assertEqual(result.alias, expected.alias)
+                # no two results share a slot
+                self.assert_(result.slot is not labelled(leaf_category()).slot)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,42 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from apps.cn.output import OutputDerivation
+from munge.ccg.io import Derivation
+
+class OutputTests(unittest.TestCase):
+    def setUp(self):
+        self.outdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.outdir)
+
+    def testCachedHandles(self):
+        output = OutputDerivation(self.outdir, transformer=lambda bundle: bundle.der_no,
+            outdir_template=lambda outdir, bundle: "%s/%02d" % (outdir, bundle.sec_no))
+        output.output_files.max_open = 2
+
+        for der_no in xrange(1, 4):
+            for doc_no in xrange(1, 4):
+                output.write_derivation(Derivation(0, doc_no, der_no, None))
+        self.failUnless(len(output.output_files.files) <= 2)
+        output.close_output_files()
+        self.failIf(output.output_files.files)
+
+        for doc_no in xrange(1, 4):
+            with open(os.path.join(self.outdir, '00', 'chtb_00%02d.fid' % doc_no)) as f:
+                self.assertEqual(f.read(), '1\n2\n3\n')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from cStringIO import StringIO
+
+from apps.cn.count import CountRules
+from apps.cn.output import OutputDerivation
+from apps.sanity import SanityChecks
+from munge.ccg.io import CCGbankReader
+from munge.proc.filter import Filter
+from munge.proc.trace_core import TraceCore
+
+class FailingOutput(Filter, OutputDerivation):
+    '''Writes out each derivation, failing on the second derivation of each document.'''
+    def __init__(self, outdir):
+        Filter.__init__(self)
+        OutputDerivation.__init__(self, outdir)
+
+    def accept_derivation(self, bundle):
+        if bundle.der_no == 2:
+            raise ValueError("derivation %s rejected" % bundle.label())
+        self.write_derivation(bundle)
+
+def read_outputs(outdir):
+    '''Returns a dict from the path of each file under _outdir_ (relative to _outdir_) to its contents.'''
+    outputs = {}
+    for dirpath, _, filenames in os.walk(outdir):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            with open(path) as f:
+                outputs[os.path.relpath(path, outdir)] = f.read()
+    return outputs
+
+def run(filters, files, jobs, save_state_file=None, merge_state_files=()):
+    '''Runs _filters_ over _files_ with _jobs_ worker processes, returning what was written to stdout and
+to stderr.'''
+    tracer = TraceCore(libraries=[], verbose=False, jobs=jobs)
+    tracer.save_state_file = save_state_file
+    tracer.merge_state_files = list(merge_state_files)
+
+    old_stdout, old_stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = StringIO(), StringIO()
+    try:
+        tracer.run_filters(filters, files)
+        return sys.stdout.getvalue(), sys.stderr.getvalue()
+    finally:
+        sys.stdout, sys.stderr = old_stdout, old_stderr
+
+def counting_filters():
+    return [CountRules(), SanityChecks()]
+
+def counted(filters, files, jobs, **kwargs):
+    '''Runs _filters_ as run does, returning their output lines in sorted order (since CountRules writes rules
+with the same count in no particular order) and what was written to stderr.'''
+    output, errors = run(filters, files, jobs, **kwargs)
+    return sorted(output.splitlines()), errors
+
+class ParallelTests(unittest.TestCase):
+    def setUp(self):
+        self.indir = tempfile.mkdtemp()
+        # eight documents, taking turns between the derivations of the two test documents
+        self.documents = []
+        for doc_no in xrange(1, 9):
+            path = os.path.join(self.indir, 'chtb_00%02d.fid' % doc_no)
+            with open(path, 'w') as f:
+                for deriv in CCGbankReader('munge/tests/wsj_00%s.auto' % ('03' if doc_no % 2 else '87')):
+                    print >>f, 'ID=wsj_00%02d.%d PARSER=GOLD NUMPARSE=1' % (doc_no, deriv.der_no)
+                    print >>f, deriv.derivation
+            self.documents.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.indir)
+
+    def testOutputMatchesSerial(self):
+        results = []
+        for jobs in (1, 2):
+            outdir = tempfile.mkdtemp()
+            try:
+                _, errors = run([FailingOutput(outdir)], [self.indir], jobs)
+                results.append( (read_outputs(outdir), errors) )
+            finally:
+                shutil.rmtree(outdir)
+
+        (serial_outputs, serial_errors), (parallel_outputs, parallel_errors) = results
+        self.assertEqual(len(serial_outputs), 8)
+        for doc_no in xrange(1, 9):
+            self.assert_('Processing failed on derivation 0:%d(2)' % doc_no in serial_errors)
+
+        self.assertEqual(parallel_outputs, serial_outputs)
+        self.assertEqual(parallel_errors, serial_errors)
+
+    def testShardedMerge(self):
+        serial = counted(counting_filters(), [self.indir], 1)
+        self.assert_(serial[0])
+        # the corpus is split into shards whose states are merged
+        self.assert_(counted(counting_filters(), [self.indir], 3) == serial)
+
+    def testSaveAndMergeState(self):
+        serial = counted(counting_filters(), self.documents, 1)
+
+        state_file = os.path.join(self.indir, 'state')
+        run(counting_filters(), self.documents[:4], 1, save_state_file=state_file)
+        self.assert_(counted(counting_filters(), self.documents[4:], 1, merge_state_files=[state_file]) == serial)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+import unittest
+
+from apps.cn.pipeline import parse_stage_spec, reread, Stage
+from munge.penn.parse import parse_tree, AugmentedPennParser
+from munge.trees.traverse import nodes
+import munge.penn.nodes as N
+import munge.penn.aug_nodes as A
+
+class PipelineTests(unittest.TestCase):
+    def testParseStageSpec(self):
+        self.assertEqual(parse_stage_spec('clean,tag=tagged,output=final'),
+                         [('clean', None), ('tag', 'tagged'), ('output', 'final')])
+
+    def testRereadPromotesPlainNodes(self):
+        root = A.Node('IP', [N.Node('NP', [N.Leaf('NN', 'a', None)]), A.Leaf('VV', 'b')])
+        root = reread(root)
+
+        for node in nodes(root):
+            self.failUnless(isinstance(node, (A.Node, A.Leaf)))
+            if not node.is_leaf():
+                for kid in node: self.failUnless(kid.parent is node)
+
+    def testRereadMatchesRoundTrip(self):
+        root = parse_tree('((IP <0> {S[dcl]} (NP <0> {NP} (NN {N} a)) (VP <0> {S[dcl]\NP} (VV {S[dcl]\NP} b))))',
+                          AugmentedPennParser)[0]
+        # share a category object between two nodes, as the labelling stage does
+        root[1].category = root[1][0].category
+        root[1][0].category.alias = 'SB'
+
+        self.assertEqual(repr(reread(root)), repr(parse_tree(repr(root), AugmentedPennParser)[0]))
+        self.failIf(root[1].category is root[1][0].category)
+
+    def testStageOnlyPassesOnEmittedDerivations(self):
+        class Dropper(object):
+            def write_derivation(self, bundle, subdir=None): pass
+            def accept_derivation(self, bundle):
+                if bundle: self.write_derivation(bundle)
+
+        stage = Stage('drop', Dropper())
+        self.failUnless(stage.accept_derivation(True))
+        self.failIf(stage.accept_derivation(False))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from cStringIO import StringIO
+
+from apps.cn.postprocess import PostProcess, rebracket_conj
+from munge.ccg.io import CCGbankReader
+from munge.proc.trace_core import TraceCore
+
+class PostProcessTests(unittest.TestCase):
+    def testRebracketConj(self):
+        self.assertEqual(rebracket_conj(r'(<T (S[dcl]\NP)[conj] 1 2> (<L conj CC CC and conj>)'),
+                         r'(<T S[dcl]\NP[conj] 1 2> (<L conj CC CC and conj>)')
+
+    def testAutoAndPargInStep(self):
+        outdir = tempfile.mkdtemp()
+        try:
+            fn = os.path.join(outdir, 'chtb_0001.fid')
+            with open(fn, 'w') as f:
+                for i, deriv in enumerate(CCGbankReader('munge/tests/wsj_0003.auto')):
+                    print >>f, 'ID=wsj_0001.%d PARSER=GOLD NUMPARSE=1' % (2*i + 1)
+                    print >>f, deriv.derivation
+                    print >>f, 'ID=wsj_0001.%d PARSER=GOLD NUMPARSE=1' % (2*i + 2)
+                    print >>f, '(<T NP 0 2> (<L NP NN NN a NP>) (<L NP[conj] NN NN b NP[conj]>) )'
+
+            TraceCore(libraries=[], verbose=False).run_filters([PostProcess(outdir)], [fn])
+
+            auto = list(CCGbankReader(os.path.join(outdir, 'AUTO', '00', 'chtb_0001.fid')))
+            self.assertEqual([deriv.der_no for deriv in auto], range(1, 2*len(auto), 2))
+            with open(os.path.join(outdir, 'PARG', '00', 'chtb_0001.parg')) as f:
+                self.assertEqual(f.read().count('<s id='), len(auto))
+        finally:
+            shutil.rmtree(outdir)
+
+    def testUnparseableDerivation(self):
+        outdir = tempfile.mkdtemp()
+        try:
+            fn = os.path.join(outdir, 'chtb_0002.fid')
+            with open(fn, 'w') as f:
+                print >>f, 'ID=wsj_0002.1 PARSER=GOLD NUMPARSE=1'
+                print >>f, '(<T NP 0 2> (<L NP NN NN a NP>) (<L NP NN NN b NP>)'
+                print >>f, 'ID=wsj_0002.2 PARSER=GOLD NUMPARSE=1'
+                print >>f, '(<T NP 0 1> (<L N NN NN c N>) )'
+
+            old_stderr, sys.stderr = sys.stderr, StringIO()
+            try:
+                TraceCore(libraries=[], verbose=False).run_filters([PostProcess(outdir)], [fn])
+                errors = sys.stderr.getvalue()
+            finally:
+                sys.stderr = old_stderr
+            self.assert_('Processing failed on derivation 0:2(1)' in errors)
+
+            with open(os.path.join(outdir, 'AUTO', '00', 'chtb_0002.fid')) as f:
+                self.assertEqual(f.read().count('ID='), 2)
+            # the derivation which failed to parse still has an (empty) PARG entry with its leaf count
+            with open(os.path.join(outdir, 'PARG', '00', 'chtb_0002.parg')) as f:
+                self.assertEqual(f.read().split('\n')[:4], ['<s id="0:2(1)"> 2', '<\\s>', '<s id="0:2(2)"> 1', '<\\s>'])
+        finally:
+            shutil.rmtree(outdir)
+
+    def testParallelMatchesSerial(self):
+        indir = tempfile.mkdtemp()
+        try:
+            for doc_no in (1, 2, 3):
+                with open(os.path.join(indir, 'chtb_00%02d.fid' % doc_no), 'w') as f:
+                    for i, deriv in enumerate(CCGbankReader('munge/tests/wsj_0003.auto')):
+                        print >>f, 'ID=wsj_00%02d.%d PARSER=GOLD NUMPARSE=1' % (doc_no, i + 1)
+                        if i == doc_no:
+                            # a derivation which cannot be parsed still gets an (empty) PARG entry
+                            print >>f, '(<T NP 0 2> (<L NP NN NN a NP>) (<L NP NN NN b NP>)'
+                        else:
+                            print >>f, deriv.derivation
+
+            def run(jobs):
+                outdir = tempfile.mkdtemp()
+                old_stderr, sys.stderr = sys.stderr, StringIO()
+                try:
+                    TraceCore(libraries=[], verbose=False, jobs=jobs).run_filters([PostProcess(outdir)], [indir])
+                    errors = sys.stderr.getvalue()
+                finally:
+                    sys.stderr = old_stderr
+
+                outputs = {}
+                for dirpath, _, filenames in os.walk(outdir):
+                    for filename in filenames:
+                        path = os.path.join(dirpath, filename)
+                        with open(path) as f:
+                            outputs[os.path.relpath(path, outdir)] = f.read()
+                shutil.rmtree(outdir)
+                return outputs, errors
+
+            serial_outputs, serial_errors = run(1)
+            for doc_no in (1, 2, 3):
+                self.assert_('Processing failed on derivation 0:%d(%d)' % (doc_no, doc_no + 1) in serial_errors)
+                auto = serial_outputs['AUTO/00/chtb_00%02d.fid' % doc_no]
+                parg = serial_outputs['PARG/00/chtb_00%02d.parg' % doc_no]
+                self.assertEqual(parg.count('<s id='), auto.count('ID='))
+
+            self.assertEqual(run(3), (serial_outputs, serial_errors))
+        finally:
+            shutil.rmtree(indir)
+
+if __name__ == '__main__':
+    unittest.main()
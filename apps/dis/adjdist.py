@@ -1,18 +1,25 @@
 from munge.proc.filter import Filter
+from munge.util.dict_utils import merge_into
 from collections import defaultdict, Counter
 
+class D(object):
+    def __init__(self):
+        self.va = 0
+        self.jj = 0
+        self.va_examples = Counter()
+        self.jj_examples = Counter()
+        self.mixed_examples = Counter()
+    def __repr__(self): return '<va:%d, jj:%d>' % (self.va, self.jj)
+    def merge(self, other):
+        self.va += other.va
+        self.jj += other.jj
+        self.va_examples.update(other.va_examples)
+        self.jj_examples.update(other.jj_examples)
+        self.mixed_examples.update(other.mixed_examples)
+
 class AdjDist(Filter):
     def __init__(self):
         Filter.__init__(self)
-        class D(object):
-            def __init__(self):
-                self.va = 0
-                self.jj = 0
-                self.va_examples = Counter()
-                self.jj_examples = Counter()
-                self.mixed_examples = Counter()
-            def __repr__(self): return '<va:%d, jj:%d>' % (self.va, self.jj)
-            
         self.counts = defaultdict(D)
         
     def accept_leaf(self, leaf):
@@ -24,6 +31,12 @@ class AdjDist(Filter):
             self.counts[leaf.lex].jj_examples[leaf.lex] += 1
         else:
             self.counts[leaf.lex].mixed_examples[leaf.lex] += 1
+            
+    def snapshot(self):
+        return dict(self.counts)
+        
+    def merge(self, counts):
+        merge_into(self.counts, counts)
     
     def output(self):
         def perc(n, denom):
@@ -26,5 +26,12 @@ class BranchingFactor(Filter):
             self.branches += node.count()
             self.internals += 1
             
+    def snapshot(self):
+        return self.branches, self.internals
+        
+    def merge(self, (branches, internals)):
+        self.branches += branches
+        self.internals += internals
+            
     def output(self):
         print "%d/%d = %.2f" % (self.branches, self.internals, self.branches/float(self.internals))
\ No newline at end of file
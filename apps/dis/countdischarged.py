@@ -8,6 +8,8 @@ from munge.trees.synttree import is_trace
 
 import difflib
 
+from munge.util.dict_utils import merge_into
+
 def align(o, n):
     matches = difflib.SequenceMatcher(a=o, b=n).get_matching_blocks()
     alignment = {}
@@ -20,6 +22,9 @@ from collections import namedtuple, defaultdict
 class Result(object):
     def __init__(self):
         self.discharged = self.not_discharged = 0
+    def merge(self, other):
+        self.discharged += other.discharged
+        self.not_discharged += other.not_discharged
         
 class CountDischargedTraces(Filter):
     Patterns = NLDFinder.Patterns
@@ -59,6 +64,12 @@ class CountDischargedTraces(Filter):
                         self.results[name].discharged += 1
                 else:
                     print >>sys.stderr, "t was not bound to a trace node"
+                    
+    def snapshot(self):
+        return dict(self.results)
+        
+    def merge(self, results):
+        merge_into(self.results, results)
                             
     def output(self):
         for (nld_type, results) in self.results.iteritems():
@@ -42,6 +42,9 @@ class IncrementalNCats(NCats):
         ncatsge5 = len(list(ifilter(lambda (k,v): v>=5, self.freqs.iteritems())))
         self.data_points.append( (self.ntokens, ncats, ncatsge5) )
         
+    # Each data point depends on every derivation seen before it
+    snapshot = merge = None
+        
     def output(self):
         with file(self.growth_fn, 'w') as f:
             print >>f, '\n'.join( ' '.join(map(str, xy)) for xy in self.data_points )
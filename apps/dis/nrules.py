@@ -61,6 +61,9 @@ class IncrementalNRules(NRules):
 
         self.ntokens += len(bundle.derivation.text())
         self.data_points.append( (self.ntokens, len(self.freqs)) )
+        
+    # Each data point depends on every derivation seen before it
+    snapshot = merge = None
 
     def output(self):
         with file(self.growth_fn, 'w') as f:
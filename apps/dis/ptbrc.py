@@ -14,7 +14,7 @@ from munge.proc.filter import Filter
 from munge.proc.tgrep.tgrep import tgrep, find_first
 from munge.util.tgrep_utils import get_first
 from munge.util.func_utils import const
-from munge.util.dict_utils import sorted_by_value_desc
+from munge.util.dict_utils import sorted_by_value_desc, merge_into
 
 def extract_index(node):
     label = node.tag
@@ -45,6 +45,14 @@ class CountPTBRelatives(Filter):
         
         self.total += 1
         
+    def snapshot(self):
+        return self.rcderivs, self.total, dict(self.parents)
+        
+    def merge(self, (rcderivs, total, parents)):
+        self.rcderivs += rcderivs
+        self.total += total
+        merge_into(self.parents, parents)
+        
     def output(self):
         print 'trace types:'
         for k, v in sorted_by_value_desc(self.parents):
@@ -77,6 +85,14 @@ class CountPCTBRelatives(Filter):
         
         self.total += 1
         
+    def snapshot(self):
+        return self.rcderivs, self.total, dict(self.parents)
+        
+    def merge(self, (rcderivs, total, parents)):
+        self.rcderivs += rcderivs
+        self.total += total
+        merge_into(self.parents, parents)
+        
     def output(self):
         print 'trace types:'
         for k, v in sorted_by_value_desc(self.parents):
@@ -28,12 +28,23 @@ def categorise_category(cat):
 class Shapes(Tabulation('shapes'), Filter):
     def __init__(self):
         super(Shapes, self).__init__()
-        self.lexicon = set()
+        # maps each category seen to its shape
+        self.lexicon = {}
+        
+    def add_category(self, cat, kategory):
+        self.shapes[ kategory ] += 1
+        self.lexicon[cat] = kategory
         
     def accept_leaf(self, leaf):
         if str(leaf.cat) not in self.lexicon:
             kategory = categorise_category(leaf.cat)
             #if kategory == '?': print leaf.cat
-            self.shapes[ kategory ] += 1
+            self.add_category(str(leaf.cat), kategory)
             
-            self.lexicon.add(str(leaf.cat))
+    def snapshot(self):
+        return self.lexicon
+        
+    def merge(self, lexicon):
+        for cat, kategory in lexicon.iteritems():
+            if cat not in self.lexicon:
+                self.add_category(cat, kategory)
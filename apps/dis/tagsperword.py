@@ -33,6 +33,13 @@ class UnariesPerSentence(Filter):
         for node in nodes(bundle.derivation):
             if node.count() == 1: self.unaries += 1
         self.nsents += 1
+        
+    def snapshot(self):
+        return self.unaries, self.nsents
+        
+    def merge(self, (unaries, nsents)):
+        self.unaries += unaries
+        self.nsents += nsents
 
     def output(self):
         print 'avg #unaries/sentence = %d/%d = %.2f%%' % (self.unaries, self.nsents, self.unaries/float(self.nsents)*100.)
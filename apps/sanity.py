@@ -10,7 +10,7 @@
 from collections import defaultdict, Counter
 
 from munge.proc.filter import Filter
-from munge.util.dict_utils import CountDict
+from munge.util.dict_utils import CountDict, merge_into
 from munge.trees.traverse import leaves
 
 from apps.cn.fix_utils import base_tag
@@ -29,6 +29,13 @@ class AvgDepth(Filter):
     def accept_derivation(self, bundle):
         self.depth += depth(bundle.derivation)
         self.nderivs += 1
+        
+    def snapshot(self):
+        return self.depth, self.nderivs
+        
+    def merge(self, (depth, nderivs)):
+        self.depth += depth
+        self.nderivs += nderivs
 
     def output(self):
         print 'avg depth = %d/%d=%.2f' % (self.depth, self.nderivs, self.depth/float(self.nderivs))
@@ -57,6 +64,16 @@ class SanityChecks(Filter):
             else:
                 self.tokens.add(leaf.lex)
         # self.ecs += len([ leaf for leaf in leaves(bundle.derivation) if self.is_trace(leaf) ])
+        
+    def snapshot(self):
+        return (self.nderivs, self.nwords, self.tokens, dict(self.ec_types), self.ecs)
+        
+    def merge(self, (nderivs, nwords, tokens, ec_types, ecs)):
+        self.nderivs += nderivs
+        self.nwords += nwords
+        self.tokens |= tokens
+        merge_into(self.ec_types, ec_types)
+        self.ecs += ecs
 
     def output(self):
         print "nderivs: %d, nwords: %d, ecs: %d" % (self.nderivs, self.nwords, self.ecs)
@@ -75,6 +92,12 @@ class PUTokens(Filter):
 
     def accept_leaf(self, leaf):
         if leaf.tag == "PU": self.puncts[leaf.lex] += 1
+        
+    def snapshot(self):
+        return self.puncts
+        
+    def merge(self, puncts):
+        self.puncts.update(puncts)
 
     def output(self):
         for punct, freq in self.puncts.most_common():
@@ -11,6 +11,8 @@ from collections import defaultdict
 import math
 import sys
 
+from munge.util.dict_utils import merge_into
+
 def decimal_length(n):
     '''Returns the length of _n_ in decimal digits. Undefined for n<0.'''
     if n == 0: return 0
@@ -29,6 +31,13 @@ def Tabulation(table_vars, reducer=lambda e:e, value_maker=int, additional_info_
             for table_var in table_vars:
                 setattr(self, table_var, defaultdict(value_maker))
             self.reducer = reducer
+            
+        def snapshot(self):
+            return dict( (table_var, dict(getattr(self, table_var))) for table_var in table_vars )
+            
+        def merge(self, state):
+            for table_var, table in state.iteritems():
+                merge_into(getattr(self, table_var), table)
         
         def output(self):
             self.do_output(reducer=reducer, limit=limit)
@@ -18,9 +18,10 @@ dir_suffix_arg=
 config_file_arg=
 undo_topicalisation_arg=
 undo_np_internal_structure_arg=
+jobs=1
 
 final_dir=data
-while getopts 'c:s:o:C:TNh' OPTION
+while getopts 'c:s:o:C:j:TNh' OPTION
 do
     case $OPTION in
         C) config_file_arg="-C $OPTARG" ;;
@@ -29,7 +30,8 @@ do
         T) undo_topicalisation_arg="-T" ;;
         N) undo_np_internal_structure_arg="-N" ;;
         o) final_dir="$OPTARG" ;;
-        h) echo "$0 [-s dir-suffix] [-o output-dir] [-c corpus-dir] [-C config-file]"
+        j) jobs="$OPTARG" ;;
+        h) echo "$0 [-s dir-suffix] [-o output-dir] [-c corpus-dir] [-C config-file] [-j jobs]"
            exit 1
         ;;
     esac
@@ -38,36 +40,21 @@ shift $(($OPTIND - 1))
 
 started=`date +%c`
 ./make_clean.sh
-time ./make_all.sh $corpus_dir_arg $dir_suffix_arg $config_file_arg $undo_topicalisation_arg $undo_np_internal_structure_arg all
+time ./make_all.sh -j $jobs $corpus_dir_arg $dir_suffix_arg $config_file_arg $undo_topicalisation_arg $undo_np_internal_structure_arg all
 mkdir -p $final_dir
 filtered_corpus="${final_dir}/filtered_corpus"
 unanalysed="${final_dir}/unanalysed"
 ./do_filter.sh $filtered_corpus
 (python -m'apps.cn.find_unanalysed' $filtered_corpus > $unanalysed)
 
-# Filter out derivations with [conj] leaves
-msg "Filtering out derivations with [conj] leaves..."
-./rmconj.py $filtered_corpus > $filtered_corpus.noconj
-
 rm -rf ${final_dir}/{AUTO,PARG,train.piped}
 mkdir -p ${final_dir}
 
-# Kill known bad sentences
-msg "Filtering rare categories and rules..."
-./filter.py $filtered_corpus.noconj > $filtered_corpus.norare
-
-msg "Creating directory structure..."
-# Regroup filtered_corpus into section directories
-./regroup.py $filtered_corpus.norare ${final_dir}/AUTO
-
-msg "Creating PARGs..."
-# Create PARGs
-./t -q -lapps.cn.mkdeps -9 ${final_dir}/PARG $filtered_corpus.norare 2> mkdeps_errors
-
-msg "Rebracketing (X|Y)[conj] -> X|Y[conj]..."
-# Rebracket [conj] as expected by C&C: (X|Y)[conj] becomes X|Y[conj]
-perl -pi -e 's/\(([^\s]+)\)\[conj\]/$1\[conj\]/g' ${final_dir}/AUTO/*/*
-perl -pi -e 's/\(([^\s]+)\)\[conj\]/$1\[conj\]/g' ${final_dir}/PARG/*/*
+# Filter out derivations with [conj] leaves, news headers and known bad sentences, then write AUTO and PARG
+# into section directories, rebracketing (X|Y)[conj] as X|Y[conj] as expected by C&C. Documents are spread
+# over the worker processes, and the errors from each are written to mkdeps_errors in document order.
+msg "Filtering derivations and creating AUTO and PARGs..."
+./t -q -j $jobs -lapps.cn.postprocess -r PostProcess ${final_dir} -0 filtered/*.fid 2> mkdeps_errors
 
 msg "Creating supertagger data..."
 # Create supertagger training data in piped format
@@ -17,7 +17,10 @@ dir_suffix=
 config_file=config.yml
 undo_topicalisation=false
 undo_np_internal_structure=false
-while getopts 'c:s:C:hTN' OPTION
+use_pipeline=false
+dump_intermediates=false
+jobs=1
+while getopts 'c:s:C:j:hTNPD' OPTION
 do
     case $OPTION in
         C) config_file_arg="-C $OPTARG" ; config_file="$OPTARG" ;;
@@ -25,7 +28,10 @@ do
         s) dir_suffix_arg="-s $OPTARG" ; dir_suffix="$OPTARG" ;;
         T) undo_topicalisation=true ;;
         N) undo_np_internal_structure=true ;;
-        h) echo "$0 [-c corpus_dir] [-s work_dir_suffix] [-C config_file] [SEC|all]"
+        P) use_pipeline=true ;;
+        D) dump_intermediates=true ;;
+        j) jobs="$OPTARG" ;;
+        h) echo "$0 [-c corpus_dir] [-s work_dir_suffix] [-C config_file] [-j jobs] [-P [-D]] [SEC|all]"
            exit 1 ;;
     esac
 done
@@ -56,13 +62,48 @@ apply() {
 
     msg "$comment -> $outdir"
     rm -rf $outdir/"$TARGET"
-    ./t -c $config_file -q -l$lib -r $filter $outdir -0 $srcdir/"$TARGET" 2>&1 | tee $errfile
+    ./t -c $config_file -q -j $jobs -l$lib -r $filter $outdir -0 $srcdir/"$TARGET" 2>&1 | tee $errfile
 
     return ${PIPESTATUS[0]} # return the exit code of the first command in the pipe
 }
 
 echo Started at: `date`
 
+# -P runs every stage in a single process, handing derivations between stages in memory.
+# Only tagged/ (needed by make.sh) and final/ are written, unless -D is also given.
+if $use_pipeline; then
+    stage() {
+        name=$1
+        outdir=$2
+        if $dump_intermediates || [[ $outdir == tagged ]]; then
+            rm -rf $outdir$dir_suffix/"$TARGET"
+            echo -n "$name=$outdir$dir_suffix"
+        else
+            echo -n "$name"
+        fi
+    }
+
+    stages="`stage clean filtered`"
+    if $undo_topicalisation; then
+        stages="$stages,`stage undo_top undone`"
+    elif $undo_np_internal_structure; then
+        stages="$stages,`stage flatten_np flattened`"
+    fi
+    for spec in "tag tagged" "binarise binarised" "label labelled" \
+                "fix_rc fixed_rc" "fix_adverbs fixed_adverbs" "fix_np fixed_np"; do
+        stages="$stages,`stage $spec`"
+    done
+    stages="$stages,output=final$dir_suffix"
+
+    msg "Running conversion pipeline -> final$dir_suffix"
+    rm -rf ./final$dir_suffix/${TARGET}
+    ./t -c $config_file -q -j $jobs -lapps.cn.pipeline -r Pipeline $stages -0 \
+        -lapps.sanity -r SanityChecks -0 $corpus_dir/"$TARGET" 2>&1 | tee pipeline_errors
+
+    echo Finished at: `date`
+    exit ${PIPESTATUS[0]}
+fi
+
 # 0. Filter
 apply "$corpus_dir" "filtered$dir_suffix" \
     apps.cn.clean Clean clean_errors \
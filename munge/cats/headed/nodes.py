@@ -54,36 +54,61 @@ class Head(object):
     __repr__ = lambda self: "<|%s|>" % (str(self.lex) or "?")
 
 class Slot(object):
-    '''A Slot is a mapping from a variable name to a Head.'''
+    '''A Slot is a mapping from a variable name to a Head.
+
+Slots whose heads have been unified form an equivalence class, which shares a single Head. The classes are kept
+in a union-find forest: each Slot points to its parent (None for the root of its class), and only the Head of the
+root of each class is meaningful.'''
     def __init__(self, var, head_lex=None):
         self.var = var        
         self._head = Head(head_lex)
         
-        self.dependers = set()
-        self.dependers.add( self )
+        self._parent = None
+        # an upper bound on the height of the tree under this slot, while it is a root
+        self._rank = 0
+        
+    def find(self):
+        '''Returns the root of the class of this slot, pointing each slot on the way directly to it.'''
+        root = self
+        while root._parent is not None:
+            root = root._parent
+            
+        slot = self
+        while slot is not root:
+            slot._parent, slot = root, slot._parent
+            
+        return root
         
     @property
     def head(self): 
-        return self._head
+        if self._parent is None: return self._head
+        return self.find()._head
         
     def unify_heads(self, other):
+        '''Unifies the classes of this slot and _other_, which then share the Head of _other_.'''
         assert isinstance(other, Slot), "unify_heads is an operation between two Slots."
-        self.dependers |= other.dependers
-        
-        for dep in self.dependers:
-            dep._head = other._head
-            dep.dependers = self.dependers
+        root, other_root = self.find(), other.find()
+        if root is other_root: return
+        
+        head = other_root._head
+        # union by rank: the shallower tree goes under the root of the deeper one
+        if root._rank < other_root._rank:
+            root, other_root = other_root, root
+        elif root._rank == other_root._rank:
+            root._rank += 1
+            
+        other_root._parent = root
+        root._head = head
         
     def is_filled(self):
         return self.head.lex is not None
         
     # problem: sometimes two slots have the same var name and same head, but are distinct slots
     # the problem goes away when var names are uniquified
-    def __hash__(self):
-        return hash(id(self))
+    # Slots are compared by identity, which is already the default equality. object's own __hash__ hashes by
+    # identity too, without a Python-level call each time a Slot is put in a dependers set.
+    __hash__ = object.__hash__
 #        return hash(self.var) ^ hash(self._head)
-    def __eq__(self, other):
-        return self is other
 #        return self.var == other.var and self._head == other._head
         
     if config.curly_vars:
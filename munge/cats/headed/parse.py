@@ -12,6 +12,7 @@ from itertools import *
 from munge.lex.lex import preserving_split
 from munge.cats.nodes import BACKWARD, FORWARD, ALL
 from munge.cats.headed.nodes import AtomicCategory, ComplexCategory, Slot
+from munge.cats.headed.template import CategoryTemplate
 from munge.util.parse_utils import *
 from munge.util.exceptions import CatParseException
 
@@ -23,8 +24,18 @@ def parse_alias(toks):
     toks.next() # skip over the '~'
     return toks.next()
 
-# IMPORTANT: memoised is off for headed categories
+# Maps each category string parsed so far to a CategoryTemplate of its category
+_templates = {}
+
 def parse_category(cat_string):
+    '''Parses a headed category string into a category object. Each distinct string is only parsed once:
+since headed categories carry mutable Slots, each call returns a fresh copy of the category, with fresh Slots.'''
+    template = _templates.get(cat_string, None)
+    if template is None:
+        template = _templates[cat_string] = CategoryTemplate(parse_uncached_category(cat_string))
+    return template.instantiate()
+
+def parse_uncached_category(cat_string):
     # Return each mode symbol as a token too when encountered.
     # Important: avoid using mode symbols in atomic category labels.
     toks = preserving_split(cat_string, "(\\/)[]{}~")# + ComplexCategory.mode_symbols)
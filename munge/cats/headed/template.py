@@ -0,0 +1,123 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+from munge.cats.headed.nodes import Slot, Head
+
+_new = object.__new__
+
+class CategoryTemplate(object):
+    '''Builds fresh copies of a headed category much faster than parsing the category again.
+A copy shares no objects with the template or with any other copy, except immutable ones. Atoms which share a Slot
+in the template share a (new) Slot in the copy, and a sub-category which occurs more than once in the template
+(as mkmarked produces for modifier categories) occurs as a single (new) object in the copy.'''
+    def __init__(self, cat):
+        slots = {}
+        # maps the id of each sub-category occurring more than once to its index among the shared objects
+        shared = dict( (id_, index) for (index, id_) in enumerate(self.repeated_categories(cat)) )
+        self.shared_count = len(shared)
+        self.make = self.compile(cat, slots, shared)
+        # (var, head lex) for each distinct slot in the template, in order of index
+        self.slot_specs = [ (slot.var, slot.head.lex) for (index, slot) in sorted(slots.values()) ]
+
+    @staticmethod
+    def repeated_categories(cat):
+        '''Returns the ids of the sub-categories which occur more than once in _cat_.'''
+        seen, repeated = set(), []
+        stack = [cat]
+        while stack:
+            cat = stack.pop()
+            if id(cat) in seen:
+                if id(cat) not in repeated: repeated.append(id(cat))
+                continue
+            seen.add(id(cat))
+
+            if cat.is_complex():
+                stack.append(cat._left)
+                if cat._right: stack.append(cat._right)
+        return repeated
+
+    @staticmethod
+    def compile(cat, slots, shared, compiled=None):
+        '''Returns a function which, given a list with a place for each shared sub-category followed by
+fresh slots, builds a copy of _cat_. _slots_ maps the id of each slot encountered to its index among the slots, and
+_shared_ the id of each shared sub-category to its index.'''
+        if compiled is None: compiled = set()
+
+        if id(cat) in shared:
+            shared_index = shared[id(cat)]
+            if id(cat) in compiled:
+                # a later occurrence of a shared sub-category is the object built for its first occurrence
+                return lambda fresh: fresh[shared_index]
+            compiled.add(id(cat))
+
+            make_shared = CategoryTemplate.compile_category(cat, slots, shared, compiled)
+            def make(fresh):
+                result = fresh[shared_index] = make_shared(fresh)
+                return result
+            return make
+
+        return CategoryTemplate.compile_category(cat, slots, shared, compiled)
+
+    @staticmethod
+    def compile_category(cat, slots, shared, compiled):
+        slot = cat.slot
+        if id(slot) not in slots:
+            slots[id(slot)] = (len(slots), slot)
+        slot_index = len(shared) + slots[id(slot)][0]
+
+        cls = cat.__class__
+        features = tuple(cat.features)
+        attrs = dict(cat.__dict__)
+        for attr in ('slot', 'features', '_left', '_right'):
+            attrs.pop(attr, None)
+
+        if cat.is_complex():
+            make_left = CategoryTemplate.compile(cat._left, slots, shared, compiled)
+            make_right = CategoryTemplate.compile(cat._right, slots, shared, compiled) if cat._right else None
+
+            def make(fresh_slots):
+                result = _new(cls)
+                d = dict(attrs)
+                d['features'] = list(features)
+                d['slot'] = fresh_slots[slot_index]
+                d['_left'] = make_left(fresh_slots)
+                d['_right'] = make_right and make_right(fresh_slots)
+                result.__dict__ = d
+                return result
+        else:
+            def make(fresh_slots):
+                result = _new(cls)
+                d = dict(attrs)
+                d['features'] = list(features)
+                d['slot'] = fresh_slots[slot_index]
+                result.__dict__ = d
+                return result
+
+        return make
+
+    def fresh_slots(self):
+        '''Returns a list of fresh slots for a copy of the template category, in order of index.'''
+        fresh_slots = []
+        for var, lex in self.slot_specs:
+            slot, head = _new(Slot), _new(Head)
+            head.__dict__ = { '_lex': lex, 'filler': None }
+            slot.__dict__ = { 'var': var, '_head': head, '_parent': None, '_rank': 0 }
+            fresh_slots.append(slot)
+
+        return fresh_slots
+
+    def instantiate_with(self, fresh_slots):
+        '''Returns a fresh copy of the template category with the given list of _fresh_slots_, as returned
+by fresh_slots.'''
+        if self.shared_count: fresh_slots = [None] * self.shared_count + fresh_slots
+        return self.make(fresh_slots)
+
+    def instantiate(self):
+        '''Returns a fresh copy of the template category.'''
+        return self.instantiate_with(self.fresh_slots())
@@ -0,0 +1,198 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+'''Interned, immutable categories.
+
+There is exactly one InternedAtom or InternedComplex object for each distinct category (taking into account
+its features, modes, slash indices and alias, but not the head variables of a headed category), so interned
+categories are compared and hashed by identity, and their string form and featureless form are computed only
+once.
+This makes them cheap keys for the tables and memos on the hot paths of the filters, and safe to share: instead
+of being modified in place, an interned category derives a new one (with_feature, without_features,
+without_slash_indices).
+
+intern_category(cat) returns the interned form of an ordinary (mutable) category, and category() turns an
+interned category back into a fresh ordinary one.'''
+
+from munge.cats.nodes import AtomicCategory, ComplexCategory, ShowModes
+from munge.cats.parse import parse_category
+from munge.util.deco_utils import memoised
+from munge.util.func_utils import const_
+
+# Maps the key of each interned category to that category. Interned categories live as long as the process.
+_interned = {}
+
+class InternedCategory(object):
+    '''Operations common to interned atomic and complex categories.'''
+    __slots__ = ()
+
+    def __repr__(self): return self._repr
+    __str__ = __repr__
+
+    # interned categories are equal exactly when they are identical, so object's own (identity) __eq__ and
+    # __hash__ are exactly right, and are cheaper than any Python-level method
+    def __copy__(self): return self
+    def __deepcopy__(self, memo): return self
+
+    def feature_repr(self):
+        return ''.join("[%s]" % feature for feature in self.features)
+
+    def has_feature(self, feature):
+        return feature in self.features
+
+    def with_feature(self, feature):
+        '''Returns this category with _feature_ appended to its outermost features.'''
+        return self.with_features(self.features + (feature,))
+
+    def without_features(self):
+        '''Returns this category with every feature removed.'''
+        if self._featureless is None:
+            self._featureless = self.derive(lambda cat: cat.with_features(()))
+        return self._featureless
+
+    def without_slash_indices(self):
+        '''Returns this category with every slash index removed.'''
+        if self._unlabelled is None:
+            self._unlabelled = self.derive(lambda cat: cat.with_label(None))
+        return self._unlabelled
+
+class InternedAtom(InternedCategory):
+    '''An interned atomic category.'''
+    __slots__ = ('cat', 'features', 'alias', '_repr', '_inner_repr', '_featureless', '_unlabelled')
+
+    label = None
+    is_leaf = const_(True)
+    is_complex = const_(False)
+    slash_count = const_(0)
+
+    def __init__(self, cat, features, alias):
+        self.cat, self.features, self.alias = cat, features, alias
+
+        self._repr = self._inner_repr = cat + self.feature_repr() + ('~' + alias if alias else '')
+        self._featureless = self._unlabelled = None
+
+    def __iter__(self):
+        yield self
+
+    def __reduce__(self):
+        # unpickling re-interns the category (alias included) in the receiving process
+        return (intern_atom, (self.cat, self.features, self.alias))
+
+    def with_features(self, features):
+        return intern_atom(self.cat, features, self.alias)
+
+    def with_label(self, label):
+        return self
+
+    def derive(self, f):
+        return f(self)
+
+    def category(self):
+        '''Returns a fresh (mutable) AtomicCategory equal to this category.'''
+        return AtomicCategory(self.cat, list(self.features))
+
+class InternedComplex(InternedCategory):
+    '''An interned complex category, whose result and argument are themselves interned.'''
+    __slots__ = ('left', 'direction', 'right', 'mode', 'features', 'label', 'alias', 'slash',
+                 '_repr', '_inner_repr', '_slash_count', '_featureless', '_unlabelled')
+
+    is_leaf = const_(False)
+    is_complex = const_(True)
+
+    def __init__(self, left, direction, right, mode, features, label, alias):
+        self.left, self.direction, self.right = left, direction, right
+        self.mode, self.features, self.label, self.alias = mode, features, label, alias
+        self.slash = ComplexCategory.slash_strings[direction]
+
+        bits = [ left._inner_repr, self.slash ]
+        if ShowModes: bits.append(ComplexCategory.get_mode_symbol(mode))
+        bits.append(right._inner_repr)
+        body = ''.join(bits)
+
+        suffix = '~' + alias if alias else ''
+        # as with ComplexCategory, a category with features is bracketed even at the top level
+        self._inner_repr = '(' + body + ')' + self.feature_repr() + suffix
+        self._repr = self._inner_repr if features else (body + suffix)
+
+        self._slash_count = 1 + left.slash_count() + right.slash_count()
+        self._featureless = self._unlabelled = None
+
+    def __iter__(self):
+        yield self.left
+        yield self.right
+
+    def __reduce__(self):
+        # the result and argument are pickled (and re-interned) in turn
+        return (intern_complex, (self.left, self.direction, self.right, self.mode, self.features, self.label,
+                                 self.alias))
+
+    def slash_count(self): return self._slash_count
+
+    def with_features(self, features):
+        return intern_complex(self.left, self.direction, self.right, self.mode, features, self.label,
+                              self.alias)
+
+    def with_label(self, label):
+        return intern_complex(self.left, self.direction, self.right, self.mode, self.features, label,
+                              self.alias)
+
+    def derive(self, f):
+        '''Returns the category obtained by applying _f_ to every sub-category of this category.'''
+        cat = intern_complex(self.left.derive(f), self.direction, self.right.derive(f), self.mode,
+                             self.features, self.label, self.alias)
+        return f(cat)
+
+    def category(self):
+        '''Returns a fresh (mutable) ComplexCategory equal to this category.'''
+        return ComplexCategory(self.left.category(), self.direction, self.right.category(), self.mode,
+                               list(self.features), self.label)
+
+def intern_atom(cat, features=(), alias=None):
+    '''Returns the interned atomic category _cat_ with the tuple of features _features_.'''
+    key = (cat, features, alias)
+    result = _interned.get(key, None)
+    if result is None:
+        result = _interned[key] = InternedAtom(cat, features, alias)
+    return result
+
+def intern_complex(left, direction, right, mode=None, features=(), label=None, alias=None):
+    '''Returns the interned complex category with the interned result _left_ and argument _right_.'''
+    key = (left, direction, right, mode, features, label, alias)
+    result = _interned.get(key, None)
+    if result is None:
+        result = _interned[key] = InternedComplex(left, direction, right, mode, features, label, alias)
+    return result
+
+def intern_category(cat):
+    '''Returns the interned form of the (plain or headed) category _cat_, ignoring any head variables.'''
+    if isinstance(cat, InternedCategory): return cat
+    return _intern(cat)
+
+def _intern(cat, get=_interned.get):
+    # This is on the hot path of the analyse cache, so it reads the attributes of _cat_ directly
+    attrs = cat.__dict__
+    features, alias = tuple(attrs['features']), attrs.get('alias', None)
+
+    if '_left' in attrs:
+        key = (_intern(attrs['_left']), attrs['direction'], _intern(attrs['_right']), attrs['mode'], features,
+               attrs['label'], alias)
+        result = get(key, None)
+        if result is None:
+            result = _interned[key] = InternedComplex(*key)
+    else:
+        key = (attrs['cat'], features, alias)
+        result = get(key, None)
+        if result is None:
+            result = _interned[key] = InternedAtom(*key)
+    return result
+
+@memoised
+def parse_interned(cat_string):
+    '''Parses _cat_string_ into an interned category.'''
+    return intern_category(parse_category(cat_string))
@@ -7,7 +7,7 @@
 # supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
 # notify the maintainer Daniel Tse <cncandc@gmail.com>.
 
-from itertools import starmap, tee
+from itertools import starmap
 from munge.util.iter_utils import each_pair
 from munge.util.list_utils import preserving_zip
 from munge.cats.trace import analyse
@@ -69,6 +69,29 @@ the path are returned, instead of the nodes themselves.'''
 
     return starmap(extract_categories, path_to_root(node))
 
+_new = object.__new__
+
+def relabellable_copy(cat):
+    '''Returns a copy of _cat_ whose slash indices are unset, and can be set without affecting _cat_. Atoms,
+which carry no slash index, are shared with _cat_.'''
+    if not cat.is_complex(): return cat
+
+    result = _new(cat.__class__)
+    attrs = dict(cat.__dict__)
+    attrs['label'] = None
+    attrs['_left'], attrs['_right'] = relabellable_copy(cat._left), relabellable_copy(cat._right)
+    result.__dict__ = attrs
+    return result
+
+def relabellable_category_path_to_root(node):
+    '''Identical to cloned_category_path_to_root, except that the copies of the categories share everything
+with the originals but their slash indices, which are unset.'''
+    def extract_categories(left, right, was_flipped):
+        return (relabellable_copy(left.category), relabellable_copy(right.category) if right else None,
+                was_flipped)
+
+    return starmap(extract_categories, path_to_root(node))
+
 def applications(node):
     '''Yields a sequence of rule applications starting from the given _node_ up to the root.'''
     return applications_with_path(category_path_to_root(node))
@@ -81,46 +104,48 @@ def applications_with_path(path):
 def applications_per_slash(node, examine_modes=False):
     '''Returns a list of length _n_, the number of slashes in the category of _node_.
 Index _i_ in this list denotes the combinatory rule which consumed slash _i_.'''
-    return applications_per_slash_with_path(cloned_category_path_to_root(node),
+    return applications_per_slash_with_path(relabellable_category_path_to_root(node),
                                             node.category.slash_count(),
                                             examine_modes)
 
-def applications_per_slash_with_path(orig_path, slash_count, examine_modes=False):
+def applications_per_slash_with_path(path, slash_count, examine_modes=False):
     '''Given a category, returns a list whose index _i_ is the rule which consumed its _i_th slash, or None
-if it was not consumed.'''
-    result = []
-
-    for slash in xrange(slash_count):
-        consumer = None # the rule which consumed this slash, if any
-        first = True
-        
-        # We need to copy the path for each slash, because in each iteration we label
-        # the categories in-place.
-        orig_path, path = tee(orig_path, 2)
-        
-        for (prev_l, prev_r, prev_was_flipped), (l, r, was_flipped) in each_pair(path):
-            if first:
-                if prev_was_flipped and prev_r:
-                    prev_r.labelled()
-                elif not prev_was_flipped:
-                    prev_l.labelled()
-                first = False
-
-            cur      = r      if was_flipped      else l
-            prev_cur = prev_r if prev_was_flipped else prev_l
-
-            rule = analyse(prev_l, prev_r, cur, examine_modes)
-            label_result(cur, prev_cur, rule, prev_was_flipped)
-
-            if   rule == 'fwd_appl': consumed_category = prev_l
-            elif rule == 'bwd_appl': consumed_category = prev_r
-            elif rule in ('fwd_comp', 'bwd_comp', 'bwd_xcomp', 'fwd_xcomp'): consumed_category = prev_cur
-            else: consumed_category = None
-
-            if consumed_category and consumed_category.label == slash:
-                consumer = rule
-                break
-
-        result.append( consumer )
+if it was not consumed.
+
+The path is walked once, carrying the slash indices of the category up the path in-place (so the categories
+on _path_ must be copies), until each slash has been consumed or the root is reached.'''
+    result = [None] * slash_count
+    # the number of slashes whose consumer has yet to be found. The path is not even started (copying each
+    # category on it) unless a slash needs it.
+    outstanding = slash_count
+    if not outstanding: return result
+    first = True
+
+    for (prev_l, prev_r, prev_was_flipped), (l, r, was_flipped) in each_pair(path):
+        if first:
+            if prev_was_flipped and prev_r:
+                prev_r.labelled()
+            elif not prev_was_flipped:
+                prev_l.labelled()
+            first = False
+
+        cur      = r      if was_flipped      else l
+        prev_cur = prev_r if prev_was_flipped else prev_l
+
+        rule = analyse(prev_l, prev_r, cur, examine_modes)
+        label_result(cur, prev_cur, rule, prev_was_flipped)
+
+        if   rule == 'fwd_appl': consumed_category = prev_l
+        elif rule == 'bwd_appl': consumed_category = prev_r
+        elif rule in ('fwd_comp', 'bwd_comp', 'bwd_xcomp', 'fwd_xcomp'): consumed_category = prev_cur
+        else: consumed_category = None
+
+        if consumed_category:
+            slash = consumed_category.label
+            # only the first rule to consume a slash is its consumer
+            if slash is not None and 0 <= slash < slash_count and result[slash] is None:
+                result[slash] = rule
+                outstanding -= 1
+                if not outstanding: break
 
     return result
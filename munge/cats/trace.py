@@ -9,9 +9,45 @@
 
 from munge.cats.nodes import APPLY, COMP, NULL, ALL, BACKWARD, FORWARD
 from munge.cats.cat_defs import *
+from munge.cats.interned import intern_category
+
+# Categories used by the unary rules below
+SfSbNP = C(r'(S/S)\NP')
+SdclbNPfSdclbNP = C(r'(S[dcl]\NP)/(S[dcl]\NP)')
+SdclbNPfSdclbNPfNP = C(r'((S[dcl]\NP)/(S[dcl]\NP))/NP')
+SbNPfSbNPbNP = C(r'((S\NP)/(S\NP))\NP')
+SfSfQP = C(r'S/(S/QP)')
+M = C('M')
+NfNfNfN, NPfNPfNPfNP = C(r'(N/N)/(N/N)'), C(r'(NP/NP)/(NP/NP)')
+
+# Each target of the unary rules from S\NP, with the name of its rule
+SbNPUnaryRules = (
+    (SfS, "lex_typechange"),
+    (NP,  "lex_typechange"),
+    (SbNPfSbNP, "lex_typechange"),
+    (SbS, "lex_typechange"),
+    (SfSfNP, "np_topicalisation"),
+)
+NullRelativiserCats = (NfN, NfNfNfN, NPfNP, NPfNPfNPfNP)
+
+AnalyseCacheSize = 65536
+# Maps the interned categories of each production [l r -> cur] seen (with examine_modes) to its rule. The rules
+# only inspect the structure, atoms, features and modes of the categories, all of which are part of their
+# interned form. The cache is emptied when full: an LRU costs more to maintain than most analyses take, and
+# the productions of a corpus rarely fill it.
+_analyses = {}
 
 def analyse(l, r, cur, examine_modes=False):
     '''Determines which parser rule was used in the production [l r -> cur].'''
+    key = (intern_category(l), r and intern_category(r), intern_category(cur), examine_modes)
+    result = _analyses.get(key, _analyses)
+    if result is _analyses:
+        if len(_analyses) >= AnalyseCacheSize: _analyses.clear()
+        result = _analyses[key] = uncached_analyse(l, r, cur, examine_modes)
+    return result
+
+def uncached_analyse(l, r, cur, examine_modes=False):
+    '''Determines which parser rule was used in the production [l r -> cur], without consulting the cache.'''
     return (try_unary_rules(l, r, cur) if not r else
             try_binary_rules(l, r, cur) or 
             try_application(l, r, cur, examine_modes) or
@@ -21,13 +57,7 @@ def analyse(l, r, cur, examine_modes=False):
 def try_unary_rules(l, r, cur):
     '''Determines if [l r -> cur] matches any unary rules.'''
     if l == SbNP:
-        for cand_cat, rule in {
-            SfS: "lex_typechange",
-            NP:  "lex_typechange",
-            SbNPfSbNP: "lex_typechange",
-            SbS: "lex_typechange",
-            SfSfNP: "np_topicalisation",
-        }.iteritems(): 
+        for cand_cat, rule in SbNPUnaryRules:
             if cur == cand_cat: return rule
             
         if config.cn_rules and cur == S: return "subject_prodrop"
@@ -37,24 +67,24 @@ def try_unary_rules(l, r, cur):
         # ----------
         if cur == SfNP and l == SbNPfNP: return "subject_prodrop"
         # [ta] yi qu VP(jiu bu hui lai)
-        if cur == SfS and l == C(r'(S/S)\NP'): return "yi_subject_prodrop"
+        if cur == SfS and l == SfSbNP: return "yi_subject_prodrop"
         # Object prodrops:
         # ----------------
-        if cur == C('(S[dcl]\NP)/(S[dcl]\NP)') and l == C('((S[dcl]\NP)/(S[dcl]\NP))/NP'): return 'vp_vp_object_prodrop'
+        if cur == SdclbNPfSdclbNP and l == SdclbNPfSdclbNPfNP: return 'vp_vp_object_prodrop'
         if cur == SbNP and l == SbNPfNP: return 'object_prodrop'
         # ----------------
-        if cur == C('(S\NP)/(S\NP)') and l == C('((S\NP)/(S\NP))\NP'): return 'vp_modifier_subject_prodrop'
+        if cur == SbNPfSbNP and l == SbNPfSbNPbNP: return 'vp_modifier_subject_prodrop'
         
         # TOPICALISATIONS:
         # ----------------
         if cur == SfS and (l == N or l == NP or l == Sdcl or l == QP): return "nongap_topicalisation"
         if cur == SfSfS and l == Sdcl: return "s_gap_topicalisation"
         if cur == SfSfNP and l == NP: return "np_gap_topicalisation"
-        if cur == C('S/(S/QP)') and l == QP: return "qp_gap_topicalisation"
+        if cur == SfSfQP and l == QP: return "qp_gap_topicalisation"
         
         if cur == NP and l == NPfNP: return "de_nominalisation"
-        if cur == NfN and (l == C('M') or l == QP): return "measure_word_number_elision"
-        if cur in (NfN, C('(N/N)/(N/N)'), NPfNP, C('(NP/NP)/(NP/NP)')) and (l == SbNP or l == SfNP or l == S): return "null_relativiser_typechange"
+        if cur == NfN and (l == M or l == QP): return "measure_word_number_elision"
+        if cur in NullRelativiserCats and (l == SbNP or l == SfNP or l == S): return "null_relativiser_typechange"
 
     if l == SfNP and cur == NPbNP:
         return "lex_typechange"
@@ -0,0 +1,251 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+'''Compact storage for whole CCGbank corpora, for analyses which hold every derivation in memory at once.
+
+A CompactCorpus keeps the nodes of all its derivations in a handful of parallel arrays of machine integers instead
+of as Node and Leaf objects. The nodes of each derivation are stored in preorder, so the left child of an internal
+node is always the node after it, and only the index of its right child (or -1) and of its parent (or -1) are
+stored. Categories, tags and lexical items are indices into a single string table shared by the whole corpus.
+
+Nodes are read through lightweight views (CompactNode and CompactLeaf), which are created on demand and offer the
+interface of Node and Leaf used by munge.trees.traverse. Views are read-only: the category of a view is just like
+the one the CCGbank parser would have built, but each distinct category string is only parsed once, and changes
+to the category are not kept. Two views of the same node are equal, but need not be identical. To modify a
+derivation, build an ordinary copy of it with CompactCorpus.derivation.'''
+
+import re
+from array import array
+
+import munge.trees.traverse as traverse
+from munge.ccg.io import CCGbankCodec, Derivation
+from munge.ccg.nodes import Node, Leaf
+from munge.io.cache import CategoryTable, StringTable
+from munge.util.func_utils import const_
+
+class CompactCorpus(object):
+    '''Holds the derivations of a CCGbank corpus as parallel arrays over all of their nodes.'''
+    def __init__(self):
+        self.strings = StringTable()
+        # Builds the category for the string index of each category string
+        self.categories = CategoryTable(self.strings.strings, CCGbankCodec.parse_category)
+
+        # For each node: the string index of its category, the node index of its parent (or -1) and of its right
+        # child (or -1), and the string index of its lexical item (or -1 for an internal node)
+        self.cats, self.parents, self.rchs, self.tokens = array('i'), array('i'), array('i'), array('i')
+        # For each node: the string indices of the two POS tags of a leaf, or of the head index and child count
+        # of an internal node, and of the category with variables of a leaf (or -1 for an internal node)
+        self.firsts, self.seconds, self.catfixes = array('i'), array('i'), array('i')
+
+        # For each derivation: the node index of its root, and its section, document and derivation numbers
+        self.roots, self.sec_nos, self.doc_nos, self.der_nos = array('i'), array('i'), array('i'), array('i')
+
+    def add(self, bundle):
+        '''Adds the derivation of the CCGbank bundle _bundle_ to the corpus.'''
+        cat_strings = CCGbankCodec.category_strings(bundle.raw_text())
+
+        self.roots.append(len(self.cats))
+        self.sec_nos.append(bundle.sec_no)
+        self.doc_nos.append(bundle.doc_no)
+        self.der_nos.append(bundle.der_no)
+
+        self.encode(bundle.derivation, -1, cat_strings)
+        if next(cat_strings, None) is not None:
+            raise ValueError("Unused categories remain in derivation %s." % bundle.label())
+
+    def extend(self, bundles):
+        '''Adds the derivation of each of _bundles_ to the corpus.'''
+        for bundle in bundles:
+            self.add(bundle)
+
+    def encode(self, node, parent, cat_strings):
+        strings = self.strings
+
+        index = len(self.cats)
+        self.cats.append(strings[cat_strings.next()])
+        self.parents.append(parent)
+        self.rchs.append(-1)
+
+        if node.is_leaf():
+            self.tokens.append(strings[node.lex])
+            self.firsts.append(strings[node.pos1])
+            self.seconds.append(strings[node.pos2])
+            self.catfixes.append(strings[node.catfix])
+        else:
+            self.tokens.append(-1)
+            self.firsts.append(strings[node.head_index])
+            self.seconds.append(strings[node.child_count])
+            self.catfixes.append(-1)
+
+            self.encode(node.lch, index, cat_strings)
+            if node.rch:
+                self.rchs[index] = len(self.cats)
+                self.encode(node.rch, index, cat_strings)
+
+    def __len__(self):
+        '''Returns the number of derivations in the corpus.'''
+        return len(self.roots)
+
+    def __iter__(self):
+        '''Yields a CCGbank bundle for each derivation in the corpus, in the order they were added, whose
+derivation is a view.'''
+        for deriv_index in xrange(len(self.roots)):
+            yield self.bundle(deriv_index)
+
+    def bundle(self, deriv_index):
+        '''Returns a CCGbank bundle for derivation number _deriv_index_ of the corpus, whose derivation is a view.'''
+        return Derivation(self.sec_nos[deriv_index], self.doc_nos[deriv_index], self.der_nos[deriv_index],
+                          self.view(self.roots[deriv_index]))
+
+    def view(self, index):
+        '''Returns a view of node _index_, or None if _index_ is -1.'''
+        if index == -1: return None
+        return (CompactNode if self.tokens[index] == -1 else CompactLeaf)(self, index)
+
+    def string(self, string_index):
+        return self.strings.strings[string_index]
+
+    def derivation(self, deriv_index):
+        '''Returns derivation number _deriv_index_ of the corpus as an ordinary (mutable) tree of Node and Leaf
+objects, with categories just like the ones the CCGbank parser would have built.'''
+        return self.decode(self.roots[deriv_index])
+
+    def decode(self, index):
+        string, categories = self.string, self.categories
+        if self.tokens[index] != -1:
+            return Leaf(categories[self.cats[index]], string(self.firsts[index]), string(self.seconds[index]),
+                        string(self.tokens[index]), string(self.catfixes[index]))
+
+        lch = self.decode(index+1)
+        rch = self.decode(self.rchs[index]) if self.rchs[index] != -1 else None
+        return Node(categories[self.cats[index]], string(self.firsts[index]), string(self.seconds[index]), None,
+                    lch, rch)
+
+    @staticmethod
+    def read(paths):
+        '''Returns a CompactCorpus holding every derivation in the CCGbank documents under the files or
+directories _paths_.'''
+        from munge.io.multi import DirFileGuessReader
+
+        corpus = CompactCorpus()
+        for path in paths:
+            corpus.extend(DirFileGuessReader(path, verbose=False))
+        return corpus
+
+class CompactView(object):
+    '''Operations common to views of internal nodes and leaves.'''
+    __slots__ = ('corpus', 'index')
+
+    def __init__(self, corpus, index):
+        self.corpus, self.index = corpus, index
+
+    def __eq__(self, other):
+        return (isinstance(other, CompactView) and
+                self.index == other.index and self.corpus is other.corpus)
+    def __ne__(self, other): return not (self == other)
+    def __hash__(self): return self.index
+
+    @property
+    def cat(self):
+        return self.corpus.categories[self.corpus.cats[self.index]]
+
+    @property
+    def cat_string(self):
+        '''The category of this node as it appears in the corpus.'''
+        return self.corpus.string(self.corpus.cats[self.index])
+
+    @property
+    def parent(self): return self.corpus.view(self.corpus.parents[self.index])
+
+    def text(self):
+        '''Returns a list of text tokens corresponding to the leaves under this node.'''
+        return traverse.text(self)
+
+    @property
+    def tag(self):
+        return self.cat_string
+
+class CompactNode(CompactView):
+    '''A view of an internal node of a CompactCorpus, offering the interface of Node.'''
+    __slots__ = ()
+
+    def __repr__(self):
+        '''Returns a (non-evaluable) string representation, a CCGbank bracketing.'''
+        rch = self.rch
+        return (" ".join(
+            ("(<T", self.cat_string, self.head_index, self.child_count + ">",
+             str(self.lch), str(rch)+' ' if rch else '')
+        ) + ")")
+
+    @property
+    def head_index(self): return self.corpus.string(self.corpus.firsts[self.index])
+    @property
+    def child_count(self): return self.corpus.string(self.corpus.seconds[self.index])
+
+    @property
+    def lch(self): return self.corpus.view(self.index + 1)
+    @property
+    def rch(self): return self.corpus.view(self.corpus.rchs[self.index])
+
+    def __iter__(self):
+        '''Iterates over each child of this node.'''
+        yield self.lch
+        rch = self.rch
+        if rch: yield rch
+    def __reversed__(self):
+        rch = self.rch
+        if rch: yield rch
+        yield self.lch
+
+    is_leaf = const_(False)
+    def label_text(self): return re.escape(self.cat_string)
+
+    def leaf_count(self):
+        '''Returns the number of leaves under this node.'''
+        return sum(1 for leaf in traverse.leaves(self))
+
+    def __getitem__(self, index):
+        if index != 0 and index != 1:
+            raise RuntimeError('Invalid index %d into Node %s.' % (index, self))
+
+        return self.lch if index == 0 else self.rch
+
+    def count(self):
+        '''Returns the number of children under this node.'''
+        if self.corpus.rchs[self.index] == -1: return 1
+        else: return 2
+
+class CompactLeaf(CompactView):
+    '''A view of a leaf of a CompactCorpus, offering the interface of Leaf.'''
+    __slots__ = ()
+
+    def __repr__(self):
+        '''Returns a (non-evaluable) string representation, a CCGbank bracketing.'''
+        return " ".join(("(<L", self.cat_string, self.pos1, self.pos2, self.lex, self.catfix)) + ">)"
+
+    @property
+    def pos1(self): return self.corpus.string(self.corpus.firsts[self.index])
+    @property
+    def pos2(self): return self.corpus.string(self.corpus.seconds[self.index])
+    @property
+    def lex(self): return self.corpus.string(self.corpus.tokens[self.index])
+    @property
+    def catfix(self): return self.corpus.string(self.corpus.catfixes[self.index])
+
+    def __iter__(self): raise StopIteration
+    __reversed__ = __iter__
+
+    is_leaf = const_(True)
+    leaf_count = const_(1)
+    count = const_(0)
+
+    def label_text(self): return """%s %s""" % (re.escape(self.cat_string), self.lex)
+
+    def __getitem__(self, index):
+        raise NotImplementedError('Leaf has no children.')
@@ -11,15 +11,54 @@ import re, os
 from itertools import imap, islice
 
 from munge.util.exceptions import CCGbankParseException
-from munge.ccg.parse import parse_tree
+from munge.ccg.parse import parse_tree, fast_parse_tree
+from munge.ccg.nodes import Node, Leaf
 from munge.io.single import SingleReader
-from munge.util.str_utils import nth_occurrence
+from munge.io.offsets import offset_index_for
+from munge.io.cache import cached_derivations
+from munge.lex.lex import preserving_split
+from munge.trees.traverse import leaves
+import munge.ccg.parse
 
 class Derivation(object):
-    '''Represents a single derivation inside a CCGbank document.'''
-    def __init__(self, sec_no, doc_no, der_no, derivation):
+    '''Represents a single derivation inside a CCGbank document. A bundle may be created from the text of
+its derivation (_deriv_string_), in which case the text is only parsed once the derivation is first accessed.'''
+    # the path of the document from which a reader read this bundle, if any
+    document = None
+    
+    def __init__(self, sec_no, doc_no, der_no, derivation=None, deriv_string=None):
         self.sec_no, self.doc_no, self.der_no = sec_no, doc_no, der_no
-        self.derivation = derivation
+        self._derivation = derivation
+        self._deriv_string = deriv_string
+        
+    @staticmethod
+    def parse_derivation(deriv_string):
+        return parse_tree(deriv_string)
+        
+    def get_derivation(self):
+        if self._derivation is None and self._deriv_string is not None:
+            self._derivation = self.parse_derivation(self._deriv_string)
+            self._deriv_string = None
+        return self._derivation
+    def set_derivation(self, derivation):
+        self._derivation = derivation
+        self._deriv_string = None
+    derivation = property(get_derivation, set_derivation)
+    
+    def is_parsed(self):
+        '''Returns whether the derivation of this bundle has been built.'''
+        return self._deriv_string is None
+    
+    def raw_text(self):
+        '''Returns the text of the derivation, without parsing it if it has yet to be parsed.'''
+        if self._deriv_string is not None: return self._deriv_string
+        return str(self._derivation)
+        
+    LeafRegex = re.compile(r'<L \S+ \S+ \S+ (\S+) \S+>')
+    def tokens(self):
+        '''Returns the lexical items of the derivation, without parsing it if it has yet to be parsed.'''
+        if self._deriv_string is not None: return self.LeafRegex.findall(self._deriv_string)
+        return [ leaf.lex for leaf in leaves(self._derivation) ]
         
     def label(self): 
         '''Returns a label representing this derivation.'''
@@ -34,22 +73,80 @@ class Derivation(object):
     def __str__(self):
         return '\n'.join((self.header(), str(self.derivation)))
     
-    @staticmethod
-    def from_header_and_derivation(header, deriv_string):
+    @classmethod
+    def from_header_and_derivation(cls, header, deriv_string, lazy=False):
         '''Creates a Derivation object based on a header line and a derivation representation.
         This retrieves the section, document and derivation number from the header line,
         expecting it to be of the form 
-        ID=wsj_SSDD.dd PARSER=GOLD NUMPARSE=1'''
+        ID=wsj_SSDD.dd PARSER=GOLD NUMPARSE=1
+        If _lazy_ is true, the derivation is only parsed once it is first accessed.'''
         
         matches = re.match(r'ID=wsj_(\d\d)(\d\d).(\d+)', header)
         if matches and len(matches.groups()) == 3:
             sec_no, doc_no, der_no = [int(i) for i in matches.groups()]
-            derivation = parse_tree(deriv_string)
+            if lazy:
+                return cls(sec_no, doc_no, der_no, deriv_string=deriv_string)
+            
+            derivation = cls.parse_derivation(deriv_string)
         
-            return Derivation(sec_no, doc_no, der_no, derivation)
+            return cls(sec_no, doc_no, der_no, derivation)
 
         raise CCGbankParseException, "Malformed CCGbank header: %s" % header
 
+class FastDerivation(Derivation):
+    '''A CCGbank derivation bundle whose derivation is built by the table-driven parser (see
+munge.ccg.parse.fast_parse_tree), which builds identical trees.'''
+    @staticmethod
+    def parse_derivation(deriv_string):
+        return fast_parse_tree(deriv_string)
+
+class CCGbankCodec(object):
+    '''Converts CCGbank derivations to and from the flat records stored in a derivation cache. An internal node
+is stored as (0, category, head index, child count, number of kids), and a leaf as
+(1, category, POS, POS, lex, category with variables), each an index into the string table.'''
+    name = 'ccgbank'
+    derivation_class = Derivation
+
+    parse_category = staticmethod(munge.ccg.parse.parse_category)
+
+    @staticmethod
+    def category_strings(deriv_string):
+        '''Yields the category string of each node of the derivation _deriv_string_, in preorder.'''
+        toks = preserving_split(deriv_string, "()<>", suppressors='<>')
+        while toks.peek() is not None:
+            if toks.next() == '<':
+                toks.next() # node type
+                yield toks.next()
+
+    @staticmethod
+    def encode(node, cat_strings, strings, records):
+        if node.is_leaf():
+            records.extend( (1, strings[cat_strings.next()], strings[node.pos1], strings[node.pos2],
+                             strings[node.lex], strings[node.catfix]) )
+        else:
+            records.extend( (0, strings[cat_strings.next()], strings[node.head_index], strings[node.child_count],
+                             node.count()) )
+            for kid in node:
+                CCGbankCodec.encode(kid, cat_strings, strings, records)
+
+    @staticmethod
+    def decode(records, i, strings, categories):
+        '''Builds the derivation whose records begin at _records_[_i_], returning it together with the index
+following its last record.'''
+        if records[i] == 1:
+            _, cat, pos1, pos2, lex, catfix = records[i:i+6]
+            return Leaf(categories[cat], strings[pos1], strings[pos2], strings[lex], strings[catfix]), i+6
+        else:
+            _, cat, head_index, child_count, nkids = records[i:i+5]
+            cat = categories[cat]
+
+            lch, i = CCGbankCodec.decode(records, i+5, strings, categories)
+            rch = None
+            if nkids > 1:
+                rch, i = CCGbankCodec.decode(records, i, strings, categories)
+
+            return Node(cat, strings[head_index], strings[child_count], None, lch, rch), i
+
 class CCGbankReader(SingleReader):
     '''An iterator over each derivation in a CCGbank document.'''
     def determine_sec_and_doc(self, filename):
@@ -69,26 +166,43 @@ class CCGbankReader(SingleReader):
     def derivation_with_index(self, filename, index=None):
         self.file = open(filename, 'r')
         
-        base = imap(lambda line: line.rstrip(), self.file.xreadlines())
         if index:
-            lines = nth_occurrence(base,
-                                  N=1,
-                                  # put a space after the pattern to ensure we match the whole token
-                                  when=lambda line: re.match(r"^ID=wsj_%02d%02d.%d " % (self.sec_no, self.doc_no, index), line),
-                                  until=lambda line: re.match(r"^ID", line))
+            lines = offset_index_for(filename).lines_for_spec(self.file, (self.sec_no, self.doc_no, index))
             return iter(lines)
         else:
-            return base
+            return imap(lambda line: line.rstrip(), self.file.xreadlines())
                           
     def __getitem__(self, index):
         '''Index-based retrieval of a derivation.'''
+        # Unless this reader was restricted to a single derivation, seek straight to the one requested
+        if not self.index:
+            with open(self.filename, 'r') as file:
+                lines = offset_index_for(self.filename).lines_for_der_no(file, index)
+            if not lines: return None
+            
+            header, deriv_string = lines[0], lines[1]
+            return self.derivation_class.from_header_and_derivation(header, deriv_string)
+            
         for deriv in self:
             if deriv.der_no == index: return deriv
             
         return None
                           
+    cache_codec = CCGbankCodec
+    # The class of the bundles this reader yields, which determines the parser used to build each derivation
+    derivation_class = Derivation
+    
     def __iter__(self):
         '''Yields an iterator over this document.'''
+        if not self.index:
+            cached = cached_derivations(self.filename, self.cache_codec)
+            if cached is not None:
+                self.file.close()
+                for sec_no, doc_no, der_no, derivation in cached:
+                    bundle = self.derivation_class(sec_no, doc_no, der_no, derivation)
+                    bundle.document = self.filename
+                    yield bundle
+                return
         
         while True:
             try:
@@ -97,10 +211,16 @@ class CCGbankReader(SingleReader):
                 self.file.close()
                 raise
                 
-            yield Derivation.from_header_and_derivation(header, deriv_string)
+            bundle = self.derivation_class.from_header_and_derivation(header, deriv_string, lazy=True)
+            bundle.document = self.filename
+            yield bundle
             
     def __str__(self):
         raise NotImplementedError, "CCGbankReader cannot generate a string representation of its backing without consuming it."
+        
+class FastCCGbankReader(CCGbankReader):
+    '''A CCGbankReader which builds each derivation with the table-driven parser.'''
+    derivation_class = FastDerivation
             
 class WritableCCGbankReader(object):
     def __init__(self, filename):
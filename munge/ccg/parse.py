@@ -7,6 +7,8 @@
 # supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
 # notify the maintainer Daniel Tse <cncandc@gmail.com>.
 
+import re
+
 from munge.lex.lex import preserving_split
 from munge.util.config import config
 
@@ -19,6 +21,7 @@ else:
 
 from munge.util.exceptions import CCGbankParseException
 from munge.util.parse_utils import shift_and_check, ensure_stream_exhausted
+from munge.io.cache import category_maker
 from nodes import Node, Leaf
 
 class CCGNodeFactory(object):
@@ -83,3 +86,69 @@ class CCGParser(object):
         #head_index = int(head_index)
 
         return self.node_factory.node_class(cat, head_index, child_count, parent)
+
+# A field of a node record: as with preserving_split, a field may contain brackets, but not whitespace or '>'
+_Field = r'([^\s>]+)'
+# Each record of a derivation, preceded by any whitespace: the start of an internal node, a leaf, or the end
+# of an internal node
+RecordRegex = re.compile(r'''\s*(?:
+    \(\s*<\s*T\s+%(field)s\s+%(field)s\s+%(field)s\s*>
+  | \(\s*<\s*L\s+%(field)s\s+%(field)s\s+%(field)s\s+%(field)s\s+%(field)s\s*>\s*\)
+  | (\))
+)''' % { 'field': _Field }, re.VERBOSE)
+TrailingRegex = re.compile(r'\s*$')
+
+# Maps each category string to a function returning a fresh category parsed from it (see
+# munge.io.cache.category_maker), so that each distinct category string is only parsed once
+_category_makers = {}
+def make_category(cat_string):
+    make = _category_makers.get(cat_string, None)
+    if make is None:
+        make = _category_makers[cat_string] = category_maker(cat_string, parse_category)
+    return make()
+
+def fast_parse_tree(tree_string, node_factory=CCGNodeFactory):
+    '''Parses the CCGbank derivation _tree_string_ into the same tree parse_tree would build. Rather than
+tokenising the derivation character by character, each node record is matched by a single regex, and the tree
+is built with an explicit stack of the internal nodes not yet closed.'''
+    node_class, leaf_class = node_factory.node_class, node_factory.leaf_class
+    match = RecordRegex.match
+
+    # each entry is the (category, head index, child count) of an open internal node, and the list of its kids
+    stack = []
+    root = None
+    pos = 0
+    while root is None:
+        record = match(tree_string, pos)
+        if not record:
+            raise CCGbankParseException("Unexpected input at position %d of derivation: %s" %
+                                        (pos, tree_string[pos:pos+40]))
+        pos = record.end()
+
+        (cat, head_index, child_count, leaf_cat, pos1, pos2, lex, catfix, close) = record.groups()
+        if cat is not None:
+            stack.append( ((make_category(cat), head_index, child_count), []) )
+            continue
+
+        if close is None:
+            node = leaf_class(make_category(leaf_cat), pos1, pos2, lex, catfix, None)
+        else:
+            if not stack:
+                raise CCGbankParseException("Unbalanced brackets in derivation.")
+
+            (cat, head_index, child_count), kids = stack.pop()
+            if not 1 <= len(kids) <= 2:
+                raise CCGbankParseException("Internal node with %d children in derivation." % len(kids))
+
+            node = node_class(cat, head_index, child_count, None, *kids)
+
+        if stack:
+            stack[-1][1].append(node)
+        else:
+            root = node
+
+    if not TrailingRegex.match(tree_string, pos):
+        raise CCGbankParseException("Unexpected input after derivation: %s" % tree_string[pos:pos+40])
+
+    return root
+
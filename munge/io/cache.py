@@ -0,0 +1,170 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+'''Binary derivation caches, which spare repeated runs over the same CCGbank or prefaced PTB documents the cost
+of tokenising and parsing them.
+
+The cache of a document is kept in a hidden file next to it (.NAME.cache), and is only used while the
+modification time and size of the document match those recorded in the cache. Each cache holds a table of the
+strings (categories, tags and lexical items) used in the document, and each derivation as a flat tuple of
+indices into that table. Each distinct category string is parsed only once per document.
+
+Caches are built explicitly, with
+
+    python -m munge.io.cache FILE_OR_DIR...
+
+after which the readers load them transparently.'''
+
+import os
+import sys
+import marshal
+import tempfile
+
+from munge.cats.headed.template import CategoryTemplate
+from munge.util.deco_utils import memoised
+from munge.util.err_utils import warn, info
+
+Version = 1
+
+def cache_path(filename):
+    '''Returns the path of the cache file for _filename_.'''
+    dirname, basename = os.path.split(filename)
+    return os.path.join(dirname, '.%s.cache' % basename)
+
+def category_maker(cat_string, parse_category):
+    '''Returns a function which returns an object just like the one _parse_category_(_cat_string_) would
+have returned, parsing _cat_string_ only once.'''
+    cat = parse_category(cat_string)
+
+    if isinstance(parse_category, memoised):
+        # the parser already returns one shared object for each string
+        return lambda: cat
+    elif hasattr(cat, 'slot'):
+        return CategoryTemplate(cat).instantiate
+    else:
+        return lambda: parse_category(cat_string)
+
+class CategoryTable(object):
+    '''Maps indices into a string table to category objects. Each category string is parsed once, and each
+subsequent request returns an object just like the one parsing the string again would have returned.'''
+    def __init__(self, strings, parse_category):
+        self.strings = strings
+        self.parse_category = parse_category
+        self.makers = {}
+
+    def __getitem__(self, index):
+        make = self.makers.get(index, None)
+        if make is None:
+            make = self.makers[index] = category_maker(self.strings[index], self.parse_category)
+        return make()
+
+class StringTable(object):
+    '''Assigns each distinct string an index, in order of first appearance.'''
+    def __init__(self):
+        self.strings = []
+        self.indices = {}
+
+    def __getitem__(self, s):
+        index = self.indices.get(s, None)
+        if index is None:
+            index = self.indices[s] = len(self.strings)
+            self.strings.append(s)
+        return index
+
+def load_cache(filename, codec):
+    '''Returns the contents of the cache for _filename_, or None if there is no cache written by _codec_
+which is current with respect to _filename_.'''
+    try:
+        stat = os.stat(filename)
+        with open(cache_path(filename), 'rb') as file:
+            version, codec_name, mtime, size, strings, derivs = marshal.load(file)
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return None
+
+    if (version, codec_name, mtime, size) != (Version, codec.name, stat.st_mtime, stat.st_size):
+        return None
+
+    return strings, derivs
+
+def cached_derivations(filename, codec):
+    '''Returns an iterator over a (sec_no, doc_no, der_no, derivation) tuple for each derivation in the
+cache for _filename_, or None if no current cache exists.'''
+    contents = load_cache(filename, codec)
+    if contents is None: return None
+
+    strings, derivs = contents
+    def _cached_derivations():
+        categories = CategoryTable(strings, codec.parse_category)
+        for sec_no, doc_no, der_no, records in derivs:
+            derivation, _ = codec.decode(records, 0, strings, categories)
+            yield sec_no, doc_no, der_no, derivation
+
+    return _cached_derivations()
+
+def write_cache(filename, codec):
+    '''Writes the cache for the document _filename_, which must be in the format of _codec_.'''
+    stat = os.stat(filename)
+
+    strings = StringTable()
+    derivs = []
+    with open(filename, 'r') as file:
+        lines = (line.rstrip() for line in file)
+        for header, deriv_string in zip(lines, lines):
+            bundle = codec.derivation_class.from_header_and_derivation(header, deriv_string)
+
+            records = []
+            cat_strings = codec.category_strings(deriv_string)
+            codec.encode(bundle.derivation, cat_strings, strings, records)
+            if next(cat_strings, None) is not None:
+                raise ValueError("Unused categories remain in derivation %s." % bundle.label())
+
+            derivs.append( (bundle.sec_no, bundle.doc_no, bundle.der_no, tuple(records)) )
+
+    # As with the offset index, write the cache atomically so that concurrent readers never see
+    # a partial file
+    fd, temp_path = tempfile.mkstemp(prefix='.cache', dir=os.path.dirname(filename) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            marshal.dump( (Version, codec.name, stat.st_mtime, stat.st_size, strings.strings, derivs), file )
+        os.rename(temp_path, cache_path(filename))
+    except:
+        if os.path.exists(temp_path): os.remove(temp_path)
+        raise
+
+def build_caches(paths):
+    '''Writes a cache for each document under the files or directories _paths_ whose cache is missing or
+stale. Returns the number of caches written.'''
+    from munge.io.guess import GuessReader
+    from munge.io.multi import DirFileGuessReader
+
+    written = 0
+    for path in paths:
+        for doc_path in DirFileGuessReader(path, verbose=False).document_paths():
+            codec = getattr(GuessReader(doc_path).reader_class, 'cache_codec', None)
+            if codec is None:
+                warn("Documents of the type of %s cannot be cached, so skipping.", doc_path)
+                continue
+
+            if load_cache(doc_path, codec) is not None: continue
+
+            try:
+                info("Caching %s...", doc_path)
+                write_cache(doc_path, codec)
+                written += 1
+            except Exception, e:
+                warn("Could not cache %s: %s", doc_path, e)
+
+    return written
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print >>sys.stderr, "usage: %s FILE_OR_DIR..." % sys.argv[0]
+        sys.exit(1)
+
+    print >>sys.stderr, "%d caches written." % build_caches(sys.argv[1:])
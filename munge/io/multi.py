@@ -27,24 +27,24 @@ modification of derivations, nor corpus output.'''
 
         self.verbose = verbose
 
-    def __iter__(self):
-        # TODO: duplication
+    def document_paths(self):
+        '''Iterates over the path of each document in the corpus, in the order in which they are read.'''
         for section_path in self.sections:
             # If _topdir_ has directories under, expand to use the files it contains
             if os.path.isdir(section_path):
-                docs = glob(os.path.join(section_path, '*'))
-                for doc_path in docs:
-                    if self.verbose: info("Processing %s...", doc_path)
-                    reader = self.reader(doc_path)
-                    for deriv_bundle in reader:
-                        yield deriv_bundle
-                    del reader
+                for doc_path in glob(os.path.join(section_path, '*')):
+                    yield doc_path
             # Otherwise _topdir_ is flat: read the files it contains
             else:
-                reader = self.reader(section_path)
-                for deriv_bundle in reader:
-                    yield deriv_bundle
-                del reader
+                yield section_path
+
+    def __iter__(self):
+        for doc_path in self.document_paths():
+            if self.verbose and doc_path not in self.sections: info("Processing %s...", doc_path)
+            reader = self.reader(doc_path)
+            for deriv_bundle in reader:
+                yield deriv_bundle
+            del reader
 
     def no_getitem_setitem(self, *args):
         raise NotImplementedError("get and setitem unavailable with MultiGuessReader.")
@@ -82,4 +82,15 @@ class DirFileGuessReader(object):
                 reader = GuessReader(self.path)
 
         for deriv_bundle in reader:
-            yield deriv_bundle
\ No newline at end of file
+            yield deriv_bundle
+            
+    def document_paths(self):
+        '''Iterates over the path of each document this reader would read, so that the documents
+can be distributed between worker processes.'''
+        path, index = padded_rsplit(self.path, ':', 1)
+        
+        if os.path.isdir(path):
+            for doc_path in MultiGuessReader(path, verbose=self.verbose).document_paths():
+                yield doc_path
+        else:
+            yield self.path
\ No newline at end of file
@@ -0,0 +1,143 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+'''Byte offset indices for documents in which each derivation is preceded by a header line
+ID=wsj_SSDD.N (CCGbank and prefaced PTB documents). An index lets a reader seek directly to a single
+derivation instead of scanning the whole document for it.
+
+The index of a document is kept in a hidden sidecar file next to it, and is rebuilt whenever the
+modification time or size of the document no longer matches those recorded in the index.'''
+
+import os
+import re
+import tempfile
+import cPickle as pickle
+
+from munge.util.err_utils import debug
+
+HeaderRegex = re.compile(r'^ID=wsj_(\d\d)(\d\d).(\d+) ')
+
+def sidecar_path(filename):
+    '''Returns the path of the sidecar file holding the index for _filename_.'''
+    dirname, basename = os.path.split(filename)
+    return os.path.join(dirname, '.%s.idx' % basename)
+
+class OffsetIndex(object):
+    '''Maps each derivation in a document to the byte offset and length of the lines belonging to it:
+its header line, and every line up to the next line beginning with ID.'''
+    Version = 1
+
+    def __init__(self, mtime, size, spans):
+        self.mtime, self.size = mtime, size
+        # (sec_no, doc_no, der_no, offset, length) for each derivation, in document order
+        self.spans = spans
+
+        self.by_spec, self.by_der_no = {}, {}
+        for sec_no, doc_no, der_no, offset, length in spans:
+            # as with a linear scan, the first of several derivations with the same ID wins
+            self.by_spec.setdefault( (sec_no, doc_no, der_no), (offset, length) )
+            self.by_der_no.setdefault( der_no, (offset, length) )
+
+    def is_current(self, stat):
+        '''Returns whether this index still describes the file with the given stat result.'''
+        return self.mtime == stat.st_mtime and self.size == stat.st_size
+
+    @staticmethod
+    def build(filename, stat):
+        '''Builds the index for _filename_ with a single pass over the document.'''
+        spans = []
+        current = None
+        offset = 0
+
+        with open(filename, 'rb') as file:
+            for line in file:
+                if line.startswith('ID'):
+                    if current:
+                        spans.append( current + (offset - current[-1],) )
+                        current = None
+
+                    matches = HeaderRegex.match(line)
+                    if matches:
+                        current = tuple(int(i) for i in matches.groups()) + (offset,)
+
+                offset += len(line)
+
+        if current:
+            spans.append( current + (offset - current[-1],) )
+
+        return OffsetIndex(stat.st_mtime, stat.st_size, spans)
+
+    @staticmethod
+    def load(filename, stat):
+        '''Loads the sidecar index for _filename_, returning None if it is missing, unreadable or stale.'''
+        try:
+            with open(sidecar_path(filename), 'rb') as file:
+                version, mtime, size, spans = pickle.load(file)
+        except (IOError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+            return None
+
+        if version != OffsetIndex.Version: return None
+
+        index = OffsetIndex(mtime, size, spans)
+        return index if index.is_current(stat) else None
+
+    def save(self, filename):
+        '''Writes this index to the sidecar file for _filename_. Since several processes may be indexing
+the same document, the index is written to a temporary file which then replaces the sidecar file.'''
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(prefix='.idx', dir=os.path.dirname(filename) or '.')
+            with os.fdopen(fd, 'wb') as file:
+                pickle.dump( (self.Version, self.mtime, self.size, self.spans), file, pickle.HIGHEST_PROTOCOL )
+            os.rename(temp_path, sidecar_path(filename))
+        except (IOError, OSError), e:
+            # an unwritable corpus directory just means the index is rebuilt by each process
+            debug("Could not write offset index for %s: %s", filename, e)
+            if temp_path and os.path.exists(temp_path): os.remove(temp_path)
+
+    @staticmethod
+    def read_span(file, (offset, length)):
+        file.seek(offset)
+        lines = file.read(length).split('\n')
+        # drop the empty string following the final newline
+        if lines and not lines[-1]: lines.pop()
+
+        return [ line.rstrip() for line in lines ]
+
+    def lines_for_spec(self, file, spec):
+        '''Returns the lines of the derivation with the (section, document, derivation) numbers _spec_ from
+the open _file_, or an empty list if the document has no such derivation.'''
+        span = self.by_spec.get(spec, None)
+        return self.read_span(file, span) if span else []
+
+    def lines_for_der_no(self, file, der_no):
+        '''Returns the lines of the first derivation numbered _der_no_ from the open _file_, or an empty
+list if the document has no such derivation.'''
+        span = self.by_der_no.get(der_no, None)
+        return self.read_span(file, span) if span else []
+
+# Indices already loaded by this process, keyed by absolute path.
+_indices = {}
+
+def offset_index_for(filename):
+    '''Returns an up-to-date offset index for _filename_, loading it from its sidecar file, or building
+(and saving) it if the sidecar is missing or stale.'''
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+
+    index = _indices.get(path, None)
+    if index is None or not index.is_current(stat):
+        index = OffsetIndex.load(path, stat)
+        if index is None:
+            index = OffsetIndex.build(path, stat)
+            index.save(path)
+
+        _indices[path] = index
+
+    return index
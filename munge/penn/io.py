@@ -15,12 +15,22 @@ from munge.util.err_utils import warn
 
 from munge.io.single import SingleReader
 from munge.util.str_utils import nth_occurrence
+from munge.trees.traverse import leaves
 
 class Derivation(object):
-    '''Represents a single derivation inside a PTB document.'''
-    def __init__(self, sec_no, doc_no, der_no, derivation):
+    '''Represents a single derivation inside a PTB document. A bundle may be created from the text of
+its derivation (_deriv_string_), in which case the text is only parsed once the derivation is first accessed.'''
+    # the path of the document from which a reader read this bundle, if any
+    document = None
+    
+    def __init__(self, sec_no, doc_no, der_no, derivation=None, deriv_string=None):
         self.sec_no, self.doc_no, self.der_no = sec_no, doc_no, der_no
         self._derivation = derivation
+        self._deriv_string = deriv_string
+        
+    @staticmethod
+    def parse_derivation(deriv_string):
+        return parse_tree(deriv_string, PennParser)[0]
         
     def spec_tuple(self):
         return (self.sec_no, self.doc_no, self.der_no)
@@ -29,9 +39,31 @@ class Derivation(object):
         '''Returns a label representing this derivation.'''
         return "%0d:%d(%d)" % self.spec_tuple()
         
-    def get_derivation(self): return self._derivation
-    def set_derivation(self, derivation): self._derivation = derivation
+    def get_derivation(self):
+        if self._derivation is None and self._deriv_string is not None:
+            self._derivation = self.parse_derivation(self._deriv_string)
+            self._deriv_string = None
+        return self._derivation
+    def set_derivation(self, derivation):
+        self._derivation = derivation
+        self._deriv_string = None
     derivation = property(get_derivation, set_derivation)
+    
+    def is_parsed(self):
+        '''Returns whether the derivation of this bundle has been built.'''
+        return self._deriv_string is None
+    
+    def raw_text(self):
+        '''Returns the text of the derivation, without parsing it if it has yet to be parsed.'''
+        if self._deriv_string is not None: return self._deriv_string
+        return str(self._derivation)
+        
+    # A leaf is a bracket containing a tag, an optional head index and category, and a lexical item
+    LeafRegex = re.compile(r'\([^\s(){}<>]+ (?:<[^>]*> )?(?:\{[^}]*\} )?([^\s(){}<>]+)\)')
+    def tokens(self):
+        '''Returns the lexical items of the derivation, without parsing it if it has yet to be parsed.'''
+        if self._deriv_string is not None: return self.LeafRegex.findall(self._deriv_string)
+        return [ leaf.lex for leaf in leaves(self._derivation) ]
         
     def __str__(self):
         return str(self.derivation)
@@ -10,28 +10,93 @@
 import re
 
 from munge.util.exceptions import CCGbankParseException
-from munge.penn.parse import parse_tree, AugmentedPennParser
+from munge.penn.parse import parse_tree, AugmentedPennParser, CAugmentedPennParser
 from munge.io.single import SingleReader
 from munge.util.err_utils import warn
 from itertools import imap
-from munge.util.str_utils import nth_occurrence
+from munge.io.offsets import offset_index_for
+from munge.io.cache import cached_derivations
+from munge.lex.lex import preserving_split
 
 import munge.penn.io as B
+import munge.penn.aug_nodes as A
+import munge.penn.parse
+import munge.cats.headed.parse
 
 class Derivation(B.Derivation):
     '''Represents a single derivation inside a PTB document.'''
     @staticmethod
-    def from_header_and_derivation(header, deriv_string):
+    def parse_derivation(deriv_string):
+        return parse_tree(deriv_string, AugmentedPennParser)[0]
+        
+    @staticmethod
+    def from_header_and_derivation(header, deriv_string, lazy=False):
+        '''If _lazy_ is true, the derivation is only parsed once it is first accessed.'''
         matches = re.match(r'ID=wsj_(\d\d)(\d\d).(\d+)', header)
         if matches and len(matches.groups()) == 3:
             sec_no, doc_no, der_no = [int(i) for i in matches.groups()]
-            derivation = parse_tree(deriv_string, AugmentedPennParser)[0]
+            if lazy:
+                return Derivation(sec_no, doc_no, der_no, deriv_string=deriv_string)
+                
+            derivation = Derivation.parse_derivation(deriv_string)
 
             ret = Derivation(sec_no, doc_no, der_no, derivation)
             return ret
 
         raise CCGbankParseException, "Malformed CCGbank header: %s" % header
         
+class AugmentedPTBCodec(object):
+    '''Converts prefaced PTB derivations to and from the flat records stored in a derivation cache. An internal
+node is stored as (0, tag, head index, category, number of kids), and a leaf as (1, tag, lex, category), where the
+tag, lex and category are indices into the string table, and a missing category is stored as -1.'''
+    name = 'prefaced-ptb'
+    derivation_class = Derivation
+
+    # the C parser always builds headed categories
+    if AugmentedPennParser is CAugmentedPennParser:
+        parse_category = staticmethod(munge.cats.headed.parse.parse_category)
+    else:
+        parse_category = staticmethod(munge.penn.parse.parse_category)
+
+    @staticmethod
+    def category_strings(deriv_string):
+        '''Yields the category string of each node of the derivation _deriv_string_ which has one, in preorder.'''
+        toks = preserving_split(deriv_string, "(){}<>", suppressors="{}")
+        while toks.peek() is not None:
+            if toks.next() == '{':
+                yield toks.next()
+
+    @staticmethod
+    def encode(node, cat_strings, strings, records):
+        cat = strings[cat_strings.next()] if node.category else -1
+        if node.is_leaf():
+            records.extend( (1, strings[node.tag], strings[node.lex], cat) )
+        else:
+            records.extend( (0, strings[node.tag], node.head_index, cat, len(node.kids)) )
+            for kid in node:
+                AugmentedPTBCodec.encode(kid, cat_strings, strings, records)
+
+    @staticmethod
+    def decode(records, i, strings, categories):
+        '''Builds the derivation whose records begin at _records_[_i_], returning it together with the index
+following its last record.'''
+        if records[i] == 1:
+            _, tag, lex, cat = records[i:i+4]
+            return A.Leaf(strings[tag], strings[lex], categories[cat] if cat != -1 else None, None), i+4
+        else:
+            _, tag, head_index, cat, nkids = records[i:i+5]
+            cat = categories[cat] if cat != -1 else None
+            i += 5
+
+            kids = []
+            for _ in xrange(nkids):
+                kid, i = AugmentedPTBCodec.decode(records, i, strings, categories)
+                kids.append(kid)
+
+            node = A.Node(strings[tag], kids, cat, None, head_index)
+            for kid in kids: kid.parent = node
+            return node, i
+
 class PrefacedPTBReader(B.AugmentedPTBReader):
     '''An iterator over each derivation in a PTB document.'''
     def __init__(self, filename):
@@ -41,19 +106,42 @@ class PrefacedPTBReader(B.AugmentedPTBReader):
     def derivation_with_index(self, filename, index=None):
         self.file = open(filename, 'r')
         
-        base = imap(lambda line: line.rstrip(), self.file.xreadlines())
         if index:
-            lines = nth_occurrence(base,
-                                  N=1,
-                                  # put a space after the pattern to ensure we match the whole token
-                                  when=lambda line: re.match(r"^ID=wsj_%02d%02d.%d " % (self.sec_no, self.doc_no, index), line),
-                                  until=lambda line: re.match(r"^ID", line))
+            lines = offset_index_for(filename).lines_for_spec(self.file, (self.sec_no, self.doc_no, index))
             return iter(lines)
         else:
-            return base
+            return imap(lambda line: line.rstrip(), self.file.xreadlines())
+            
+    def __getitem__(self, index):
+        '''Index-based retrieval of a derivation.'''
+        # Unless this reader was restricted to a single derivation, seek straight to the one requested
+        if not self.index:
+            with open(self.filename, 'r') as file:
+                lines = offset_index_for(self.filename).lines_for_der_no(file, index)
+            if not lines: return None
+            
+            header, deriv_string = lines[0], lines[1]
+            return Derivation.from_header_and_derivation(header, deriv_string)
+                
+        for deriv in self:
+            if deriv.der_no == index: return deriv
+            
+        return None
+            
+    cache_codec = AugmentedPTBCodec
             
     def __iter__(self):
         '''Yields an iterator over this document.'''
+        if not self.index:
+            cached = cached_derivations(self.filename, self.cache_codec)
+            if cached is not None:
+                self.file.close()
+                for sec_no, doc_no, der_no, derivation in cached:
+                    bundle = Derivation(sec_no, doc_no, der_no, derivation)
+                    bundle.document = self.filename
+                    yield bundle
+                return
+                
         while True:
             try:
                 header, deriv_string = self.derivs.next(), self.derivs.next()
@@ -61,5 +149,7 @@ class PrefacedPTBReader(B.AugmentedPTBReader):
                 self.file.close()
                 raise
 
-            yield Derivation.from_header_and_derivation(header, deriv_string)
+            bundle = Derivation.from_header_and_derivation(header, deriv_string, lazy=True)
+            bundle.document = self.filename
+            yield bundle
 
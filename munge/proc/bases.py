@@ -9,7 +9,7 @@
 
 from collections import defaultdict
 
-from munge.util.dict_utils import CountDict, sorted_by_value_desc
+from munge.util.dict_utils import CountDict, sorted_by_value_desc, merge_into
 from munge.proc.filter import Filter
 
 class CountRuleFrequencyBySlash(Filter):
@@ -21,6 +21,12 @@ class CountRuleFrequencyBySlash(Filter):
     def accept_comb_and_slash_index(self, leaf, comb, slash_index):
         self.freqs[ (str(leaf.cat), comb, slash_index) ] += 1
         
+    def snapshot(self):
+        return self.freqs
+        
+    def merge(self, freqs):
+        merge_into(self.freqs, freqs)
+        
     # need to define dummy accept_leaf for accept_comb_and_slash_index to work
     def accept_leaf(self, leaf): pass
         
@@ -33,6 +39,12 @@ class CountWordFrequencyByCategory(Filter):
     def accept_leaf(self, leaf):
         self.examples[ str(leaf.cat) ][leaf.lex] += 1
         
+    def snapshot(self):
+        return dict(self.examples)
+        
+    def merge(self, examples):
+        merge_into(self.examples, examples)
+        
 class ListCounts(CountRuleFrequencyBySlash):
     def output(self):
         for (cat, comb, slash_index), frequency in sorted_by_value_desc(self.freqs):
@@ -11,7 +11,7 @@ import os
 from munge.proc.filter import Filter  
 
 from munge.vis.dot import write_graph, write_png, write_pdf
-from munge.util.dict_utils import CountDict, sorted_by_value_desc
+from munge.util.dict_utils import CountDict, sorted_by_value_desc, merge_into
 from munge.cats.paths import applications  
 from munge.proc.bases import CountWordFrequencyByCategory
 from munge.proc.bases import AcceptRejectWithThreshold, AcceptRejectReporter
@@ -85,6 +85,12 @@ class ListCategoriesForLex(Filter):
         if leaf.lex == self.lex:
             self.cats_seen.add( str(leaf.cat) )
             
+    def snapshot(self):
+        return self.cats_seen
+        
+    def merge(self, cats_seen):
+        self.cats_seen |= cats_seen
+            
     def output(self):
         print "%s |- %s" % (self.lex, ', '.join(cat for cat in sorted(self.cats_seen)))
         
@@ -103,6 +109,12 @@ class CombinatorCounter(Filter):
         appls = applications(leaf)
         for appl in appls:
             self.counter[ appl ] += 1
+            
+    def snapshot(self):
+        return self.counter
+        
+    def merge(self, counter):
+        merge_into(self.counter, counter)
         
     def output(self):
         for comb, count in sorted_by_value_desc(self.counter):
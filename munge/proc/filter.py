@@ -47,6 +47,17 @@ class Filter(object):
         '''This is invoked by the framework after all derivations have been processed.'''
         pass
 
+    # A filter which accumulates statistics can define these two methods, so that the corpus can be split
+    # into shards, each processed by a separate copy of the filter, and the results combined before output.
+    # snapshot() returns the state of the filter as a picklable object, and merge(state) folds in a state
+    # returned by the snapshot() of another copy of the same filter.
+    snapshot = None
+    merge = None
+
+    @staticmethod
+    def is_mergeable(filter):
+        return getattr(filter, 'snapshot', None) is not None and getattr(filter, 'merge', None) is not None
+
     # Concrete filters should define a long name ('--long-name') for command-line invocation.
     long_opt = Option()
     # Concrete filters should define a short name ('-l') for command-line invocation.
@@ -0,0 +1,508 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+'''Compiles a parsed tgrep expression into a single closure _query_(node, context), which returns whether
+_node_ matches the expression, exactly as _expression_.is_satisfied_by(node, context) would (including
+the nodes it captures into _context_ and the order in which it does so).
+
+Instead of dispatching through is_satisfied_by on each object of the expression and through op_func on
+each constraint, each operator is compiled into a closure over the compiled form of its argument, with
+regexes and literals bound in advance. Operators without a compiled form, and expression objects of any
+other type, are evaluated by the interpreter.
+
+The constraints of a node are evaluated cheapest first rather than in the order written: each is given a
+static cost from the cost of its operator (a sibling scan is cheaper than a subtree traversal) and its argument,
+and as the query runs, the rate at which each constraint rejects nodes is measured and the constraints are
+reordered by expected cost. Constraints which capture or refer to variables (=X, ~X, ^=X, ...), and reluctant
+constraints, stay where they were written, and the remaining constraints are only reordered between them, so
+that each capture happens under exactly the same conditions as before.'''
+
+import re
+
+from munge.proc.tgrep.nodes import *
+from munge.proc.tgrep.ops import Operators, leaves_after, leaves_up_to
+from munge.util.err_utils import warn
+from munge.util.exceptions import TgrepException
+
+def compile_query(expr):
+    '''Returns a function (node, context) equivalent to _expr_.is_satisfied_by.'''
+    for cls in type(expr).__mro__:
+        compiler = Compilers.get(cls, None)
+        if compiler: return compiler(expr)
+
+    # evaluate anything else with the interpreter
+    return expr.is_satisfied_by
+
+def compile_guarded(expr):
+    '''Compiles _expr_ which, if it is a Constraint, swallows KeyErrors just as Constraint.is_satisfied_by does.'''
+    test = compile_query(expr)
+    if not isinstance(expr, Constraint): return test
+
+    operator = expr.operator
+    def _guarded(node, context):
+        try:
+            return test(node, context)
+        except KeyError:
+            warn("Invalid operator %s encountered.", operator)
+        return False
+    return _guarded
+
+def compile_conjunction(exprs):
+    '''Compiles a sequence of constraints which must all be satisfied.'''
+    # Rather than wrapping each constraint in compile_guarded, the try block is inlined into the loop
+    tests = [ (compile_query(expr), expr.operator if isinstance(expr, Constraint) else None)
+              for expr in exprs ]
+
+    if not tests:
+        return lambda node, context: True
+
+    ordering = ConstraintOrdering(exprs)
+    if not ordering.is_reorderable():
+        tests = tuple(tests)
+        def _conjunction(node, context):
+            for test, operator in tests:
+                try:
+                    if not test(node, context): return False
+                except KeyError:
+                    if operator is None: raise
+                    warn("Invalid operator %s encountered.", operator)
+                    return False
+            return True
+        return _conjunction
+
+    # each entry is (test, operator, index of the constraint)
+    entries = [ test_and_operator + (index,) for (index, test_and_operator) in enumerate(tests) ]
+    state = {}
+    def reorder():
+        state['order'] = tuple( entries[index] for index in ordering.order )
+        state['calls'] = 0
+    reorder()
+    # the number of nodes each constraint rejected since the last reordering
+    rejections = ordering.rejections
+
+    def _conjunction(node, context):
+        state['calls'] += 1
+        if state['calls'] >= ReorderInterval:
+            ordering.update(state['calls'])
+            reorder()
+
+        for test, operator, index in state['order']:
+            try:
+                if not test(node, context):
+                    rejections[index] += 1
+                    return False
+            except KeyError:
+                if operator is None: raise
+                warn("Invalid operator %s encountered.", operator)
+                return False
+        return True
+    return _conjunction
+
+# Static costs of evaluating each operator once its argument is compiled, in units of a single test of a node
+OperatorCosts = {
+    '<': 3,     # children
+    '<<': 20,   # subtree
+    '<1': 1,
+    '<2': 1,
+    '<%': 3,
+    '>': 1,
+    '>>': 6,    # ancestors
+    '.': 2,
+    '..': 15,   # following leaves
+    '$': 2,     # siblings
+    '&': 1,
+    '<#': 1,
+    '<<#': 4,   # head chain
+}
+# The cost of an operator without a static cost (including those evaluated by the interpreter)
+DefaultOperatorCost = 10
+# The costs of the integer-argument operators which never evaluate their argument (#<N, ##N), and of the
+# nth child operator (<N)
+ArgumentlessOperatorRegex = re.compile(r'\#(\#|<)\d+$')
+ArgumentlessOperatorCost = 0.5
+NthChildOperatorRegex = re.compile(r'<\d+$')
+
+def operator_cost(operator):
+    if operator in OperatorCosts: return OperatorCosts[operator]
+    if ArgumentlessOperatorRegex.match(operator): return ArgumentlessOperatorCost
+    if NthChildOperatorRegex.match(operator): return 1
+    return DefaultOperatorCost
+
+def expression_cost(expr):
+    '''Returns the estimated cost of testing a single node against _expr_.'''
+    if isinstance(expr, Node):
+        # the constraints are only evaluated for nodes matching the anchor
+        return expression_cost(expr.anchor) + 0.5 * sum(expression_cost(c) for c in expr.constraints)
+    elif isinstance(expr, Constraint):
+        if expr.rhs is None or ArgumentlessOperatorRegex.match(expr.operator):
+            return operator_cost(expr.operator)
+        return operator_cost(expr.operator) * expression_cost(expr.rhs)
+    elif isinstance(expr, Negation):
+        return expression_cost(expr.inner)
+    elif isinstance(expr, Reluctant):
+        return expression_cost(expr.constraint)
+    elif isinstance(expr, Alternation):
+        return expression_cost(expr.lhs) + expression_cost(expr.rhs)
+    elif isinstance(expr, Group):
+        return expression_cost(expr.node)
+    elif isinstance(expr, ConstraintGroup):
+        return sum(expression_cost(c) for c in expr.constraints)
+    elif isinstance(expr, StoreAtom):
+        return expression_cost(expr.atom)
+    elif isinstance(expr, REValue):
+        return 2
+    return 1
+
+def has_variables(expr):
+    '''Returns whether _expr_ captures or refers to a variable.'''
+    if isinstance(expr, (StoreAtom, AtomValue)):
+        return True
+    elif isinstance(expr, Node):
+        return has_variables(expr.anchor) or any(has_variables(c) for c in expr.constraints)
+    elif isinstance(expr, Constraint):
+        return expr.rhs is not None and has_variables(expr.rhs)
+    elif isinstance(expr, Negation):
+        return has_variables(expr.inner)
+    elif isinstance(expr, Reluctant):
+        return has_variables(expr.constraint)
+    elif isinstance(expr, Alternation):
+        return has_variables(expr.lhs) or has_variables(expr.rhs)
+    elif isinstance(expr, Group):
+        return has_variables(expr.node)
+    elif isinstance(expr, ConstraintGroup):
+        return any(has_variables(c) for c in expr.constraints)
+    return False
+
+# The number of evaluations of a conjunction between reorderings of its constraints
+ReorderInterval = 1000
+
+class ConstraintOrdering(object):
+    '''Determines the order in which a sequence of constraints is evaluated. The constraints are divided into
+runs separated by fixed constraints (those which capture or refer to variables, and reluctant constraints); the
+constraints of each run are ordered by increasing rank, the cost of a constraint divided by the proportion of
+nodes it rejects, which minimises the expected cost of evaluating the run.'''
+    def __init__(self, exprs):
+        self.costs = [ expression_cost(expr) for expr in exprs ]
+
+        # the runs of movable constraints, each a list of indices, with each fixed constraint in a run of its own
+        self.runs = []
+        run = []
+        for index, expr in enumerate(exprs):
+            if isinstance(expr, Reluctant) or has_variables(expr):
+                if run: self.runs.append(run)
+                self.runs.append([index])
+                run = []
+            else:
+                run.append(index)
+        if run: self.runs.append(run)
+
+        # the number of nodes which reached, and which were rejected by each constraint
+        self.evaluations = [0] * len(exprs)
+        self.rejected = [0] * len(exprs)
+        # the number of rejections by each constraint since the last update
+        self.rejections = [0] * len(exprs)
+
+        self.order = self.compute_order()
+
+    def is_reorderable(self):
+        return any(len(run) > 1 for run in self.runs)
+
+    def rank(self, index):
+        # until measured, each constraint is assumed to reject half the nodes it sees
+        pass_rate = (self.evaluations[index] - self.rejected[index] + 1) / float(self.evaluations[index] + 2)
+        return self.costs[index] / (1.0 - pass_rate)
+
+    def compute_order(self):
+        order = []
+        for run in self.runs:
+            order.extend(sorted(run, key=self.rank))
+        return order
+
+    def update(self, calls):
+        '''Accounts for the rejections counted over the last _calls_ evaluations, and reorders the constraints.'''
+        reached = calls
+        for index in self.order:
+            self.evaluations[index] += reached
+            self.rejected[index] += self.rejections[index]
+            reached -= self.rejections[index]
+            self.rejections[index] = 0
+
+        self.order = self.compute_order()
+
+def compile_node(expr):
+    anchor = compile_query(expr.anchor)
+    if not expr.constraints: return anchor
+
+    constraints = compile_conjunction(expr.constraints)
+    def _node(node, context):
+        return anchor(node, context) and constraints(node, context)
+    return _node
+
+def compile_reluctant(expr):
+    inner = compile_guarded(expr.constraint)
+    def _reluctant(node, context):
+        inner(node, context)
+        return True
+    return _reluctant
+
+def compile_negation(expr):
+    inner = compile_guarded(expr.inner)
+    return lambda node, context: not inner(node, context)
+
+def compile_alternation(expr):
+    lhs, rhs = compile_guarded(expr.lhs), compile_guarded(expr.rhs)
+    return lambda node, context: lhs(node, context) or rhs(node, context)
+
+def compile_group(expr):
+    return compile_query(expr.node)
+
+def compile_constraint_group(expr):
+    return compile_conjunction(expr.constraints)
+
+def compile_atom(expr):
+    value = expr.value
+    return lambda node, context: value == str(node.cat)
+
+def compile_store_atom(expr):
+    atom, var = compile_query(expr.atom), expr.var
+    def _store_atom(node, context):
+        satisfied = atom(node, context)
+        if satisfied:
+            context[var] = node
+        return satisfied
+    return _store_atom
+
+def compile_atom_value(expr):
+    var, evaluate = expr.var, expr.evaluate
+    def _atom_value(node, context):
+        if var not in context:
+            raise TgrepException('No variable %s exists in the context.' % var)
+        return evaluate(context[var], node)
+    return _atom_value
+
+def compile_match_lex(expr):
+    lex = expr.lex_to_match
+    return lambda node, context: node.is_leaf() and node.lex == lex
+
+def compile_match_cat(expr):
+    cat = expr.cat_to_match
+    return lambda node, context: str(node.category) == cat
+
+def compile_re_lex(expr):
+    match = expr.match_method
+    if expr.unicode:
+        return lambda node, context: node.is_leaf() and match(node.lex.decode('u8')) is not None
+    return lambda node, context: node.is_leaf() and match(node.lex) is not None
+
+def compile_re_cat(expr):
+    match = expr.match_method
+    return lambda node, context: match(str(node.category)) is not None
+
+def compile_re(expr):
+    match = expr.match_method
+    return lambda node, context: match(str(node.cat)) is not None
+
+def compile_all(expr):
+    return lambda node, context: True
+
+# Compiled operators. Each maker receives the compiled argument of the constraint, and returns a
+# function (node, context) with the same semantics as the corresponding function in ops.
+def IsParentOf(m):
+    def _IsParentOf(node, context):
+        if node.is_leaf(): return False
+        for kid in node:
+            if m(kid, context): return True
+        return False
+    return _IsParentOf
+
+def Dominates(m):
+    def _preorder(node, context):
+        if m(node, context): return True
+        # (iterating over a leaf raises StopIteration outside a generator)
+        if not node.is_leaf():
+            for kid in node:
+                if _preorder(kid, context): return True
+        return False
+
+    def _Dominates(node, context):
+        if node.is_leaf(): return False
+        # as with nodes(), this includes _node_ itself
+        return _preorder(node, context)
+    return _Dominates
+
+def LeftChildOf(m):
+    def _LeftChildOf(node, context):
+        if node.is_leaf(): return False
+        return m(node[0], context)
+    return _LeftChildOf
+
+def RightChildOf(m):
+    def _RightChildOf(node, context):
+        if node.is_leaf(): return False
+        return node.count() > 1 and m(node[1], context)
+    return _RightChildOf
+
+def AllChildrenOf(m):
+    def _AllChildrenOf(node, context):
+        if node.is_leaf(): return False
+        for kid in node:
+            if not m(kid, context): return False
+        return True
+    return _AllChildrenOf
+
+def IsChildOf(m):
+    def _IsChildOf(node, context):
+        if node.parent is None: return False
+        return m(node.parent, context)
+    return _IsChildOf
+
+def IsDominatedBy(m):
+    def _IsDominatedBy(node, context):
+        if node.parent is None: return False
+        while node.parent:
+            node = node.parent
+            if m(node, context): return True
+        return False
+    return _IsDominatedBy
+
+def ImmediatelyPrecedes(m):
+    def _ImmediatelyPrecedes(node, context):
+        if not node.is_leaf(): return False
+        successor = next(leaves_after(node), None)
+        return bool(successor) and m(successor, context)
+    return _ImmediatelyPrecedes
+
+def Precedes(m):
+    def _Precedes(node, context):
+        if not node.is_leaf(): return False
+        for successor in leaves_up_to(node):
+            if m(successor, context): return True
+        return False
+    return _Precedes
+
+def IsSiblingOf(m):
+    def _IsSiblingOf(node, context):
+        if node.parent is None: return False
+        for kid in node.parent:
+            if kid is node: continue
+            if m(kid, context): return True
+        return False
+    return _IsSiblingOf
+
+def And(m):
+    return m
+
+def ImmediatelyHeadedBy(m):
+    def _ImmediatelyHeadedBy(node, context):
+        if node.is_leaf(): return False
+        if node.head_index is None: return False
+        return m(node[node.head_index], context)
+    return _ImmediatelyHeadedBy
+
+def HeadedBy(m):
+    def _HeadedBy(node, context):
+        if node.is_leaf(): return False
+        if node.head_index is None: return False
+
+        cur = node
+        while not cur.is_leaf() and cur.head_index is not None:
+            cur = cur[cur.head_index]
+            if m(cur, context): return True
+        return False
+    return _HeadedBy
+
+def IsNthChildOf(n):
+    n = int(n)
+    def _IsNthChildOfMaker(m):
+        def _IsNthChildOf(node, context):
+            if not 1 <= n <= node.count(): return False
+            return m(node[n-1], context)
+        return _IsNthChildOf
+    return _IsNthChildOfMaker
+
+def ChildCount(n):
+    n = int(n)
+    def _ChildCountMaker(m):
+        return lambda node, context: node.count() == n
+    return _ChildCountMaker
+
+def HeadIndexIs(n):
+    n = int(n)
+    def _HeadIndexIsMaker(m):
+        def _HeadIndexIs(node, context):
+            if node.is_leaf(): return False
+            return int(node.head_index) == n
+        return _HeadIndexIs
+    return _HeadIndexIsMaker
+
+CompiledOperators = {
+    '<': IsParentOf,
+    '<<': Dominates,
+    '<1': LeftChildOf,
+    '<2': RightChildOf,
+    '<%': AllChildrenOf,
+    '>': IsChildOf,
+    '>>': IsDominatedBy,
+    '.': ImmediatelyPrecedes,
+    '..': Precedes,
+    '$': IsSiblingOf,
+    '&': And,
+    '<#': ImmediatelyHeadedBy,
+    '<<#': HeadedBy,
+}
+
+# These correspond to ops.IntArgOperators, whose regexes never match the same operator
+CompiledIntArgOperators = [
+    (re.compile(r'<(\d+)'), IsNthChildOf),
+    (re.compile(r'\#<(\d+)'), ChildCount),
+    (re.compile(r'\#\#(\d+)'), HeadIndexIs),
+]
+
+def compiled_operator_maker(operator):
+    '''Returns the maker of the compiled form of _operator_, or None if it has none.'''
+    # Operators such as '<1' are both plain and integer-argument operators; as in
+    # Constraint.get_op_func_for, the plain operator takes precedence
+    if operator in Operators:
+        return CompiledOperators.get(operator, None)
+
+    for regex, maker in CompiledIntArgOperators:
+        matches = regex.match(operator)
+        if matches:
+            return maker(*matches.groups())
+
+    return None
+
+def compile_constraint(expr):
+    maker = compiled_operator_maker(expr.operator)
+    if maker is None:
+        # fall back to the interpreted operator (raising the same exception as the interpreter if the
+        # operator is invalid)
+        op_func, rhs = expr.op_func, expr.rhs
+        return lambda node, context: op_func(rhs, node, context)
+
+    return maker(compile_query(expr.rhs) if expr.rhs is not None else None)
+
+Compilers = {
+    Node: compile_node,
+    Reluctant: compile_reluctant,
+    Constraint: compile_constraint,
+    Negation: compile_negation,
+    Alternation: compile_alternation,
+    Group: compile_group,
+    ConstraintGroup: compile_constraint_group,
+    Atom: compile_atom,
+    StoreAtom: compile_store_atom,
+    AtomValue: compile_atom_value,
+    MatchLex: compile_match_lex,
+    MatchCat: compile_match_cat,
+    RELex: compile_re_lex,
+    RECat: compile_re_cat,
+    RE: compile_re,
+    All: compile_all,
+}
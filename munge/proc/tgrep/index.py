@@ -0,0 +1,190 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+'''Inverted indices over the derivations of CCGbank and prefaced PTB documents, which let tgrep skip the
+derivations which cannot match a query without parsing them.
+
+The index of a document records, for each label in munge.proc.tgrep.requirements.Labels (categories, lexical
+items and parent/child category pairs), the derivation numbers of the derivations containing a node with that
+label. The requirements of a query (see munge.proc.tgrep.requirements) are looked up in the index, and only
+the derivations which satisfy every requirement are candidates for a match.
+
+As with the derivation cache, the index of a document is kept in a hidden file next to it (.NAME.tgx), and is
+only used while the modification time and size of the document match those recorded in the index. Indices are
+built explicitly, with
+
+    python -m munge.proc.tgrep.index FILE_OR_DIR...
+
+after which the tgrep filters consult them transparently. Since the index describes the document on disk, it is
+only consulted for derivations which have yet to be parsed (and so cannot have been modified by another filter).'''
+
+import os
+import sys
+import marshal
+import tempfile
+
+from munge.proc.tgrep.requirements import Labels
+from munge.trees.traverse import nodes
+from munge.util.dict_utils import LRUDict
+from munge.util.err_utils import warn, info
+
+Version = 1
+
+def index_path(filename):
+    '''Returns the path of the tgrep index for _filename_.'''
+    dirname, basename = os.path.split(filename)
+    return os.path.join(dirname, '.%s.tgx' % basename)
+
+class TgrepIndex(object):
+    '''Maps each label of each node in a document to the derivation numbers of the derivations containing it.'''
+    def __init__(self, mtime, size, postings):
+        self.mtime, self.size = mtime, size
+        # maps the name of each label function to a dict from each of its labels to a tuple of der_nos
+        self.postings = postings
+
+    def is_current(self, stat):
+        '''Returns whether this index still describes the file with the given stat result.'''
+        return self.mtime == stat.st_mtime and self.size == stat.st_size
+
+    @staticmethod
+    def build(filename):
+        '''Builds the index for the document _filename_ with a single pass over its derivations.'''
+        from munge.io.guess import GuessReader
+
+        stat = os.stat(filename)
+
+        postings = dict( (label.__name__, {}) for label in Labels )
+        for bundle in GuessReader(filename):
+            for node in nodes(bundle.derivation):
+                for label in Labels:
+                    value = label(node)
+                    if value is not None:
+                        postings[label.__name__].setdefault(value, set()).add(bundle.der_no)
+
+        for label_postings in postings.itervalues():
+            for value, der_nos in label_postings.iteritems():
+                label_postings[value] = tuple(sorted(der_nos))
+
+        return TgrepIndex(stat.st_mtime, stat.st_size, postings)
+
+    @staticmethod
+    def load(filename):
+        '''Returns the index for _filename_, or None if no current index exists.'''
+        try:
+            stat = os.stat(filename)
+            with open(index_path(filename), 'rb') as file:
+                version, mtime, size, postings = marshal.load(file)
+        except (IOError, OSError, EOFError, ValueError, TypeError):
+            return None
+
+        if version != Version: return None
+
+        index = TgrepIndex(mtime, size, postings)
+        if not index.is_current(stat): return None
+        return index
+
+    def save(self, filename):
+        '''Writes this index as the index for _filename_.'''
+        # As with the derivation cache, write the index atomically so that concurrent readers never see
+        # a partial file
+        fd, temp_path = tempfile.mkstemp(prefix='.tgx', dir=os.path.dirname(filename) or '.')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                marshal.dump( (Version, self.mtime, self.size, self.postings), file )
+            os.rename(temp_path, index_path(filename))
+        except:
+            if os.path.exists(temp_path): os.remove(temp_path)
+            raise
+
+    def candidates(self, requirements):
+        '''Returns the set of der_nos of those derivations which satisfy each of _requirements_, or None if
+the index cannot narrow down the candidates (because none of _requirements_ is on an indexed label).'''
+        result = None
+        for label, test, literal in requirements.itervalues():
+            label_postings = self.postings.get(label.__name__, None)
+            if label_postings is None: continue
+
+            der_nos = set()
+            if literal is not None:
+                der_nos.update(label_postings.get(literal, ()))
+            else:
+                # each distinct label of the document is tested once
+                for value, value_der_nos in label_postings.iteritems():
+                    if test(value): der_nos.update(value_der_nos)
+
+            result = der_nos if result is None else (result & der_nos)
+            if not result: break
+
+        return result
+
+_indices = {}
+def index_for(filename):
+    '''Returns the current index for _filename_, or None if none exists. Indices are never built implicitly.'''
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+
+    index = _indices.get(filename, None)
+    if index is None or not index.is_current(stat):
+        index = _indices[filename] = TgrepIndex.load(filename)
+    return index
+
+CandidatesCacheSize = 256
+# Maps (document, expression) to the candidates of the expression in that document
+_candidates = LRUDict(CandidatesCacheSize)
+
+def may_match(bundle, expression):
+    '''Returns False if the index of the document containing _bundle_ shows that its derivation cannot match
+_expression_, and True otherwise (including whenever no index can be consulted).'''
+    document = getattr(bundle, 'document', None)
+    if document is None or bundle.is_parsed(): return True
+
+    index = index_for(document)
+    if index is None: return True
+
+    key = (document, index.mtime, expression)
+    candidates = _candidates.get(key, False)
+    if candidates is False:
+        from munge.proc.tgrep.tgrep import get_requirements
+        candidates = _candidates[key] = index.candidates(get_requirements(expression))
+
+    return candidates is None or bundle.der_no in candidates
+
+def build_indices(paths):
+    '''Writes a tgrep index for each document under the files or directories _paths_ whose index is missing
+or stale. Returns the number of indices written.'''
+    from munge.io.guess import GuessReader
+    from munge.io.multi import DirFileGuessReader
+
+    written = 0
+    for path in paths:
+        for doc_path in DirFileGuessReader(path, verbose=False).document_paths():
+            # only the documents which can be cached have derivation numbers to index by
+            if getattr(GuessReader(doc_path).reader_class, 'cache_codec', None) is None:
+                warn("Documents of the type of %s cannot be indexed, so skipping.", doc_path)
+                continue
+
+            if TgrepIndex.load(doc_path) is not None: continue
+
+            try:
+                info("Indexing %s...", doc_path)
+                TgrepIndex.build(doc_path).save(doc_path)
+                written += 1
+            except Exception, e:
+                warn("Could not index %s: %s", doc_path, e)
+
+    return written
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print >>sys.stderr, "usage: %s FILE_OR_DIR..." % sys.argv[0]
+        sys.exit(1)
+
+    print >>sys.stderr, "%d indices written." % build_indices(sys.argv[1:])
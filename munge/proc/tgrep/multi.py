@@ -0,0 +1,278 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+'''Applies an ordered list of tgrep expressions to a derivation with a single traversal, rather than one
+traversal per expression.
+
+The expressions are applied in order, as Fix applies them: each expression is run over the whole derivation
+(as tgrep runs it, right to left unless told otherwise), and the caller handles each match (calling a callback
+which may modify the derivation) before the next expression is run. That order is preserved exactly: each
+expression visits the nodes it can match in the order in which tgrep would visit them.
+
+Each expression has a root constraint: its anchor, and the anchors of the arguments of its positive child
+constraints (<, <1, <2, <#, <N). A node can only match an expression if it matches the anchor, and some child of
+the node matches each child anchor. One traversal of the derivation tests every node against every distinct
+anchor and requirement (see munge.proc.tgrep.requirements) of the expressions at once, recording three
+bitmasks for each node: the tests satisfied by the node itself, by any of its children, and by any node of its
+subtree. An expression is then evaluated only against the nodes which satisfy its root constraint, without
+descending into subtrees which contain none, and not at all if the derivation fails one of its requirements. Since
+the tests depend only on the labels of a node, their results are memoised by label, so that a label seen before
+costs a dictionary lookup.
+
+A callback is expected to modify only the subtree under the parent of the highest of the matched node and the
+nodes captured with it (replacing a captured node in its parent, for instance). After each match, only that
+subtree is traversed again, and the masks of its ancestors are updated. If the subtree would contain the root,
+or the caller installs a new root, the whole derivation is traversed again as needed.'''
+
+from weakref import ProxyType
+
+from munge.proc.tgrep.nodes import Context, Node, Group, Constraint, ConstraintGroup
+from munge.proc.tgrep.requirements import anchor_requirement, ChildOperators, NthChildOperatorRegex
+from munge.proc.tgrep.structure import StructureIndex
+from munge.proc.tgrep.tgrep import parse_query, get_query, get_requirements, evaluate_with_index
+from munge.trees.traverse import nodes
+from munge.util.dict_utils import LRUDict
+
+def child_requirements(constraints, requirements):
+    '''Adds to _requirements_ the requirement that some node matches the anchor of the argument of each positive
+child constraint among _constraints_.'''
+    for constraint in constraints:
+        if isinstance(constraint, ConstraintGroup):
+            child_requirements(constraint.constraints, requirements)
+
+        elif isinstance(constraint, Constraint) and constraint.rhs is not None:
+            operator = constraint.operator
+            if operator in ChildOperators or NthChildOperatorRegex.match(operator):
+                requirement = anchor_requirement(constraint.rhs)
+                if requirement is not None: requirements.append(requirement)
+
+def root_constraint(expr):
+    '''Returns (anchor, children) for the parsed expression _expr_: the requirement that a node matches its anchor
+(or None if any node does), and a list of the requirements that some child of the node matches each child
+anchor.'''
+    while isinstance(expr, Group): expr = expr.node
+    if not isinstance(expr, Node): return None, []
+
+    children = []
+    child_requirements(expr.constraints, children)
+    return anchor_requirement(expr.anchor), children
+
+class Pattern(object):
+    '''A compiled expression of a PatternSet, with the masks of the tests of its root constraint and of its
+requirements.'''
+    def __init__(self, expression, query, anchor, children, required, options):
+        self.expression = expression
+        self.query = query
+        # the tests a node must satisfy itself, and those which its children must satisfy between them
+        self.anchor, self.children = anchor, children
+        self.required = required
+        self.options = options
+
+class PatternSet(object):
+    '''The compiled form of a list of (expression, options) pairs, where _options_ is a dict of the keyword
+arguments (left_to_right, nonrecursive) which tgrep would be given with _expression_.'''
+    # The number of labels of each kind whose test results are memoised
+    MemoSize = 65536
+
+    def __init__(self, expressions_and_options):
+        # maps each requirement key to its bit
+        self.bits = {}
+        # maps each label function to a list of (bit, test, literal)
+        tests = {}
+
+        self.patterns = []
+        for expression, options in expressions_and_options:
+            anchor, children = root_constraint(parse_query(expression))
+
+            self.patterns.append(Pattern(expression, get_query(expression),
+                                         self.mask([anchor] if anchor else [], tests),
+                                         self.mask(children, tests),
+                                         self.mask(get_requirements(expression).iteritems(), tests),
+                                         options))
+
+        # for each label function, its memo (mapping each label to the mask of the tests it satisfies) and tests
+        self.label_tests = [ (label, {}, label_tests) for (label, label_tests) in tests.iteritems() ]
+
+    def mask(self, requirements, tests):
+        '''Returns the mask of the tests of _requirements_, assigning a bit to each test not seen before.'''
+        mask = 0
+        for key, (label, test, literal) in requirements:
+            bit = self.bits.get(key, None)
+            if bit is None:
+                bit = self.bits[key] = 1 << len(self.bits)
+                tests.setdefault(label, []).append( (bit, test, literal) )
+            mask |= bit
+        return mask
+
+    def label_mask(self, node):
+        '''Returns the mask of the tests satisfied by _node_.'''
+        mask = 0
+        for label, memo, tests in self.label_tests:
+            value = label(node)
+
+            result = memo.get(value, None)
+            if result is None:
+                if len(memo) >= self.MemoSize: memo.clear()
+
+                result = 0
+                for bit, test, literal in tests:
+                    if (value == literal) if literal is not None else test(value):
+                        result |= bit
+                memo[value] = result
+
+            mask |= result
+        return mask
+
+    def run(self, deriv):
+        '''Returns a PatternRun which applies these expressions to _deriv_.'''
+        return PatternRun(self, deriv)
+
+class PatternRun(object):
+    '''Applies the expressions of a PatternSet in turn to a single derivation, keeping the masks of its nodes.'''
+    def __init__(self, pattern_set, root):
+        self.pattern_set = pattern_set
+        self.reset(root)
+
+    def reset(self, root=None):
+        '''Discards the masks of every node. The caller installs a new root _root_, if given.'''
+        if root is not None: self.root = root
+
+        # map each node to the tests satisfied by the node itself, by any of its children and by its subtree
+        self.own, self.kids, self.under = {}, {}, {}
+
+    def scan(self, node):
+        '''Computes the masks of each node under _node_, returning the mask of its subtree.'''
+        own = under = self.pattern_set.label_mask(node)
+        kids = 0
+        if not node.is_leaf():
+            for kid in node:
+                under |= self.scan(kid)
+                kids |= self.own[kid]
+
+        self.own[node], self.kids[node], self.under[node] = own, kids, under
+        return under
+
+    def under_mask(self, node):
+        under = self.under.get(node, None)
+        if under is None: under = self.scan(node)
+        return under
+
+    def is_candidate(self, node, pattern):
+        '''Returns whether _node_ satisfies the root constraint of _pattern_.'''
+        anchor, children = pattern.anchor, pattern.children
+        if not (anchor or children): return True
+
+        if node not in self.own: self.scan(node)
+        return (self.own[node] & anchor) == anchor and (self.kids[node] & children) == children
+
+    def candidates(self, node, pattern, order):
+        '''Yields each node under _node_ satisfying the root constraint of _pattern_, in the order in which tgrep
+would visit them (_order_ is iter for left to right, and reversed for right to left). As with tgrep, the children
+of a node are only found after the node has been yielded.'''
+        if self.is_candidate(node, pattern): yield node
+
+        if not node.is_leaf():
+            bits = pattern.anchor | pattern.children
+            for kid in order(node):
+                if (self.under_mask(kid) & bits) == bits:
+                    for candidate in self.candidates(kid, pattern, order):
+                        yield candidate
+
+    def matches(self, pattern):
+        '''Yields (node, context) for each match of _pattern_, exactly as tgrep would with the same options. The
+caller may modify the derivation before resuming iteration.'''
+        root = self.root
+        if (self.under_mask(root) & pattern.required) != pattern.required: return
+
+        options = pattern.options
+        if options.get('nonrecursive', False):
+            candidates = iter([root])
+        else:
+            candidates = self.candidates(root, pattern, iter if options.get('left_to_right', False) else reversed)
+
+        query = pattern.query
+        context = Context()
+        index = StructureIndex(root)
+        for node in candidates:
+            context.clear()
+
+            if evaluate_with_index(query, node, context, index):
+                changed = self.affected_subtree(node, context)
+                before = list(nodes(changed)) if changed is not None else None
+
+                yield node, context
+
+                # the caller may have modified the derivation
+                index.invalidate()
+                self.update(changed, before)
+
+    def affected_subtree(self, node, context):
+        '''Returns the parent of the highest of _node_ and the nodes captured in _context_, whose subtree the
+caller may modify, or None if it is the whole derivation.'''
+        # maps the id of each ancestor of the node (from the node itself up) to its distance from the node
+        ancestors = []
+        distances = {}
+        while node is not None:
+            # (the parent links of CCG derivations are proxies, whose ids are not those of the nodes)
+            if isinstance(node, ProxyType): return None
+
+            distances[id(node)] = len(ancestors)
+            ancestors.append(node)
+            node = node.parent
+
+        highest = 0
+        for captured in context.itervalues():
+            while id(captured) not in distances:
+                if isinstance(captured, ProxyType): return None
+                captured = captured.parent
+                # (the captured node is not in the same tree as the matched node)
+                if captured is None: return None
+
+            highest = max(highest, distances[id(captured)])
+
+        return ancestors[highest].parent
+
+    def update(self, changed, before):
+        '''Recomputes the masks of the subtree _changed_, whose nodes were _before_, and of its ancestors.'''
+        if changed is None:
+            self.reset()
+            return
+
+        for node in before:
+            self.own.pop(node, None)
+            self.kids.pop(node, None)
+            self.under.pop(node, None)
+        self.scan(changed)
+
+        node = changed.parent
+        while node is not None:
+            if node not in self.own: self.scan(node)
+
+            kids, under = 0, self.own[node]
+            for kid in node:
+                if kid not in self.own: self.scan(kid)
+                kids |= self.own[kid]
+                under |= self.under[kid]
+            self.kids[node], self.under[node] = kids, under
+
+            node = node.parent
+
+PatternSetCacheSize = 16
+# Maps a tuple of (expression, options) pairs to its PatternSet
+pattern_sets = LRUDict(PatternSetCacheSize)
+
+def get_pattern_set(expressions_and_options):
+    '''Returns the PatternSet of the list of pairs (expression, options).'''
+    key = tuple( (expression, tuple(sorted(options.iteritems())))
+                 for (expression, options) in expressions_and_options )
+
+    pattern_set = pattern_sets.get(key)
+    if pattern_set is None:
+        pattern_set = pattern_sets[key] = PatternSet(expressions_and_options)
+    return pattern_set
@@ -12,6 +12,8 @@ from munge.util.deco_utils import cast_to
 from munge.trees.traverse import get_index_of_leaf, get_leaf, leaves, ancestors
 from itertools import islice
 
+import munge.proc.tgrep.structure as structure
+
 def IsParentOf(candidate, node, context):
     if node.is_leaf(): return False
     if node.count() == 1:
@@ -40,15 +42,34 @@ def get_root(node):
     while node.parent: node = node.parent
     return node
 
+def leaves_after(node):
+    '''Returns an iterator over the leaves following the leaf _node_ in its derivation, from left to right.'''
+    if structure.current is not None:
+        successors = structure.current.leaves_after(node)
+        if successors is not None: return successors
+
+    root = get_root(node)
+    node_index = get_index_of_leaf(root, node)
+
+    return islice(leaves(root), node_index+1, None)
+
+def leaves_up_to(node):
+    '''Returns an iterator over the leaves of the derivation of the leaf _node_, from the first up to and including
+_node_.'''
+    if structure.current is not None:
+        predecessors = structure.current.leaves_up_to(node)
+        if predecessors is not None: return predecessors
+
+    root = get_root(node)
+    node_index = get_index_of_leaf(root, node)
+
+    return islice(leaves(root), node_index+1)
+
 def ImmediatelyPrecedes(candidate, node, context):
     if not node.is_leaf(): return False
     
     # does a node which matches 'candidate' occur immediately before _node_?
-    root = get_root(node)
-    
-    node_index = get_index_of_leaf(root, node)
-    
-    successor = get_leaf(root, node_index+1)
+    successor = next(leaves_after(node), None)
     if not successor: return False
     if candidate.is_satisfied_by(successor, context): return True
     
@@ -60,11 +81,7 @@ def ImmediatelyPrecedes(candidate, node, context):
 def Precedes(candidate, node, context):
     if not node.is_leaf(): return False
     
-    root = get_root(node)
-    
-    node_index = get_index_of_leaf(root, node)
-    
-    for successor in islice(leaves(root), node_index+1):
+    for successor in leaves_up_to(node):
         if candidate.is_satisfied_by(successor, context): 
             return True
             
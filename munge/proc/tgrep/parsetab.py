@@ -0,0 +1,65 @@
+
+# parsetab.py
+# This file is automatically generated. Do not edit.
+_tabversion = '3.2'
+
+_lr_method = 'LALR'
+
+_lr_signature = '\x8e\xa3\\{\xa2w5#\xcbI\xfeq\xdb\xba\x9c\x12'
+    
+_lr_action_items = {'CARET':([0,15,27,28,],[18,18,-12,18,]),'REGEX':([0,14,15,18,27,28,],[13,13,13,13,-12,13,]),'GT':([2,3,4,5,6,8,12,13,16,17,19,20,21,26,31,32,33,34,35,36,38,39,41,42,44,45,46,47,48,49,50,51,52,53,],[-16,-18,-32,-17,-33,-31,-36,-34,-15,-19,-4,-5,-11,-6,-20,-21,-35,-29,-30,-28,-24,-25,-23,-3,-9,53,-8,-7,-22,-27,-14,-26,-10,-13,]),'STAR':([0,15,27,28,],[12,12,-12,12,]),'QUOTED':([0,14,15,18,27,28,],[4,34,4,38,-12,4,]),'QUESTION':([1,2,3,4,5,6,7,8,12,13,16,17,19,20,21,22,23,24,25,26,31,32,33,34,35,36,37,38,39,41,42,43,44,46,47,48,49,50,51,52,53,],[22,-16,-18,-32,-17,-33,-1,-31,-36,-34,-15,-19,22,-5,-11,22,22,-2,22,-6,-20,-21,-35,-29,-30,-28,22,-24,-25,-23,-3,22,-9,-8,-7,-22,-27,-14,-26,-10,-13,]),'OP':([1,2,3,4,5,6,7,8,12,13,16,17,19,20,21,22,23,24,25,26,31,32,33,34,35,36,37,38,39,41,42,43,44,46,47,48,49,50,51,52,53,],[27,-16,-18,-32,-17,-33,-1,-31,-36,-34,-15,-19,27,-5,-11,27,27,-2,27,-6,-20,-21,-35,-29,-30,-28,27,-24,-25,-23,-3,27,-9,-8,-7,-22,-27,-14,-26,-10,-13,]),'ATOM':([0,10,11,14,15,18,27,28,29,30,40,],[8,31,32,36,8,41,-12,8,48,49,51,]),'PERCENT':([0,15,27,28,],[9,9,-12,9,]),'EQUAL':([0,2,3,4,5,6,7,8,9,12,13,15,16,17,18,27,28,31,32,33,34,35,36,38,39,41,47,48,49,50,51,],[10,-16,-18,-32,-17,-33,29,-31,30,-36,-34,10,-15,-19,40,-12,10,-20,-21,-35,-29,-30,-28,-24,-25,-23,29,-22,-27,-14,-26,]),'PIPE':([2,3,4,5,6,8,12,13,16,17,19,20,21,26,31,32,33,34,35,36,38,39,41,44,46,47,48,49,50,51,52,53,],[-16,-18,-32,-17,-33,-31,-36,-34,-15,-19,43,-5,-11,-6,-20,-21,-35,-29,-30,-28,-24,-25,-23,43,-8,-7,-22,-27,-14,-26,43,-13,]),'BANG':([1,2,3,4,5,6,7,8,12,13,16,17,19,20,21,22,23,24,25,26,31,32,33,34,35,36,37,38,39,41,42,43,44,46,47,48,49,50,51,52,53,],[25,-16,-18,-32,-17,-33,-1,-31,-36,-34,-15,-19,25,-5,-11,25,25,-2,25,-6,-20,-21,-35,-29,-30,-28,25,-24,-25,-23,-3,25,-9,-8,-7,-22,-27,-14,-26,-10,-13,]),'LT':([1,2,3,4,5,6,7,8,12,13,16,17,19,20,21,22,23,24,25,26,31,32,33,34,35,36,37,38,39,41,42,43,44,46,47,48,49,50,51,52,53,],[23,-16,-18,-32,-17,-33,-1,-31,-36,-34,-15,-19,23,-5,-11,23,23,-2,23,-6,-20,-21,-35,-29,-30,-28,23,-24,-25,-23,-3,23,-9,-8,-7,-22,-27,-14,-26,-10,-13,]),'REGEX_SPEC':([13,],[33,]),'AT':([0,15,27,28,],[14,14,-12,14,]),'LPAREN':([0,15,27,28,],[15,15,-12,15,]),'TILDE':([0,15,27,28,],[11,11,-12,11,]),'RPAREN':([2,3,4,5,6,7,8,12,13,16,17,19,20,21,24,26,31,32,33,34,35,36,37,38,39,41,42,44,46,47,48,49,50,51,52,53,],[-16,-18,-32,-17,-33,-1,-31,-36,-34,-15,-19,-4,-5,-11,-2,-6,-20,-21,-35,-29,-30,-28,50,-24,-25,-23,-3,-9,-8,-7,-22,-27,-14,-26,-10,-13,]),'$end':([1,2,3,4,5,6,7,8,12,13,16,17,19,20,21,24,26,31,32,33,34,35,36,38,39,41,42,44,46,47,48,49,50,51,52,53,],[0,-16,-18,-32,-17,-33,-1,-31,-36,-34,-15,-19,-4,-5,-11,-2,-6,-20,-21,-35,-29,-30,-28,-24,-25,-23,-3,-9,-8,-7,-22,-27,-14,-26,-10,-13,]),'UNARY_OP':([1,2,3,4,5,6,7,8,12,13,16,17,19,20,21,22,23,24,25,26,31,32,33,34,35,36,37,38,39,41,42,43,44,46,47,48,49,50,51,52,53,],[21,-16,-18,-32,-17,-33,-1,-31,-36,-34,-15,-19,21,-5,-11,21,21,-2,21,-6,-20,-21,-35,-29,-30,-28,21,-24,-25,-23,-3,21,-9,-8,-7,-22,-27,-14,-26,-10,-13,]),}
+
+_lr_action = { }
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = { }
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'node':([0,15,],[1,37,]),'regex':([0,15,28,],[2,2,2,]),'star':([0,15,28,],[3,3,3,]),'quoted':([0,15,28,],[5,5,5,]),'constraint_group':([1,19,22,23,25,37,43,],[20,20,20,20,20,20,20,]),'full_regex':([0,14,15,18,28,],[6,35,6,39,6,]),'matcher':([0,15,28,],[7,7,47,]),'constraint':([1,19,22,23,25,37,43,],[19,19,44,19,46,19,52,]),'constraint_list':([1,19,23,37,],[24,42,45,24,]),'unary_op':([1,19,22,23,25,37,43,],[26,26,26,26,26,26,26,]),'atom':([0,15,28,],[16,16,16,]),'group':([0,15,28,],[17,17,17,]),'op':([1,19,22,23,25,37,43,],[28,28,28,28,28,28,28,]),}
+
+_lr_goto = { }
+for _k, _v in _lr_goto_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = { }
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> node","S'",1,None,None,None),
+  ('node -> matcher','node',1,'p_node','munge/proc/tgrep/parse.py',121),
+  ('node -> node constraint_list','node',2,'p_node','munge/proc/tgrep/parse.py',122),
+  ('constraint_list -> constraint constraint_list','constraint_list',2,'p_constraint_list','munge/proc/tgrep/parse.py',132),
+  ('constraint_list -> constraint','constraint_list',1,'p_constraint_list','munge/proc/tgrep/parse.py',133),
+  ('constraint -> constraint_group','constraint',1,'p_constraint','munge/proc/tgrep/parse.py',142),
+  ('constraint -> unary_op','constraint',1,'p_constraint','munge/proc/tgrep/parse.py',143),
+  ('constraint -> op matcher','constraint',2,'p_constraint','munge/proc/tgrep/parse.py',144),
+  ('constraint -> BANG constraint','constraint',2,'p_constraint','munge/proc/tgrep/parse.py',145),
+  ('constraint -> QUESTION constraint','constraint',2,'p_constraint','munge/proc/tgrep/parse.py',146),
+  ('constraint -> constraint PIPE constraint','constraint',3,'p_constraint','munge/proc/tgrep/parse.py',147),
+  ('unary_op -> UNARY_OP','unary_op',1,'p_unary_op','munge/proc/tgrep/parse.py',164),
+  ('op -> OP','op',1,'p_op','munge/proc/tgrep/parse.py',170),
+  ('constraint_group -> LT constraint_list GT','constraint_group',3,'p_constraint_group','munge/proc/tgrep/parse.py',176),
+  ('group -> LPAREN node RPAREN','group',3,'p_group','munge/proc/tgrep/parse.py',182),
+  ('matcher -> atom','matcher',1,'p_matcher','munge/proc/tgrep/parse.py',188),
+  ('matcher -> regex','matcher',1,'p_matcher','munge/proc/tgrep/parse.py',189),
+  ('matcher -> quoted','matcher',1,'p_matcher','munge/proc/tgrep/parse.py',190),
+  ('matcher -> star','matcher',1,'p_matcher','munge/proc/tgrep/parse.py',191),
+  ('matcher -> group','matcher',1,'p_matcher','munge/proc/tgrep/parse.py',192),
+  ('matcher -> EQUAL ATOM','matcher',2,'p_matcher','munge/proc/tgrep/parse.py',193),
+  ('matcher -> TILDE ATOM','matcher',2,'p_matcher','munge/proc/tgrep/parse.py',194),
+  ('matcher -> matcher EQUAL ATOM','matcher',3,'p_matcher','munge/proc/tgrep/parse.py',195),
+  ('matcher -> CARET ATOM','matcher',2,'p_matcher','munge/proc/tgrep/parse.py',196),
+  ('matcher -> CARET QUOTED','matcher',2,'p_matcher','munge/proc/tgrep/parse.py',197),
+  ('matcher -> CARET full_regex','matcher',2,'p_matcher','munge/proc/tgrep/parse.py',198),
+  ('matcher -> CARET EQUAL ATOM','matcher',3,'p_matcher','munge/proc/tgrep/parse.py',199),
+  ('matcher -> PERCENT EQUAL ATOM','matcher',3,'p_matcher','munge/proc/tgrep/parse.py',200),
+  ('matcher -> AT ATOM','matcher',2,'p_matcher','munge/proc/tgrep/parse.py',201),
+  ('matcher -> AT QUOTED','matcher',2,'p_matcher','munge/proc/tgrep/parse.py',202),
+  ('matcher -> AT full_regex','matcher',2,'p_matcher','munge/proc/tgrep/parse.py',203),
+  ('atom -> ATOM','atom',1,'p_atom','munge/proc/tgrep/parse.py',242),
+  ('quoted -> QUOTED','quoted',1,'p_quoted','munge/proc/tgrep/parse.py',248),
+  ('regex -> full_regex','regex',1,'p_regex','munge/proc/tgrep/parse.py',254),
+  ('full_regex -> REGEX','full_regex',1,'p_full_regex','munge/proc/tgrep/parse.py',261),
+  ('full_regex -> REGEX REGEX_SPEC','full_regex',2,'p_full_regex','munge/proc/tgrep/parse.py',262),
+  ('star -> STAR','star',1,'p_star','munge/proc/tgrep/parse.py',286),
+]
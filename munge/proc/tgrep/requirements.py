@@ -0,0 +1,183 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+'''The requirements of a tgrep expression are conditions which a derivation must meet for the expression to
+match any of its nodes: each requirement is that some node of the derivation has a label (such as its category,
+its lexical item, or the categories of its parent and itself) satisfying a given test. Requirements are taken
+from the anchor of the expression and from the arguments of its positive constraints, so a derivation which
+fails a requirement can be skipped without evaluating the expression against any of its nodes.
+
+A requirement is represented as a pair (key, (label, test, literal)). _label_ is one of the label functions
+below, and _test_ is true of those labels which satisfy the requirement. If _literal_ is not None, it is the
+only label which satisfies the requirement. Requirements with equal keys are equivalent.'''
+
+import re
+
+from munge.proc.tgrep.nodes import *
+
+# The labels of a node which requirements test. A node without a given label yields None.
+def cat_label(node):
+    return str(node.cat)
+def category_label(node):
+    # (nodes of CCGbank derivations have no category distinct from their cat)
+    return str(node.category) if hasattr(node, 'category') else None
+def lex_label(node):
+    return node.lex if node.is_leaf() else None
+def cat_pair_label(node):
+    return (str(node.parent.cat), str(node.cat)) if node.parent is not None else None
+
+Labels = (cat_label, category_label, lex_label, cat_pair_label)
+
+# Operators whose constraints can only be satisfied if their argument matches some node of the derivation
+RequiringOperators = frozenset(('<', '<<', '<1', '<2', '>', '>>', '.', '..', '$', '&', '<#', '<<#'))
+# Operators whose argument must match a child of the node, and those whose argument must match its parent
+ChildOperators = frozenset(('<', '<1', '<2', '<#'))
+ParentOperators = frozenset(('>',))
+NthChildOperatorRegex = re.compile(r'<\d+$')
+
+def requirement_for(expr):
+    '''Returns the requirement (key, (label, test, literal)) that some node matches the atom _expr_, or None if
+_expr_ is not an atom of a kind with requirements.'''
+    if isinstance(expr, REValue):
+        match, decode = expr.match_method, expr.unicode
+        key = (type(expr), expr.source, match == expr.regex.match, decode)
+
+        if isinstance(expr, RELex):
+            label = lex_label
+            test = lambda lex: lex is not None and match(lex.decode('u8') if decode else lex) is not None
+        elif isinstance(expr, RECat):
+            label = category_label
+            test = lambda cat: cat is not None and match(cat) is not None
+        elif isinstance(expr, RE):
+            label = cat_label
+            test = lambda cat: match(cat) is not None
+        else:
+            return None
+
+        return key, (label, test, None)
+
+    elif isinstance(expr, Atom):
+        return (Atom, expr.value), (cat_label, expr.value.__eq__, expr.value)
+    elif isinstance(expr, MatchLex):
+        return (MatchLex, expr.lex_to_match), (lex_label, expr.lex_to_match.__eq__, expr.lex_to_match)
+    elif isinstance(expr, MatchCat):
+        return (MatchCat, expr.cat_to_match), (category_label, expr.cat_to_match.__eq__, expr.cat_to_match)
+
+    return None
+
+def anchor_requirement(expr):
+    '''Returns the requirement that some node matches the anchor of _expr_, or None.'''
+    if isinstance(expr, Node):
+        return anchor_requirement(expr.anchor)
+    elif isinstance(expr, Group):
+        return anchor_requirement(expr.node)
+    elif isinstance(expr, StoreAtom):
+        return anchor_requirement(expr.atom)
+    return requirement_for(expr)
+
+def pair_requirement(parent, child):
+    '''Returns the requirement that some node satisfying the cat requirement _child_ has a parent satisfying
+the cat requirement _parent_, or None if either is not a requirement on cats.'''
+    if parent is None or child is None: return None
+
+    (parent_key, (parent_label, parent_test, parent_literal)) = parent
+    (child_key, (child_label, child_test, child_literal)) = child
+    if not (parent_label is cat_label and child_label is cat_label): return None
+
+    literal = None
+    if parent_literal is not None and child_literal is not None:
+        literal = (parent_literal, child_literal)
+
+    test = lambda pair: pair is not None and parent_test(pair[0]) and child_test(pair[1])
+    return (cat_pair_label, parent_key, child_key), (cat_pair_label, test, literal)
+
+def add_requirement(requirement, requirements):
+    if requirement is not None:
+        key, value = requirement
+        requirements[key] = value
+
+def add_requirements(expr, requirements, anchor=None):
+    '''Adds the requirements of _expr_ to _requirements_. _anchor_ is the requirement of the anchor of the node
+to which _expr_ is a constraint, if any.'''
+    if isinstance(expr, Node):
+        anchor = anchor_requirement(expr.anchor)
+        add_requirement(anchor, requirements)
+        for constraint in expr.constraints:
+            add_requirements(constraint, requirements, anchor)
+
+    elif isinstance(expr, Constraint):
+        operator = expr.operator
+        if expr.rhs is not None and (operator in RequiringOperators or NthChildOperatorRegex.match(operator)):
+            add_requirements(expr.rhs, requirements)
+
+            if operator in ChildOperators or NthChildOperatorRegex.match(operator):
+                add_requirement(pair_requirement(anchor, anchor_requirement(expr.rhs)), requirements)
+            elif operator in ParentOperators:
+                add_requirement(pair_requirement(anchor_requirement(expr.rhs), anchor), requirements)
+
+    elif isinstance(expr, ConstraintGroup):
+        for constraint in expr.constraints:
+            add_requirements(constraint, requirements, anchor)
+
+    elif isinstance(expr, Group):
+        add_requirements(expr.node, requirements)
+
+    elif isinstance(expr, StoreAtom):
+        add_requirements(expr.atom, requirements)
+
+    else:
+        # Negations, alternations and reluctant constraints require nothing, nor do atoms which match any
+        # node (*) or which depend on the context (=X)
+        add_requirement(requirement_for(expr), requirements)
+
+def compile_requirements(expr):
+    '''Returns the requirements of the parsed expression _expr_, as a dict mapping each key to its
+(label, test, literal).'''
+    requirements = {}
+    add_requirements(expr, requirements)
+    return requirements
+
+# The atoms of a category string, and the substrings between its slashes and brackets
+CategoryPiecesRegex = re.compile(r'[^()/\\|]+')
+
+def required_substrings(requirements):
+    '''Returns a set of strings, each of which must occur in the text of any derivation which satisfies
+_requirements_. Only literal category and lexical item requirements contribute: a lexical item appears verbatim
+in the text of a derivation, as do the atoms (with their features) of each category, although the bracketing
+of a category in the text may differ from its canonical form.'''
+    substrings = set()
+    for label, test, literal in requirements.itervalues():
+        if literal is None: continue
+
+        if label is lex_label:
+            substrings.add(literal)
+        elif label is cat_label or label is category_label:
+            # a node without a category has the label 'None', which does not appear in the text
+            if label is category_label and literal == 'None': continue
+            substrings.update(CategoryPiecesRegex.findall(literal))
+
+    return substrings
+
+def is_satisfied(test, literal, labels):
+    '''Returns whether the requirement (test, literal) holds of a derivation with the set of labels _labels_.'''
+    if literal is not None: return literal in labels
+    return any(test(label) for label in labels)
+
+def satisfied_requirements(deriv, requirements):
+    '''Returns the set of keys of those _requirements_ which hold of _deriv_, with a single traversal of _deriv_.'''
+    label_functions = set(label for (label, test, literal) in requirements.itervalues())
+
+    labels = dict( (label, set()) for label in label_functions )
+    for node in nodes(deriv):
+        for label in label_functions:
+            labels[label].add(label(node))
+
+    # each requirement is tested against the distinct labels of the derivation, not against each node
+    return set(key for (key, (label, test, literal)) in requirements.iteritems()
+                   if is_satisfied(test, literal, labels[label]))
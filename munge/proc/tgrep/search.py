@@ -0,0 +1,168 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+'''Corpus-wide tgrep searches which can be spread over worker processes, and which can stop early.
+
+Each document is searched by a single worker, which returns the output for each of its matches (or, when only
+counting, just the number of matching derivations) to the parent. The parent writes the output of each document
+in corpus order as soon as all preceding documents are done, skipping the first _offset_ matches, and stops all
+workers once _max_matches_ matches have been written.'''
+
+import sys
+import multiprocessing
+import traceback
+from cStringIO import StringIO
+from itertools import imap
+
+from munge.io.multi import DirFileGuessReader
+from munge.proc.tgrep.tgrep import Tgrep, TgrepCount
+from munge.util.err_utils import err
+
+class SearchOptions(object):
+    '''The options of a search which are passed to each worker.'''
+    def __init__(self, expression, find_mode=Tgrep.FIND_FIRST, show_mode='node', caption_modes=None,
+                 count_only=False, limit=None, reader_args=None):
+        self.expression = expression
+        self.find_mode, self.show_mode, self.caption_modes = find_mode, show_mode, caption_modes
+        # If true, only the number of matching derivations is determined, and no output is built
+        self.count_only = count_only
+        # The maximum number of matches needed from any one document, or None for all of them
+        self.limit = limit
+        self.reader_args = reader_args or {}
+
+class DocumentResult(object):
+    '''The result of searching a single document: the number of derivations matched and searched, the output
+of each match (unless only counting), and a (derivation label, formatted traceback) pair for each derivation
+whose search failed.'''
+    def __init__(self):
+        self.nmatched = self.total = 0
+        self.outputs = []
+        self.reports = []
+
+def capture_output(action):
+    '''Returns what _action_ writes to stdout.'''
+    old_stdout, sys.stdout = sys.stdout, StringIO()
+    try:
+        action()
+        return sys.stdout.getvalue()
+    finally:
+        sys.stdout = old_stdout
+
+def search_document(doc_path, options):
+    '''Searches the document _doc_path_, returning a DocumentResult.'''
+    result = DocumentResult()
+
+    if options.count_only:
+        tgrep_filter = TgrepCount(options.expression)
+    else:
+        tgrep_filter = Tgrep(options.expression, find_mode=options.find_mode, show_mode=options.show_mode,
+                             caption_modes=options.caption_modes)
+
+    for bundle in DirFileGuessReader(doc_path, verbose=False, **options.reader_args):
+        try:
+            if options.count_only:
+                tgrep_filter.accept_derivation(bundle)
+            else:
+                matched = False
+                for match_node, context in tgrep_filter.matches(bundle):
+                    result.outputs.append(capture_output(
+                        lambda: tgrep_filter.show_match(match_node, bundle, context)))
+                    matched = True
+
+                    if options.limit is not None and len(result.outputs) >= options.limit: break
+
+                if matched: tgrep_filter.nmatched += 1
+                tgrep_filter.total += 1
+
+        except Exception, e:
+            result.reports.append( (bundle.label(), traceback.format_exc()) )
+
+        if options.limit is not None and len(result.outputs) >= options.limit: break
+
+    if options.count_only:
+        result.nmatched, result.total = tgrep_filter.count, tgrep_filter.total
+    else:
+        result.nmatched, result.total = tgrep_filter.nmatched, tgrep_filter.total
+    return result
+
+def _search_document_in_worker(args):
+    return search_document(*args)
+
+class SearchSummary(object):
+    '''The outcome of a search: the number of derivations matched and searched, the number of matches written,
+and whether every document was searched.'''
+    def __init__(self, nmatched, total, nshown, complete):
+        self.nmatched, self.total, self.nshown, self.complete = nmatched, total, nshown, complete
+
+    def __str__(self):
+        if self.complete:
+            deriv_percentage = 0 if self.total == 0 else self.nmatched/float(self.total)*100.0
+            return "matches: %d/%d derivs = %.2f%%" % (self.nmatched, self.total, deriv_percentage)
+        return "matches: stopped after %d shown (%d derivs searched)" % (self.nshown, self.total)
+
+def document_paths(files):
+    for file in files:
+        for doc_path in DirFileGuessReader(file, verbose=False).document_paths():
+            yield doc_path
+
+def search(expression, files, jobs=1, offset=0, max_matches=None, count_only=False,
+           find_mode=Tgrep.FIND_FIRST, show_mode='node', caption_modes=None, reader_args=None, out=None):
+    '''Searches the documents under _files_ for _expression_ with _jobs_ worker processes, writing the output of
+each match after the first _offset_ to _out_ (by default, stdout) in corpus order, and stopping once
+_max_matches_ matches have been written. If _count_only_ is true, only the matching derivations are counted.
+Returns a SearchSummary.'''
+    if out is None: out = sys.stdout
+
+    limit = None if (count_only or max_matches is None) else offset + max_matches
+    options = SearchOptions(expression, find_mode, show_mode, caption_modes, count_only, limit, reader_args)
+    units = ( (doc_path, options) for doc_path in document_paths(files) )
+
+    pool = None
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs)
+        # each document is returned as soon as it and all those before it are done
+        results = pool.imap(_search_document_in_worker, units)
+    else:
+        results = imap(_search_document_in_worker, units)
+
+    nmatched = total = nskipped = nshown = 0
+    complete = True
+    try:
+        for doc_result in results:
+            for label, exception in doc_result.reports:
+                err("Processing failed on derivation %s:", label)
+                sys.stderr.write(exception)
+
+            nmatched += doc_result.nmatched
+            total += doc_result.total
+
+            for output in doc_result.outputs:
+                if nskipped < offset:
+                    nskipped += 1
+                    continue
+
+                out.write(output)
+                nshown += 1
+                if max_matches is not None and nshown >= max_matches:
+                    complete = False
+                    break
+
+            if not complete: break
+
+        if pool: pool.close()
+    except:
+        if pool: pool.terminate()
+        raise
+    finally:
+        if pool:
+            # the remaining documents are not needed once enough matches have been written
+            if not complete: pool.terminate()
+            pool.join()
+
+    return SearchSummary(nmatched, total, nshown, complete)
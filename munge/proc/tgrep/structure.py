@@ -0,0 +1,69 @@
+# Chinese CCGbank conversion
+# ==========================
+# (c) 2008-2012 Daniel Tse <cncandc@gmail.com>
+# University of Sydney
+
+# Use of this software is governed by the attached "Chinese CCGbank converter Licence Agreement"
+# supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
+# notify the maintainer Daniel Tse <cncandc@gmail.com>.
+
+'''A per-derivation index of the positions of its leaves, which lets the tgrep precedence operators (. and ..)
+find the leaves following a given leaf without climbing to the root and scanning the leaves of the derivation
+each time they are evaluated.
+
+While tgrep evaluates a query against a node of a derivation, _current_ is the index of that derivation. The index
+always covers the whole derivation, even when tgrep is given only a subtree of it, since the precedence operators
+look beyond the subtree just as they do without an index.
+The index is only built once an operator needs it, and tgrep invalidates it whenever control passes to the
+caller (who may modify the derivation, as the callbacks of Fix do) so that it is rebuilt on next use.
+Operators evaluated outside tgrep, or against nodes the index does not contain, scan the derivation instead.'''
+
+from itertools import islice
+
+from munge.trees.traverse import leaves
+
+class StructureIndex(object):
+    '''Lazily indexes the derivation containing _node_ by the position of each of its leaves.'''
+    def __init__(self, node):
+        self.node = node
+        self.invalidate()
+
+    def invalidate(self):
+        '''Discards the index, which is rebuilt the next time it is needed.'''
+        # each leaf, from left to right
+        self.leaves = None
+        # maps id(leaf) to its position in self.leaves
+        self.leaf_indices = None
+
+    def build(self):
+        # the root is found afresh each time, since the caller may have grafted the derivation onto another
+        root = self.node
+        while root.parent: root = root.parent
+
+        # the index holds a reference to each leaf it contains, so the ids of its leaves cannot be reused
+        self.leaves = list(leaves(root))
+        self.leaf_indices = dict( (id(leaf), index) for (index, leaf) in enumerate(self.leaves) )
+
+    def leaf_index(self, node):
+        '''Returns the position of the leaf _node_ in the derivation, or None if _node_ is not in the index.'''
+        if self.leaves is None: self.build()
+        return self.leaf_indices.get(id(node), None)
+
+    def leaves_after(self, node):
+        '''Returns an iterator over the leaves following the leaf _node_, from left to right, or None if _node_
+is not in the index.'''
+        index = self.leaf_index(node)
+        if index is None: return None
+
+        return islice(self.leaves, index+1, None)
+
+    def leaves_up_to(self, node):
+        '''Returns an iterator over the leaves from the first up to and including the leaf _node_, or None if
+_node_ is not in the index.'''
+        index = self.leaf_index(node)
+        if index is None: return None
+
+        return islice(self.leaves, index+1)
+
+# The index of the derivation against which tgrep is evaluating a query, if any.
+current = None
@@ -7,6 +7,7 @@
 # supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
 # notify the maintainer Daniel Tse <cncandc@gmail.com>.
 
+import os
 import sys
 try:
     import ply.lex as lex
@@ -16,13 +17,18 @@ except ImportError:
 
 import munge.proc.tgrep.parse as parse
 from munge.proc.tgrep.nodes import Context
+from munge.proc.tgrep.compiler import compile_query
+from munge.proc.tgrep.requirements import compile_requirements, satisfied_requirements, required_substrings
+from munge.proc.tgrep.structure import StructureIndex
+import munge.proc.tgrep.structure as structure
+from munge.proc.tgrep.index import may_match
 from munge.trees.traverse import nodes, leaves, nodes_reversed, tag_and_lex, tag_and_text_under, lrp_repr
 
 from munge.trees.pprint import pprint
 from munge.trees.synttree import pprint_synttree
 
 from munge.util.iter_utils import take, single, intersperse
-from munge.util.dict_utils import smash_key_case
+from munge.util.dict_utils import smash_key_case, LRUDict
 from munge.util.err_utils import debug, info
 from munge.util.func_utils import compose, chain_actions
 from munge.util.iter_utils import take
@@ -39,39 +45,118 @@ use_colour = config.use_colour
 _tgrep_debug = False
 _tgrep_initialised = False
 
+# The parser tables are shipped pregenerated (as parsetab.py, alongside parse.py). PLY checks them against
+# the grammar in parse.py, and regenerates them only if the grammar has changed.
+TablesModule = 'munge.proc.tgrep.parsetab'
+TablesDir = os.path.dirname(os.path.abspath(parse.__file__))
+
+_lexer = None
+
 def initialise():
     '''Performs lazy initialisation of the lexer and parser. Once called, further calls are no-ops.'''
-    global _tgrep_initialised
+    global _tgrep_initialised, _lexer
     
     if not _tgrep_initialised:
-        lex.lex(module=parse)
-        yacc.yacc(module=parse)
+        _lexer = lex.lex(module=parse)
+        yacc.yacc(module=parse, tabmodule=TablesModule, outputdir=TablesDir, debug=0)
     
         _tgrep_initialised = True
+        
+def lex_query(expression):
+    '''Returns the list of tokens of the tgrep expression _expression_.'''
+    initialise()
+    
+    _lexer.input(expression)
+    tokens = list(iter(_lexer.token, None))
+    
+    if _tgrep_debug:
+        debug("Lexing %s", expression)
+        for tok in tokens:
+            debug("%s %s", tok.type, tok.value)
+            
+    return tokens
+    
+def parse_tokens(tokens):
+    '''Parses the tokens of a tgrep expression, returning its parsed form.'''
+    remaining = iter(tokens)
+    return yacc.parse(lexer=_lexer, tokenfunc=lambda: next(remaining, None))
+
+def parse_query(expression):
+    '''Parses the tgrep expression _expression_, returning its parsed form.'''
+    return parse_tokens(lex_query(expression))
+    
+def canonical_form(tokens):
+    '''Returns a key for the tokens of a tgrep expression, equal for any expressions which differ only in
+whitespace.'''
+    return tuple( (tok.type, tok.value) for tok in tokens )
+
+QueryCacheSize = 256
+# Maps the canonical form of each recently used expression to its compiled form (see munge.proc.tgrep.compiler),
+# its requirements and its required substrings. The expression itself is also mapped to the same triple, which spares the lexing needed to
+# find the canonical form of an expression when the same string is queried repeatedly.
+canonical_cache = LRUDict(QueryCacheSize)
+expression_cache = LRUDict(QueryCacheSize)
+
+def get_compiled(expression):
+    '''Returns the triple (compiled form, requirements, required substrings) of the tgrep expression _expression_.'''
+    compiled = expression_cache.get(expression)
+    if compiled is None:
+        tokens = lex_query(expression)
+        
+        key = canonical_form(tokens)
+        compiled = canonical_cache.get(key)
+        if compiled is None:
+            parsed = parse_tokens(tokens)
+            requirements = compile_requirements(parsed)
+            compiled = canonical_cache[key] = (compile_query(parsed), requirements,
+                                               required_substrings(requirements))
+            
+        expression_cache[expression] = compiled
+    return compiled
 
-# quick and dirty memoisation. This is based on the exact string expression, so
-# semantically identical expressions with trivial differences such as whitespace
-# will not be considered identical
-expression_cache = {}
+def get_query(expression):
+    '''Returns the compiled form of the tgrep expression _expression_.'''
+    return get_compiled(expression)[0]
+    
+def get_requirements(expression):
+    '''Returns the requirements of the tgrep expression _expression_ (see munge.proc.tgrep.requirements).'''
+    return get_compiled(expression)[1]
+    
+def get_substrings(expression):
+    '''Returns the strings which must occur in the text of any derivation matching _expression_.'''
+    return get_compiled(expression)[2]
+    
+def may_match_text(bundle, expression):
+    '''Returns False if the text of the unparsed derivation _bundle_ shows that it cannot match _expression_,
+and True otherwise. This spares parsing derivations which lack the categories and lexical items of a query.'''
+    # (bundles of other kinds are always parsed)
+    if not hasattr(bundle, 'is_parsed') or bundle.is_parsed(): return True
+    
+    text = bundle.raw_text()
+    for substring in get_substrings(expression):
+        if substring not in text: return False
+    return True
+    
+def is_candidate(bundle, expression):
+    '''Returns whether the derivation _bundle_ may match _expression_, consulting the index of its document
+and then its text, without parsing it.'''
+    return may_match(bundle, expression) and may_match_text(bundle, expression)
+    
+def evaluate_with_index(query, node, context, index):
+    '''Evaluates _query_ against _node_, with _index_ available to the operators which use it.'''
+    previous, structure.current = structure.current, index
+    try:
+        return query(node, context)
+    finally:
+        structure.current = previous
+    
 def tgrep(deriv, expression, with_context=False, nonrecursive=False, left_to_right=False):
     '''Performs the given tgrep query on the given tree. If _with_context_ is True, each matched node
 yields a pair (node, context), and captured nodes are accessible by name using the dict-like context.
 If the user wants to keep context around, a copy must be made.'''
     if not expression: raise RuntimeError('No query expression given.')
 
-    query = expression_cache.get(expression, None)
-        
-    if query is None:
-        initialise()
-            
-        if _tgrep_debug:
-            debug("Lexing %s", expression)
-            lex.input(expression)
-            for tok in iter(lex.token, None):
-                debug("%s %s", tok.type, tok.value)
-
-        query = yacc.parse(expression)
-        expression_cache[expression] = query
+    query = get_query(expression)
     
     # Default traversal method is right to left
     traversal_method = (single if nonrecursive  else 
@@ -79,35 +164,35 @@ If the user wants to keep context around, a copy must be made.'''
                         nodes_reversed)
                         
     context = Context()
+    index = StructureIndex(deriv)
     for node in traversal_method(deriv):
         context.clear()
         
-        if query.is_satisfied_by(node, context):
+        if evaluate_with_index(query, node, context, index):
             if _tgrep_debug: debug("%s matched %s", lrp_repr(node), query)
             if with_context:
                 yield node, context
             else: yield node
             
+            # the caller may have modified the derivation
+            index.invalidate()
+            
 def multi_tgrep(deriv, query_callback_map):
     if not query_callback_map: raise RuntimeError('No query expressions given.')
-    initialise()
-    
-    if _tgrep_debug:
-        for expression in query_callback_map.keys():
-            debug("Lexing %s", expression)
-            lex.input(expression)
-            for tok in iter(lex.token, None):
-                debug("\t%s %s", tok.type, tok.value)
     
-    queries = [yacc.parse(expression) for expression in query_callback_map.keys()]
+    queries_and_callbacks = [ (get_query(expression), callback)
+                              for (expression, callback) in query_callback_map.iteritems() ]
+    index = StructureIndex(deriv)
     for node in nodes(deriv):
-        for query_expr, query_str in izip(queries, query_callback_map.keys()):
+        for query, callback in queries_and_callbacks:
             context = Context()
-            if query_expr.is_satisfied_by(node, context):
+            if evaluate_with_index(query, node, context, index):
                 if context:
-                    query_callback_map[query_str](node, **smash_key_case(context))
+                    callback(node, **smash_key_case(context))
                 else:
-                    query_callback_map[query_str](node)
+                    callback(node)
+                    
+                index.invalidate()
     
 find_all = tgrep
 find_first = compose(curry(take, 1), find_all)
@@ -155,7 +240,9 @@ class TgrepCount(Filter):
         self.total = 0
         
     def accept_derivation(self, bundle):
-        if list(find_first(bundle.derivation, self.expression)): self.count += 1
+        # derivations which cannot match are counted without being parsed
+        if is_candidate(bundle, self.expression) and list(find_first(bundle.derivation, self.expression)):
+            self.count += 1
         self.total += 1
         
     def output(self):
@@ -185,18 +272,29 @@ class TgrepCore(Filter):
     match_callback = _not_implemented
     caption_generator = _not_implemented
         
-    def accept_derivation(self, derivation_bundle):
-        matched = False
+    def matches(self, derivation_bundle):
+        '''Yields a pair (node, context) for each match of the query in _derivation_bundle_.'''
+        if not is_candidate(derivation_bundle, self.expression): return
         
         for match_node, context in self.match_generator(derivation_bundle.derivation, self.expression, with_context=True):
-            if use_colour: sys.stdout.write(codes['bold'])
-            self.caption_generator(derivation_bundle)
-            if use_colour: sys.stdout.write(codes['reset'])
+            yield match_node, context
             
-            if hasattr(self, 'match_callback_with_context'):
-                self.match_callback_with_context(match_node, derivation_bundle, context)
-            else:
-                self.match_callback(match_node, derivation_bundle)
+    def show_match(self, match_node, derivation_bundle, context):
+        '''Prints the caption and the output for a single match.'''
+        if use_colour: sys.stdout.write(codes['bold'])
+        self.caption_generator(derivation_bundle)
+        if use_colour: sys.stdout.write(codes['reset'])
+        
+        if hasattr(self, 'match_callback_with_context'):
+            self.match_callback_with_context(match_node, derivation_bundle, context)
+        else:
+            self.match_callback(match_node, derivation_bundle)
+        
+    def accept_derivation(self, derivation_bundle):
+        matched = False
+        
+        for match_node, context in self.matches(derivation_bundle):
+            self.show_match(match_node, derivation_bundle, context)
             if not matched: matched = True
             
         if matched:
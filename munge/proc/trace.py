@@ -18,7 +18,8 @@ from munge.util.config import config
     
 BuiltInPackages = ['munge.proc.builtins', 
                    'munge.proc.tgrep.tgrep', 
-                   'apps.cn.tag', 'apps.cn.binarise', 'apps.cn.catlab']
+                   'apps.cn.tag', 'apps.cn.binarise', 'apps.cn.catlab',
+                   'apps.cn.pipeline']
 
 def run_builtin_filter(option, opt_string, value, parser, *args, **kwargs):
     filter_class_name = args[0]
@@ -103,6 +104,13 @@ def register_builtin_switches(parser):
     group.add_option("-R", "--reader-class", help="Forces the use of a given Reader class.",
                       dest='reader_class_name', metavar='CLS')
 
+    group.add_option("-j", "--jobs", help="Distributes documents over N worker processes.", type='int',
+                      dest='jobs', metavar='N', default=1)
+    group.add_option("--save-state", help="Saves the state of each filter to FILE before output.",
+                      dest='save_state_file', metavar='FILE')
+    group.add_option("--merge-state", help="Merges filter states saved by --save-state before output.",
+                      action='append', dest='merge_state_files', metavar='FILE', default=[])
+
     group.add_option("-0", "--end", help="Dummy option to separate -r arguments from input arguments.", 
                       action='store_true')
     
@@ -195,6 +203,9 @@ def main(argv):
     # Set verbose switch if given on command line
     tracer.verbose = opts.verbose
     tracer.break_on_exception = opts.break_on_exception
+    tracer.jobs = opts.jobs
+    tracer.save_state_file = opts.save_state_file
+    tracer.merge_state_files = opts.merge_state_files
     
     # Set override Reader if given on command line
     tracer.reader_class_name = opts.reader_class_name
@@ -11,30 +11,43 @@ import sys
 import os
 import errno
 import re
+import multiprocessing
+import cPickle as pickle
+from cStringIO import StringIO
+from itertools import izip
 
 from munge.io.guess import GuessReader
 from munge.io.multi import DirFileGuessReader
 from munge.penn.io import AugmentedPTBReader, CategoryPTBReader
 from munge.penn.prefaced_io import PrefacedPTBReader
 from munge.cptb.io import CPTBHeadlineReader
+from munge.ccg.io import FastCCGbankReader
 from munge.io.paired import PairedReader
 
 from munge.trees.traverse import leaves
 from munge.cats.paths import applications_per_slash
+from munge.proc.filter import Filter
 from munge.proc.dynload import (get_available_filters_dict,
                                 load_requested_packages,
                                 get_argcount_for_method)
 from munge.util.err_utils import warn, info, err, muzzle
 from munge.util.exceptions import FilterException
+from munge.util.str_utils import padded_rsplit
 
 class TraceCore(object):
     '''Implements filter loading functionality and the document processing loop.'''
-    def __init__(self, libraries, verbose=True, break_on_exception=False, reader_class_name=None):
+    def __init__(self, libraries, verbose=True, break_on_exception=False, reader_class_name=None, jobs=1):
         self.loaded_modules = set(load_requested_packages(libraries))
         self.update_available_filters_dict()
         
         self.verbose = verbose
         self.reader_class_name = reader_class_name
+        # The number of worker processes over which documents are distributed
+        self.jobs = jobs
+        # Files containing filter states to be merged in before output, and the file to which the final
+        # filter states are to be saved
+        self.merge_state_files = []
+        self.save_state_file = None
         
         self.last_exceptions = []
         self._break_on_exception = break_on_exception
@@ -161,10 +174,8 @@ phase/sec:doc(deriv) to full PCTB paths.'''
             return fn
         return (transform_element(fn) for fn in files)
 
-    def run_filters(self, filters, files):
-        # If all given filters were not found or had wrong argument count, do nothing
-        if not filters: return
-        
+    def reader_args(self):
+        '''Returns the keyword arguments with which each document reader is constructed.'''
         reader_args = {}
         if self.reader_class_name:
             try:
@@ -174,67 +185,291 @@ phase/sec:doc(deriv) to full PCTB paths.'''
                 reader_args['reader_class'] = reader_class
             except KeyError:
                 raise RuntimeError("Reader class %s not found." % self.reader_class_name)
-        
-        for file in self.transform(files):
-            if self.is_pair_spec(file):
-                meta_reader = PairedReader
-            else:
-                meta_reader = DirFileGuessReader
                 
+        return reader_args
+        
+    def process_file(self, filters, file, reader_args):
+        '''Runs each of _filters_ over every derivation found under the file specifier _file_. Exceptions
+raised by filters are collected in _last_exceptions_, and a FilterException is raised if there were any.
+Returns False if processing should stop altogether.'''
+        if self.is_pair_spec(file):
+            meta_reader = PairedReader
+        else:
+            meta_reader = DirFileGuessReader
+            
+        self.last_exceptions = []
+        
+        for derivation_bundle in meta_reader(file, verbose=self.verbose, **reader_args):
+            if self.verbose: info("Processing %s...", derivation_bundle.label())
             try:
-                self.last_exceptions = []
-                
-                for derivation_bundle in meta_reader(file, verbose=self.verbose, **reader_args):
-                    if self.verbose: info("Processing %s...", derivation_bundle.label())
-                    try:
-                        for filter in filters:
-                            filter.context = derivation_bundle
+                for filter in filters:
+                    filter.context = derivation_bundle
 
-                        if filter.accept_leaf is not None:
-                            for leaf in leaves(derivation_bundle.derivation):
-                                for filter in filters:
-                                    filter.accept_leaf(leaf)
+                if filter.accept_leaf is not None:
+                    for leaf in leaves(derivation_bundle.derivation):
+                        for filter in filters:
+                            filter.accept_leaf(leaf)
 
-                                    if filter.accept_comb_and_slash_index is not None:
-                                        try:
-                                            for slash_index, comb in enumerate(applications_per_slash(leaf)):
-                                                filter.accept_comb_and_slash_index(leaf, comb, slash_index)
-                                        except AttributeError: # TODO: hacky and inefficient, need this to work for PTB too
-                                            pass
+                            if filter.accept_comb_and_slash_index is not None:
+                                try:
+                                    for slash_index, comb in enumerate(applications_per_slash(leaf)):
+                                        filter.accept_comb_and_slash_index(leaf, comb, slash_index)
+                                except AttributeError: # TODO: hacky and inefficient, need this to work for PTB too
+                                    pass
 
-                        for filter in filters:
-                            filter.accept_derivation(derivation_bundle)
-                            filter.context = None
-                            
-                    except IOError, e:
-                        # If output is going to a pager, and the user requests an interrupt (^C)
-                        # the filter fails with IOError: Broken pipe
-                        # In that case, running filters on further derivations will continue to
-                        # lead to 'Broken pipe', so just bail out
-                        if e.errno == errno.EPIPE: return
-                            
-                    except Exception, e:
-                        self.last_exceptions.append( (derivation_bundle, sys.exc_info()) )
-                        
-                        if self._break_on_exception:
-                            raise FilterException(e, None)
+                for filter in filters:
+                    filter.accept_derivation(derivation_bundle)
+                    filter.context = None
+                    
+            except IOError, e:
+                # If output is going to a pager, and the user requests an interrupt (^C)
+                # the filter fails with IOError: Broken pipe
+                # In that case, running filters on further derivations will continue to
+                # lead to 'Broken pipe', so just bail out
+                if e.errno == errno.EPIPE: return False
+                    
+            except Exception, e:
+                self.last_exceptions.append( (derivation_bundle, sys.exc_info()) )
+                
+                if self._break_on_exception:
+                    raise FilterException(e, None)
+        else:
+            if self.last_exceptions:
+                raise FilterException(e, None)
+                
+        return True
+        
+    def run_filters(self, filters, files):
+        # If all given filters were not found or had wrong argument count, do nothing
+        if not filters: return
+        
+        reader_args = self.reader_args()
+        files = list(self.transform(files))
+        
+        try:
+            if self.jobs > 1:
+                if not all(self.can_be_sharded(filter) for filter in filters):
+                    warn("Not all filters can be run in parallel; processing documents serially.")
+                elif not self.can_run_in_parallel(files):
+                    warn("Documents with the same name appear more than once; processing documents serially.")
                 else:
-                    if self.last_exceptions:
-                        raise FilterException(e, None)
+                    if not self.run_filters_in_parallel(filters, files, reader_args): return
+                    files = []
+        
+            for file in files:
+                try:
+                    if not self.process_file(filters, file, reader_args): return
                         
-            except FilterException, e:
-                for bundle, exception in self.last_exceptions:
-                    err("Processing failed on derivation %s of file %s:", bundle.label(), file)
-                    sys.excepthook(*exception)
+                except FilterException, e:
+                    for bundle, exception in self.last_exceptions:
+                        err("Processing failed on derivation %s of file %s:", bundle.label(), file)
+                        sys.excepthook(*exception)
                     
-            except IOError, e:
-                for bundle, exception in self.last_exceptions:
-                    err("Processing failed on derivation %s of file %s:", bundle.label(), file)
-                    sys.excepthook(*exception)
-                err("Processing failed with IOError: %s", e)
-                raise
+                except IOError, e:
+                    for bundle, exception in self.last_exceptions:
+                        err("Processing failed on derivation %s of file %s:", bundle.label(), file)
+                        sys.excepthook(*exception)
+                    err("Processing failed with IOError: %s", e)
+                    raise
 
+            for state_file in self.merge_state_files:
+                self.merge_states(filters, state_file)
+            if self.save_state_file:
+                self.save_states(filters, self.save_state_file)
+                        
+            for filter in filters:
+                filter.output()
+                if self.verbose:
+                    print >>sys.stderr, "---"
+        finally:
+            self.close_output_files(filters)
+                
+    @staticmethod
+    def close_output_files(filters):
+        '''Output filters may keep their output files open between derivations (see
+apps.cn.output.OutputDerivation). This flushes and closes them.'''
         for filter in filters:
-            filter.output()
-            if self.verbose:
-                print >>sys.stderr, "---"
+            close = getattr(filter, 'close_output_files', None)
+            if close: close()
+                
+    @staticmethod
+    def can_be_sharded(filter):
+        '''A filter can be run over separate shards of the corpus if it only depends on one document at a
+time, or if the states it accumulates over each shard can be merged.'''
+        return getattr(filter, 'is_document_local', False) or Filter.is_mergeable(filter)
+        
+    @staticmethod
+    def needs_merging(filter):
+        return Filter.is_mergeable(filter) and not getattr(filter, 'is_document_local', False)
+        
+    @staticmethod
+    def save_states(filters, state_file):
+        '''Writes the state of each mergeable filter in _filters_ to _state_file_.'''
+        states = [ (filter.__class__.__name__, filter.snapshot() if Filter.is_mergeable(filter) else None)
+                   for filter in filters ]
+        with file(state_file, 'wb') as f:
+            pickle.dump(states, f, pickle.HIGHEST_PROTOCOL)
+            
+    @staticmethod
+    def merge_states(filters, state_file):
+        '''Merges filter states saved by a previous run with the same filters into _filters_.'''
+        with file(state_file, 'rb') as f:
+            states = pickle.load(f)
+            
+        if [name for (name, state) in states] != [filter.__class__.__name__ for filter in filters]:
+            raise RuntimeError("Filter states in %s were saved from a different set of filters (%s)." %
+                               (state_file, ', '.join(name for (name, state) in states)))
+            
+        for filter, (name, state) in izip(filters, states):
+            if state is not None and Filter.is_mergeable(filter):
+                filter.merge(state)
+                
+    def work_units(self, files):
+        '''Splits the file specifiers _files_ into units of work, yielding a (file specifier, unit) pair
+for each. A directory is split into its documents, unless processing breaks on the first error, in which
+case the rest of the directory must be skipped, just as it is when run serially.'''
+        for file in files:
+            if self.is_pair_spec(file) or self._break_on_exception:
+                yield file, file
+            else:
+                for doc_path in DirFileGuessReader(file, verbose=self.verbose).document_paths():
+                    yield file, doc_path
+                    
+    def can_run_in_parallel(self, files):
+        '''Output filters name their output files after the input document, so two units of work
+containing documents with the same name could interleave their output. This checks that they don't.'''
+        seen = set()
+        for file, unit in self.work_units(files):
+            if self.is_pair_spec(file): continue
+            
+            names = set(os.path.basename(padded_rsplit(doc_path, ':', 1)[0])
+                        for doc_path in DirFileGuessReader(unit, verbose=self.verbose).document_paths())
+            if names & seen: return False
+            seen |= names
+            
+        return True
+
+    def exception_reports(self):
+        '''Returns a list of (derivation label, formatted traceback) pairs for _last_exceptions_, which
+unlike the exceptions themselves can be passed back from a worker process.'''
+        def format_exception(exception):
+            # capture exactly what sys.excepthook would have printed
+            old_stderr, sys.stderr = sys.stderr, StringIO()
+            try:
+                sys.excepthook(*exception)
+                return sys.stderr.getvalue()
+            finally:
+                sys.stderr = old_stderr
+                
+        return [ (bundle.label(), format_exception(exception))
+                 for bundle, exception in self.last_exceptions ]
+                 
+    @staticmethod
+    def report_exceptions(file, reports):
+        for label, exception in reports:
+            err("Processing failed on derivation %s of file %s:", label, file)
+            sys.stderr.write(exception)
+
+    @staticmethod
+    def shards(units, nshards):
+        '''Splits the list _units_ into at most _nshards_ contiguous shards of roughly equal size.'''
+        shard_size = max(1, -(-len(units) // nshards))
+        return [ units[i:i+shard_size] for i in xrange(0, len(units), shard_size) ]
+
+    def run_filters_in_parallel(self, filters, files, reader_args):
+        '''Distributes the documents under _files_ over a pool of _jobs_ worker processes, each of which
+runs its own copy of _filters_. Each document is processed in full by a single worker, so any output
+it produces is identical to a serial run. Exceptions are reported by the parent in document order.
+
+If any filter accumulates state over the corpus, the documents are split into contiguous shards instead,
+each processed by a fresh worker process, and the state of each shard is merged back into _filters_
+in corpus order.
+Returns False if processing should stop altogether.'''
+        global _worker_context
+        
+        merged_filters = [ filter for filter in filters if self.needs_merging(filter) ]
+        _worker_context = (self, filters, merged_filters, reader_args)
+        
+        units = list(self.work_units(files))
+        if merged_filters:
+            shards = self.shards(units, self.jobs * ShardsPerJob)
+            # A worker must not carry state over from one shard to the next
+            pool = multiprocessing.Pool(self.jobs, maxtasksperchild=1)
+        else:
+            shards = [ [unit] for unit in units ]
+            pool = multiprocessing.Pool(self.jobs)
+            
+        # Merging into _filters_ only happens after the pool has finished, since new workers are forked
+        # from this process whenever a worker exits
+        shard_states = []
+        try:
+            results = pool.imap(_process_in_worker, ([unit for (file, unit) in shard] for shard in shards))
+            
+            for shard, (unit_results, states) in izip(shards, results):
+                for (file, unit), (carry_on, reports, io_error, diagnostics) in izip(shard, unit_results):
+                    sys.stderr.write(diagnostics)
+                    self.report_exceptions(file, reports)
+                    
+                    if io_error:
+                        err("Processing failed with IOError: %s", io_error)
+                        raise IOError(io_error)
+                    if not carry_on:
+                        pool.terminate()
+                        return False
+                        
+                shard_states.append(states)
+                    
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            _worker_context = None
+            
+        for states in shard_states:
+            for filter, state in izip(merged_filters, states):
+                filter.merge(state)
+            
+        return True
+        
+# The number of shards per worker process into which the corpus is split when filter states are merged.
+# More shards balance the load between workers better, at the cost of merging more states.
+ShardsPerJob = 4
+
+# Set in the parent process before the worker pool is forked, so that each worker inherits the tracer
+# and its own copy of the filters.
+_worker_context = None
+
+def _process_unit_in_worker(tracer, filters, file, reader_args):
+    '''Runs the inherited filters over _file_ inside a worker process, returning a quadruple
+(whether to carry on, exception reports, IOError message or None, what was written to stderr).
+Whatever the filters write to stderr (such as the failures MakeDependencies reports and carries on from) is
+captured, so that the parent can write it out in document order instead of interleaved with other workers'.'''
+    old_stderr, sys.stderr = sys.stderr, StringIO()
+    try:
+        try:
+            return tracer.process_file(filters, file, reader_args), [], None, sys.stderr.getvalue()
+        except FilterException, e:
+            return True, tracer.exception_reports(), None, sys.stderr.getvalue()
+        except IOError, e:
+            return True, tracer.exception_reports(), str(e), sys.stderr.getvalue()
+    finally:
+        sys.stderr = old_stderr
+        
+def _process_in_worker(shard):
+    '''Processes each file in _shard_ inside a worker process, returning a list of the results for
+each file, together with the final states of the filters to be merged.'''
+    tracer, filters, merged_filters, reader_args = _worker_context
+    
+    results = []
+    for file in shard:
+        result = _process_unit_in_worker(tracer, filters, file, reader_args)
+        # worker processes exit without closing their files, so anything still buffered would be lost
+        tracer.close_output_files(filters)
+        results.append(result)
+        
+        carry_on, reports, io_error, diagnostics = result
+        if io_error or not carry_on: break
+        
+    return results, [ filter.snapshot() for filter in merged_filters ]
@@ -12,7 +12,7 @@ from munge.tests.penn_parse_tests import PennParseTests
 from munge.tests.penn_tests import PennTests
 from munge.tests.parse_tests import ParseTests
 from munge.tests.lex_tests import LexTests
-from munge.tests.ccg_tests import CCGTests
+from munge.tests.ccg_tests import CCGTests, CCGReaderTests, FastParseTests, CompactCorpusTests
 from munge.tests.cat_tests import CatTests
 from munge.tests.trace_tests import TraceTests
 from munge.tests.util_tests import UtilTests
@@ -25,7 +25,7 @@ if __name__ == '__main__':
     except ImportError: pass
     
     for test_case in (PennParseTests, PennTests, ParseTests, 
-					  LexTests, CCGTests, CatTests, TraceTests, UtilTests, TgrepTests):
+					  LexTests, CCGTests, CCGReaderTests, FastParseTests, CompactCorpusTests, CatTests, TraceTests, UtilTests, TgrepTests):
         unittest.TestLoader().loadTestsFromTestCase(test_case)
 
     unittest.main()
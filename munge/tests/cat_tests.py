@@ -8,9 +8,13 @@
 # notify the maintainer Daniel Tse <cncandc@gmail.com>.
 
 import os
+import cPickle as pickle
 import unittest
 from munge.cats.nodes import *
 from munge.cats.parse import *
+from munge.cats.interned import intern_category, parse_interned
+import munge.cats.headed.parse as headed
+from munge.cats.headed.nodes import Slot
 from munge.vis.dot import *
 
 class CatTests(unittest.TestCase):
@@ -34,6 +38,65 @@ class CatTests(unittest.TestCase):
 
         self.assertEqual(repr(cat), r'(S\-NP[b])/.(S[c]/@NP)[feat]')
 
+    def testInterned(self):
+        cat = parse_interned(r'(S[dcl]\NP)/(S\NP)')
+        self.assert_(cat is intern_category(parse_category(r'(S[dcl]\NP)/(S\NP)')))
+        self.assert_(cat is not parse_interned(r'(S\NP)/(S\NP)'))
+        self.assertEqual(repr(cat), r'(S[dcl]\NP)/(S\NP)')
+        self.assertEqual(cat.slash_count(), 3)
+
+        # interned categories are derived rather than modified
+        self.assert_(cat.without_features() is parse_interned(r'(S\NP)/(S\NP)'))
+        self.assert_(cat.left.with_feature('conj') is parse_interned(r'(S[dcl]\NP)[conj]'))
+        self.assertEqual(repr(cat), r'(S[dcl]\NP)/(S\NP)')
+
+        labelled = parse_category(r'(S\NP)/(S\NP)').clone()
+        labelled.labelled()
+        self.assert_(intern_category(labelled) is not parse_interned(r'(S\NP)/(S\NP)'))
+        self.assert_(intern_category(labelled).without_slash_indices() is parse_interned(r'(S\NP)/(S\NP)'))
+
+        self.assertEqual(cat.category(), parse_category(r'(S[dcl]\NP)/(S\NP)'))
+        self.assert_(cat.category().equal_respecting_features(parse_category(r'(S[dcl]\NP)/(S\NP)')))
+
+    def testInternedPickling(self):
+        cat = intern_category(headed.parse_category(r'((S[dcl]{_}\NP{Y}){_}/(S[dcl]{W}\NP{Z}){W}){_}~SB'))
+        self.assertEqual(cat.alias, 'SB')
+        for protocol in (0, pickle.HIGHEST_PROTOCOL):
+            self.assert_(pickle.loads(pickle.dumps(cat, protocol)) is cat)
+
+    def testHeadedParseIsFresh(self):
+        cat_string = r'((S[dcl]{_}\NP{Y}){_}/(S[dcl]{Z}\NP{Y}){Z}){_}~SB'
+        first, second = headed.parse_category(cat_string), headed.parse_category(cat_string)
+        self.assert_(first is not second)
+        self.assertEqual(repr(first), repr(headed.parse_uncached_category(cat_string)))
+        self.assertEqual(first.alias, 'SB')
+
+        # atoms which share a variable share a slot, but copies share none
+        self.assert_(first.left.right.slot is first.right.right.slot)
+        self.assert_(first.left.right.slot is not second.left.right.slot)
+        self.assert_(first.left.right.slot.head is not second.left.right.slot.head)
+        self.assert_(first.left.features is not second.left.features)
+
+    def testUnifyHeads(self):
+        slots = [ Slot(var) for var in 'ABCDE' ]
+        slots[1].head.lex = 'filled'
+
+        # the unified slots take on the head of the argument
+        slots[0].unify_heads(slots[1])
+        self.assertEqual(slots[0].head.lex, 'filled')
+
+        slots[2].unify_heads(slots[3])
+        slots[3].unify_heads(slots[0])
+        self.assert_(all(slot.head is slots[1].head for slot in slots[:4]))
+        self.assert_(slots[4].head is not slots[1].head)
+
+        slots[4].head.lex = 'other'
+        slots[4].unify_heads(slots[2])
+        self.assertEqual([ slot.head.lex for slot in slots ], ['filled'] * 5)
+
+        slots[0].head.lex = 'changed'
+        self.assertEqual(slots[4].head.lex, 'changed')
+
     def tearDown(self):
         if os.path.exists('cat.dot'):
             os.remove('cat.dot')
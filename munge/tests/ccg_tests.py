@@ -10,9 +10,17 @@
 import os
 import unittest
 from munge.ccg.nodes import Node, Leaf
-from munge.ccg.parse import parse_tree
+from munge.ccg.parse import parse_tree, fast_parse_tree
 from munge.cats.nodes import AtomicCategory
 from munge.vis.dot import *
+from munge.ccg.io import CCGbankReader, FastCCGbankReader
+from munge.ccg.compact import CompactCorpus
+from munge.io.offsets import OffsetIndex, offset_index_for, sidecar_path
+from munge.io.cache import write_cache, load_cache, cache_path
+from munge.trees.traverse import leaves, nodes, nodes_postorder, text
+from munge.util.exceptions import CCGbankParseException
+import shutil
+import tempfile
 
 class CCGTests(unittest.TestCase):
     def setUp(self):
@@ -38,5 +46,112 @@ class CCGTests(unittest.TestCase):
         if os.path.exists('ccg_deriv.dot'):
             os.remove('ccg_deriv.dot')
 
+class FastParseTests(unittest.TestCase):
+    def setUp(self):
+        with open('munge/tests/wsj_0003.auto') as f:
+            self.from_ccgbank = f.readlines()[1].rstrip()
+
+    def testFastParse(self):
+        for deriv_string in (self.from_ccgbank, '(<L N NN NN lex N>)', '( <T NP 0 1>(<L N NN NN ) N> ) )'):
+            expected, tree = parse_tree(deriv_string), fast_parse_tree(deriv_string)
+            self.assertEqual(tree, expected)
+            self.assertEqual(repr(tree), repr(expected))
+            
+            for node, expected_node in zip(nodes(tree), nodes(expected)):
+                self.assertEqual(node.parent is None, expected_node.parent is None)
+                if node.parent is not None:
+                    self.assertEqual(str(node.parent), str(expected_node.parent))
+                    
+        for deriv_string in ('(<T NP 0 1> (<L N NN NN lex N>)', '(<L N NN NN lex N>) )', '(<T NP 0 2> )',
+                             '(<X N NN NN lex N>)'):
+            self.assertRaises(CCGbankParseException, fast_parse_tree, deriv_string)
+
+class CCGReaderTests(unittest.TestCase):
+    def testIndexedRetrieval(self):
+        fn = 'munge/tests/wsj_0003.auto'
+        for deriv in CCGbankReader(fn):
+            self.assertEqual(str(CCGbankReader(fn)[deriv.der_no]), str(deriv))
+        self.assert_(CCGbankReader(fn)[1000] is None)
+        
+    def testFastReader(self):
+        fn = 'munge/tests/wsj_0003.auto'
+        self.assertEqual([ str(deriv) for deriv in FastCCGbankReader(fn) ],
+                         [ str(deriv) for deriv in CCGbankReader(fn) ])
+        self.assertEqual(str(FastCCGbankReader(fn)[4]), str(CCGbankReader(fn)[4]))
+
+    def testLazyBundles(self):
+        for deriv in CCGbankReader('munge/tests/wsj_0003.auto'):
+            self.failIf(deriv.is_parsed())
+            raw_text, tokens = deriv.raw_text(), deriv.tokens()
+            self.failIf(deriv.is_parsed())
+
+            self.assertEqual(tokens, [ leaf.lex for leaf in leaves(deriv.derivation) ])
+            self.assert_(deriv.is_parsed())
+            self.assertEqual(deriv.raw_text(), raw_text)
+            self.assertEqual(deriv.tokens(), tokens)
+
+    def testOffsetIndexInvalidation(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            fn = os.path.join(tempdir, 'chtb_0001.fid')
+            shutil.copy('munge/tests/wsj_0003.auto', fn)
+            nderivs = len(offset_index_for(fn).spans)
+            self.assert_(os.path.exists(sidecar_path(fn)))
+
+            with open(fn, 'a') as f:
+                print >>f, 'ID=wsj_0001.100 PARSER=GOLD NUMPARSE=1'
+                print >>f, '(<L N NN NN test N>)'
+            self.assertEqual(len(offset_index_for(fn).spans), nderivs + 1)
+            self.assertEqual(list(CCGbankReader(fn + ':100'))[0].derivation.lex, 'test')
+        finally:
+            shutil.rmtree(tempdir)
+
+    def testDerivationCache(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            fn = os.path.join(tempdir, 'chtb_0001.fid')
+            shutil.copy('munge/tests/wsj_0003.auto', fn)
+            expected = [ str(deriv) for deriv in CCGbankReader(fn) ]
+
+            write_cache(fn, CCGbankReader.cache_codec)
+            self.assert_(os.path.exists(cache_path(fn)))
+            self.assertEqual([ str(deriv) for deriv in CCGbankReader(fn) ], expected)
+            for deriv in CCGbankReader(fn):
+                for leaf in leaves(deriv.derivation):
+                    self.assert_(leaf.parent is not None)
+
+            with open(fn, 'a') as f:
+                print >>f, 'ID=wsj_0001.100 PARSER=GOLD NUMPARSE=1'
+                print >>f, '(<L N NN NN test N>)'
+            self.assert_(load_cache(fn, CCGbankReader.cache_codec) is None)
+            self.assertEqual(len(list(CCGbankReader(fn))), len(expected) + 1)
+        finally:
+            shutil.rmtree(tempdir)
+
+class CompactCorpusTests(unittest.TestCase):
+    def testCompactCorpus(self):
+        bundles = list(CCGbankReader('munge/tests/wsj_0003.auto'))
+        corpus = CompactCorpus()
+        corpus.extend(bundles)
+        self.assertEqual(len(corpus), len(bundles))
+
+        for deriv_index, (bundle, view_bundle) in enumerate(zip(bundles, corpus)):
+            deriv, view = bundle.derivation, view_bundle.derivation
+            self.assertEqual(view_bundle.label(), bundle.label())
+            self.assertEqual(repr(view), repr(deriv))
+            self.assertEqual(text(view), text(deriv))
+            self.assertEqual(corpus.derivation(deriv_index), deriv)
+
+            for view_node, node in zip(nodes_postorder(view), nodes_postorder(deriv)):
+                self.assertEqual(view_node.is_leaf(), node.is_leaf())
+                self.assertEqual(str(view_node.cat), str(node.cat))
+                self.assertEqual(view_node.count(), node.count())
+                self.assertEqual(view_node.leaf_count(), node.leaf_count())
+                if node.parent is None:
+                    self.assert_(view_node.parent is None)
+                else:
+                    self.assertEqual(str(view_node.parent), str(node.parent))
+                    self.assert_(view_node in list(view_node.parent))
+
 if __name__ == '__main__':
     unittest.main()
@@ -7,8 +7,16 @@
 # supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
 # notify the maintainer Daniel Tse <cncandc@gmail.com>.
 
-import unittest, os
+import unittest, os, shutil, tempfile
 from munge.proc.tgrep.tgrep import *
+from munge.proc.tgrep.compiler import compile_query, ConstraintOrdering
+import munge.proc.tgrep.compiler as compiler
+from munge.proc.tgrep.nodes import Context
+from munge.proc.tgrep.structure import StructureIndex
+from munge.proc.tgrep.index import TgrepIndex, index_path, may_match
+from munge.proc.tgrep.search import search
+from cStringIO import StringIO
+from munge.trees.traverse import leaves
 from munge.ccg.io import CCGbankReader
 
 class TgrepTests(unittest.TestCase):
@@ -95,5 +103,164 @@ class TgrepTests(unittest.TestCase):
         self.assertFalse(matches(self.tree, r'{((S\NP)\(S\NP))\NP $ NP} < A | > B | $ C'))
         self.assertTrue(matches(self.tree, r'{((S\NP)\(S\NP))\NP $ NP} < A | > (S\NP)\(S\NP) | $ C'))
         
+    def testCompiledMatchesInterpreted(self):
+        for expression in (r'NP <1 NP[nb]/N=X $ NP[conj]', r'* << ^in', r'* >> S[dcl] . *', r'* .. ^the',
+                           r'S[dcl]\NP < {/\(S/=Y ! <2 ~Y}', r'* <1 *=L <2 =L', r'* < N | > NP | $ *',
+                           r'NP ? < N=K', r'/NP/a #<2', r'* !<< ^/.+s$/', r'* <3 *'):
+            query = parse_query(expression)
+            compiled = compile_query(query)
+            
+            for node in nodes(self.tree):
+                interpreted_context, compiled_context = Context(), Context()
+                self.assertEqual(bool(query.is_satisfied_by(node, interpreted_context)),
+                                 bool(compiled(node, compiled_context)))
+                self.assertEqual(interpreted_context.keys(), compiled_context.keys())
+                for var in interpreted_context:
+                    self.assert_(interpreted_context[var] is compiled_context[var])
+
+    def testConstraintOrdering(self):
+        query = parse_query(r'* << ^the < /^N$/=X $ NP .. ^findings <1 N/N')
+        ordering = ConstraintOrdering(query.constraints)
+        # the capturing constraint stays put, and the cheapest constraints of each run go first
+        self.assertEqual(ordering.runs, [[0], [1], [2, 3, 4]])
+        self.assertEqual(ordering.order, [0, 1, 4, 2, 3])
+        
+        # a constraint which rejects half the nodes it sees moves ahead of cheaper ones which reject none
+        ordering.rejections[3] = 500
+        ordering.update(1000)
+        self.assertEqual(ordering.order, [0, 1, 3, 4, 2])
+        
+    def testReorderedMatchesInterpreted(self):
+        interval, compiler.ReorderInterval = compiler.ReorderInterval, 5
+        try:
+            for expression in (r'* << ^the <1 * $ * > *', r'* < *=X << ^the $ NP ? < /^N$/=Y .. * <2 =X',
+                               r'* >> * < * ! << ^in'):
+                query = parse_query(expression)
+                compiled = compile_query(query)
+                
+                for node in nodes(self.tree):
+                    interpreted_context, compiled_context = Context(), Context()
+                    self.assertEqual(bool(query.is_satisfied_by(node, interpreted_context)),
+                                     bool(compiled(node, compiled_context)))
+                    self.assertEqual(interpreted_context, compiled_context)
+        finally:
+            compiler.ReorderInterval = interval
+            
+    def testPrecedence(self):
+        self.assertTrue(matches(self.tree, r'^Although . ^preliminary'))
+        self.assertFalse(matches(self.tree, r'^Although . ^findings'))
+        
+    def testPrecedenceInSubtree(self):
+        # the operators look beyond the subtree given to tgrep, to the rest of its derivation
+        subtree = next(find_first(self.tree, r'{N} < ^preliminary < ^findings'))
+        self.assertEqual(subtree.text(), ['preliminary', 'findings'])
+        self.assertEqual(len(list(tgrep(subtree, r'^findings . ^were'))), 1)
+        self.assertEqual(len(list(tgrep(subtree, r'^findings . ^reported'))), 0)
+        self.assertEqual(len(list(tgrep(subtree, r'^findings .. ^Although'))), 1)
+        
+    def testStructureIndex(self):
+        index = StructureIndex(self.tree)
+        findings = list(leaves(self.tree))[2]
+        self.assertEqual(index.leaf_index(findings), 2)
+        self.assertEqual(list(index.leaves_after(findings)), list(leaves(self.tree))[3:])
+        self.assertEqual(list(index.leaves_up_to(findings)), list(leaves(self.tree))[:3])
+        self.assertEqual(index.leaves_after(self.tree), None)
+        
+        # swap 'preliminary' and 'findings', after which the index must be rebuilt
+        parent = findings.parent
+        parent.lch, parent.rch = parent.rch, parent.lch
+        index.invalidate()
+        self.assertEqual(index.leaf_index(findings), 1)
+        self.assertEqual([leaf.lex for leaf in index.leaves[:3]], ['Although', 'findings', 'preliminary'])
+
+    def testRequirements(self):
+        def satisfied(expression):
+            requirements = get_requirements(expression)
+            return len(satisfied_requirements(self.tree, requirements)) == len(requirements)
+            
+        # (including the requirement that some N/N is a child of an N)
+        self.assertEqual(len(get_requirements(r'/^N$/=P < {N/N $ ^findings} >> /S/a')), 5)
+        # negated, alternative and reluctant constraints, * and =X require nothing
+        self.assertEqual(get_requirements(r'* ! < A ? < B < C | < D <1 *=X <2 =X'), {})
+        
+        self.assertTrue(satisfied(r'/^N$/=P < {N/N $ ^findings} >> /S/a'))
+        self.assertTrue(satisfied(r'^Although .. ^problem'))
+        self.assertFalse(satisfied(r'NP < ^missing'))
+        self.assertFalse(satisfied(r'* < /^S\[q\]/'))
+
+    def testQueryCache(self):
+        query = get_query(r'{NP[conj]  $NP } < ,')
+        self.assert_(get_query(r'{NP[conj] $ NP} < ,') is query)
+        self.assert_(get_query(r'{NP[conj] $ NP} < ,') is query)
+        self.assert_(get_query(r'{NP[conj] $ NP} < N') is not query)
+        
+    def testSubstrings(self):
+        self.assertEqual(get_substrings(r'NP[conj] < {(S[dcl]\NP)/NP $ ^findings} < /^N/'),
+                         set(['NP[conj]', 'S[dcl]', 'NP', 'findings']))
+        self.assertEqual(get_substrings(r'* ! < ^missing'), set())
+        
+        for expression in (r'NP[conj]', r'* < ^missing', r'(S[to]\NP)/(S[b]\NP)', r'^Although .. ^problem'):
+            for bundle in CCGbankReader('munge/tests/wsj_0003.auto'):
+                may_match = may_match_text(bundle, expression)
+                self.failIf(bundle.is_parsed())
+                if not may_match:
+                    self.failIf(matches(bundle.derivation, expression))
+                    
+    def testSearch(self):
+        files = ['munge/tests/wsj_0003.auto', 'munge/tests/wsj_0087.auto']
+        def searched(**kwargs):
+            out = StringIO()
+            summary = search(r'NP < N', files, show_mode='tokens', caption_modes=[], out=out, **kwargs)
+            return out.getvalue().splitlines(), summary
+            
+        matches, summary = searched(find_mode=Tgrep.FIND_ALL)
+        self.assert_(summary.complete)
+        self.assertEqual(summary.nshown, len(matches))
+        
+        self.assertEqual(searched(find_mode=Tgrep.FIND_ALL, jobs=2)[0], matches)
+        self.assertEqual(searched(find_mode=Tgrep.FIND_ALL, jobs=2, offset=3, max_matches=5)[0], matches[3:8])
+        self.assertFalse(searched(find_mode=Tgrep.FIND_ALL, max_matches=5)[1].complete)
+        
+        counted, count_summary = searched(count_only=True, jobs=2)
+        self.assertEqual(counted, [])
+        self.assertEqual((count_summary.nmatched, count_summary.total), (summary.nmatched, summary.total))
+        
+    def testIndex(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            fn = os.path.join(tempdir, 'chtb_0003.auto')
+            shutil.copy('munge/tests/wsj_0003.auto', fn)
+            TgrepIndex.build(fn).save(fn)
+            self.assert_(os.path.exists(index_path(fn)))
+            
+            index = TgrepIndex.load(fn)
+            def candidates(expression):
+                return index.candidates(get_requirements(expression))
+            def matching(expression):
+                return set(bundle.der_no for bundle in CCGbankReader(fn) if matches(bundle.derivation, expression))
+                
+            self.assertEqual(candidates(r'* < {N/N $ ^findings}'), set([4]))
+            self.assertEqual(candidates(r'NP[conj]'), matching(r'NP[conj]'))
+            self.assertEqual(candidates(r'NP < ^missing'), set())
+            # nothing can be ruled out for a query without requirements
+            self.assert_(candidates(r'* ! < NP') is None)
+            
+            for expression in (r'/^N$/ < {N/N $ ^findings}', r'^Although .. ^problem', r'NP[conj] > NP',
+                               r'/S\[dcl\]/ < /^N/a'):
+                self.assert_(matching(expression) <= candidates(expression))
+                self.assertEqual(set(bundle.der_no for bundle in CCGbankReader(fn)
+                                         if may_match(bundle, expression) and
+                                            matches(bundle.derivation, expression)),
+                                 matching(expression))
+                                 
+            # the index is not consulted once the document changes
+            with open(fn, 'a') as f:
+                print >>f, 'ID=wsj_0003.100 PARSER=GOLD NUMPARSE=1'
+                print >>f, '(<L N NN NN missing N>)'
+            self.assert_(TgrepIndex.load(fn) is None)
+            self.assert_(all(may_match(bundle, r'* < ^missing') for bundle in CCGbankReader(fn)))
+        finally:
+            shutil.rmtree(tempdir)
+        
 if __name__ == '__main__':
     unittest.main()
@@ -12,7 +12,7 @@ import munge
 
 from itertools import starmap, islice, izip, count
 
-from munge.cats.paths import applications, applications_with_path, applications_per_slash_with_path
+from munge.cats.paths import applications, applications_with_path, applications_per_slash_with_path, relabellable_copy
 from munge.cats.parse import parse_category
 from munge.cats.trace import analyse
 
@@ -38,6 +38,28 @@ class TraceTests(unittest.TestCase):
         self.assert_(cat1 == cat2)
         self.assert_(cat1 != cat3)
     
+    def testAnalyseCache(self):
+        NP, conj, comma = parse_category('NP'), parse_category('conj'), parse_category(',')
+        NPconj = parse_category('NP[conj]')
+        # productions which differ only in features must not share a cached analysis
+        for _ in xrange(2):
+            self.assertEqual(analyse(NP, NPconj, NP), 'conjoin')
+            self.assertEqual(analyse(NP, NP, NP), 'np_np_apposition')
+            self.assertEqual(analyse(conj, NP, NPconj), 'conj_absorb')
+            self.assertEqual(analyse(comma, NP, NPconj), 'conj_comma_absorb')
+            self.assertEqual(analyse(comma, NP, NP), 'l_punct_absorb')
+
+    def testRelabellableCopy(self):
+        cat = parse_category(r'((S\NP)/(S\NP))/NP').clone()
+        cat.labelled()
+        copy = relabellable_copy(cat)
+
+        self.failIf(copy.is_labelled())
+        copy.labelled(5)
+        self.assertEqual([label for (_, label) in cat.slashes()], [0, 1, 2, 3])
+        self.assertEqual([label for (_, label) in copy.slashes()], [5, 6, 7, 8])
+        self.assert_(copy.equal_respecting_features(cat))
+
     def test_nested_compounds(self):
         cat1 = parse_category('((A\\.B)/.(C/.D))/.((A/.B)/.C)')
         nesteds = cat1.nested_compound_categories()
@@ -93,3 +93,26 @@ class UtilTests(unittest.TestCase):
     def testTake(self):
         l = xrange(int(1e9))
         self.assertEquals(list(take(10, l)), range(10))
+
+    def testMergeInto(self):
+        c = CountDict(a=1, b=2)
+        merge_into(c, { 'b': 3, 'c': 4 })
+        self.assertEquals(c, { 'a': 1, 'b': 5, 'c': 4 })
+
+        d = { 'x': set([1]), 'y': [1], 'z': { 'w': 1 } }
+        merge_into(d, { 'x': set([2]), 'y': [2], 'z': { 'w': 1, 'v': 1 } })
+        self.assertEquals(d, { 'x': set([1, 2]), 'y': [1, 2], 'z': { 'w': 2, 'v': 1 } })
+
+    def testLRUDict(self):
+        d = LRUDict(2)
+        d['a'] = 1
+        d['b'] = 2
+        self.assertEquals(d['a'], 1)
+
+        # 'b' is now the least recently used
+        d['c'] = 3
+        self.assert_('b' not in d)
+        self.assertEquals(len(d), 2)
+        self.assertEquals(d.get('b'), None)
+        self.assertEquals((d['a'], d['c']), (1, 3))
+        self.assertRaises(KeyError, lambda: d['b'])
@@ -7,6 +7,7 @@
 # supplied in the Chinese CCGbank conversion distribution. If the LICENCE file is missing, please
 # notify the maintainer Daniel Tse <cncandc@gmail.com>.
 import operator
+from collections import OrderedDict
 
 class CountDict(dict):
     '''Accessing a non-existent key in this dictionary will return the value zero.'''
@@ -19,6 +20,43 @@ class PrefixSet(set):
     def __contains__(self, item):
         return any(candidate.startswith(item) for candidate in self)
 
+class LRUDict(object):
+    '''A mapping which holds at most _max_size_ items, discarding the least recently used item when full.'''
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.items = OrderedDict()
+        
+    def get(self, key, default=None):
+        try:
+            value = self.items.pop(key)
+        except KeyError:
+            return default
+        
+        # move the item to the most recently used end
+        self.items[key] = value
+        return value
+        
+    def __getitem__(self, key):
+        value = self.get(key, self)
+        if value is self: raise KeyError(key)
+        return value
+        
+    def __setitem__(self, key, value):
+        self.items.pop(key, None)
+        self.items[key] = value
+        
+        if len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+            
+    def __contains__(self, key):
+        return key in self.items
+        
+    def __len__(self):
+        return len(self.items)
+        
+    def clear(self):
+        self.items.clear()
+        
 def sorted_by_value_desc(dict):
     '''Given a _dict_, returns its (key, value) pairs sorted in descending order.'''
     return sorted(dict.iteritems(), key=operator.itemgetter(1), reverse=True)
@@ -30,4 +68,30 @@ def smash_key_case(d):
 def update(dict, **kwargs):
     '''Chainable dict update.'''
     dict.update(**kwargs)
-    return dict
\ No newline at end of file
+    return dict
+
+def merged(value, other):
+    '''Combines two accumulated values of the same kind: numbers are added, sets are unioned, lists are
+concatenated, and dictionaries are merged key by key. Any other value must define merge(other).
+_value_ may be modified in place.'''
+    if isinstance(value, (int, long, float)):
+        return value + other
+    elif isinstance(value, (set, frozenset)):
+        return value | other
+    elif isinstance(value, list):
+        return value + other
+    elif isinstance(value, dict):
+        return merge_into(value, other)
+    else:
+        value.merge(other)
+        return value
+
+def merge_into(d, other):
+    '''Merges the dictionary _other_ into _d_, combining the values of keys present in both with merged().
+Returns _d_.'''
+    for k, v in other.iteritems():
+        if k in d:
+            d[k] = merged(d[k], v)
+        else:
+            d[k] = v
+    return d